@@ -0,0 +1,264 @@
+# Servicio_correccion.py
+# --------------------------------
+# Servicio local de corrección (HTTP en localhost o socket Unix).
+# Carga y compila los canónicos UNA vez y corrige entregas recibidas como
+# JSON, sin lanzar un proceso por entrega: pensado para que el portal de
+# entregas devuelva los puntajes apenas el alumno sube su archivo.
+#
+# Cada canónico se vuelve a cargar solo si su archivo cambia (mtime/tamaño).
+# Usa las mismas rutas (variables de entorno) que los scripts.
+#
+# Uso:
+#   python Servicio_correccion.py                         # http://127.0.0.1:8765
+#   python Servicio_correccion.py --puerto 9000 --solo bpmn,bd
+#   python Servicio_correccion.py --socket /tmp/correccion.sock
+#
+# Pedidos (POST, cuerpo JSON; una entrega o {"entregas": [...]} para un lote):
+#   /bpmn  {"archivo": "alumno.txt", "inventario": "<texto tipo;subtipo;nombre_visible;cantidad>"}
+#          -> {"archivo", "tecnica": {...}, "administrativa": {...}, "integracion": {...}}
+#   /bd    {"archivo": "alumno.json", "esquema": {<JSON tables/fields/relations>}}
+#          -> {"archivo", ("canonico",) "%Tablas", "%Campos", "%PKs", "%Relaciones", "%Total"}
+#   /sql   {"archivo": "consultas.json", "consultas": {<JSON de consultas>}}
+#          -> {"archivo", "filas": [{query_name, consigna_asignada, similitud_%, ...}]}
+# Una entrega que no se puede corregir devuelve {"archivo", "error"} (en un
+# lote, el resto se corrige igual). GET /estado lista los canónicos cargados.
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "bpmn"))
+sys.path.insert(0, os.path.join(RAIZ, "database"))
+
+from comun.vigilancia import firma_archivo
+
+import Calcular_pipeline_BPMN_B2 as bpmn
+import CompararBD_contra_Canonico as bd
+import CompararSQL_contra_Canonico as sql
+from Calcular_rubrica_tecnica_B2 import cargar_inventario, compilar_canonico
+from Calcular_rubrica_administrativa_B2 import filas_desde_lineas
+
+PUERTO_POR_DEFECTO = int(os.getenv("PUERTO_CORRECCION", "8765"))
+
+# Tamaño máximo del cuerpo de un pedido (un lote grande de esquemas entra de sobra)
+MAX_CUERPO = 64 * 1024 * 1024
+
+
+# ============================================================
+# CANÓNICOS EN MEMORIA
+# ============================================================
+
+class Canonico:
+    """
+    Canónico compilado en memoria; se recarga si cambia el archivo.
+    ruta puede ser una lista (variantes del canónico BD): cargar la recibe tal cual.
+    """
+
+    def __init__(self, ruta, cargar):
+        self.ruta = ruta
+        self.rutas = ruta if isinstance(ruta, list) else [ruta]
+        self.cargar = cargar
+        self.firma = None
+        self.valor = None
+        self.lock = threading.Lock()
+
+    def obtener(self):
+        firma = tuple(firma_archivo(r) for r in self.rutas)
+        for r, f in zip(self.rutas, firma):
+            if f is None:
+                raise FileNotFoundError(f"No se encontró el canónico: {r}")
+        if firma != self.firma:
+            with self.lock:
+                if firma != self.firma:
+                    self.valor = self.cargar(self.ruta)
+                    self.firma = firma
+                    print(f"[Canónico] Cargado {self.ruta}")
+        return self.valor
+
+
+def _cargar_canon_sql(ruta):
+    canon_fp = sql.load_canonic_fp(Path(ruta))
+    if not canon_fp:
+        raise ValueError(f"No se pudieron obtener fingerprints canónicos de {ruta}")
+    return sql.compile_banco(canon_fp)
+
+
+# ============================================================
+# CORRECCIÓN DE UNA ENTREGA
+# ============================================================
+
+def corregir_bpmn(entrega, canon):
+    filas = filas_desde_lineas(io.StringIO(entrega["inventario"]))
+    fila_tec, fila_adm, fila_icg = bpmn.evaluar_filas_combinadas(filas, canon)
+    return {"tecnica": fila_tec, "administrativa": fila_adm, "integracion": fila_icg}
+
+
+def corregir_bd(entrega, canon):
+    stud = bd.schema_from_dict(entrega["esquema"])
+    return dict(zip(bd.CAMPOS_SALIDA[1:], bd.evaluar(canon, stud)))
+
+
+def corregir_sql(entrega, banco):
+    items = sql.load_items(entrega["consultas"])
+    return {"filas": sql.compare_items(items, banco)}
+
+
+class Servicio:
+    """Rutas habilitadas: nombre -> (canónico, función de corrección)."""
+
+    def __init__(self, rutas):
+        self.rutas = rutas
+
+    def estado(self):
+        estado = {}
+        for nombre, (canonico, _) in self.rutas.items():
+            estado[nombre] = {"canonico": canonico.ruta, "cargado": canonico.firma is not None}
+        return estado
+
+    def corregir(self, nombre, pedido):
+        canonico, corregir = self.rutas[nombre]
+        canon = canonico.obtener()
+
+        lote = isinstance(pedido, dict) and "entregas" in pedido
+        entregas = pedido["entregas"] if lote else [pedido]
+        resultados = []
+        for entrega in entregas:
+            archivo = entrega.get("archivo", "") if isinstance(entrega, dict) else ""
+            try:
+                resultados.append({"archivo": archivo, **corregir(entrega, canon)})
+            except Exception as e:
+                resultados.append({"archivo": archivo, "error": f"{type(e).__name__}: {e}"})
+        return {"resultados": resultados} if lote else resultados[0]
+
+
+# ============================================================
+# HTTP
+# ============================================================
+
+class ManejadorCorreccion(BaseHTTPRequestHandler):
+    servicio = None
+    protocol_version = "HTTP/1.1"
+
+    def _responder(self, codigo, cuerpo):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/estado":
+            self._responder(200, self.servicio.estado())
+        else:
+            self._responder(404, {"error": f"Ruta desconocida: {self.path}"})
+
+    def do_POST(self):
+        nombre = self.path.strip("/")
+        if nombre not in self.servicio.rutas:
+            self._responder(404, {"error": f"Ruta desconocida: {self.path}"})
+            return
+
+        largo = int(self.headers.get("Content-Length") or 0)
+        if largo > MAX_CUERPO:
+            self.close_connection = True
+            self._responder(413, {"error": f"Pedido demasiado grande ({largo} bytes)"})
+            return
+        try:
+            pedido = json.loads(self.rfile.read(largo) or b"null")
+        except ValueError as e:
+            self._responder(400, {"error": f"JSON inválido: {e}"})
+            return
+        if not isinstance(pedido, dict):
+            self._responder(400, {"error": "Se espera un objeto JSON (una entrega o {\"entregas\": [...]})"})
+            return
+
+        inicio = time.perf_counter()
+        try:
+            respuesta = self.servicio.corregir(nombre, pedido)
+        except (FileNotFoundError, ValueError) as e:
+            self._responder(503, {"error": str(e)})
+            return
+        ms = (time.perf_counter() - inicio) * 1000
+        cantidad = len(respuesta["resultados"]) if "resultados" in respuesta else 1
+        print(f"[{nombre.upper()}] {cantidad} entrega(s) en {ms:.1f} ms")
+        self._responder(200, respuesta)
+
+    def address_string(self):
+        # en un socket Unix no hay dirección de cliente
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, formato, *args):
+        pass  # cada pedido ya se informa en do_POST
+
+
+class ServidorUnix(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Servicio local de corrección con los canónicos precargados.")
+    ap.add_argument("--solo", default="bpmn,bd,sql", help="Correcciones a habilitar, separadas por comas (bpmn, bd, sql).")
+    ap.add_argument("--host", default="127.0.0.1", help="Dirección en la que escuchar (por defecto solo localhost).")
+    ap.add_argument("--puerto", type=int, default=PUERTO_POR_DEFECTO, help="Puerto HTTP (por defecto PUERTO_CORRECCION o 8765).")
+    ap.add_argument("--socket", help="Escuchar en este socket Unix en lugar de HTTP por TCP.")
+    ap.add_argument("--canonico", help="JSON canónico SQL (si se omite, se busca en --canon_dir).")
+    ap.add_argument("--canon_dir", default=sql.DEFAULT_CANON_DIR, help="Carpeta donde buscar el canónico SQL.")
+    args = ap.parse_args()
+
+    activas = {s.strip().lower() for s in args.solo.split(",") if s.strip()}
+    rutas = {}
+    if "bpmn" in activas:
+        ruta = os.path.join(bpmn.INV_DIR, bpmn.CANON_FILENAME)
+        rutas["bpmn"] = (Canonico(ruta, lambda p: compilar_canonico(cargar_inventario(p))), corregir_bpmn)
+    if "bd" in activas:
+        rutas["bd"] = (Canonico(bd.rutas_canonicos(), bd.cargar_canonicos), corregir_bd)
+    if "sql" in activas:
+        ruta = args.canonico or sql.auto_find_canonico(Path(args.canon_dir)) \
+            or os.path.join(args.canon_dir, "<canónico>")
+        rutas["sql"] = (Canonico(str(ruta), _cargar_canon_sql), corregir_sql)
+    if not rutas:
+        raise SystemExit("[Error] --solo no indica ninguna corrección válida (bpmn, bd, sql).")
+
+    # se cargan al arrancar; si alguno falta, su ruta responde 503 hasta que aparezca
+    for nombre, (canonico, _) in rutas.items():
+        try:
+            canonico.obtener()
+        except (FileNotFoundError, ValueError) as e:
+            print(f"[AVISO] {nombre.upper()}: {e}")
+
+    ManejadorCorreccion.servicio = Servicio(rutas)
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        servidor = ServidorUnix(args.socket, ManejadorCorreccion)
+        print(f"Escuchando en el socket {args.socket}")
+    else:
+        servidor = ThreadingHTTPServer((args.host, args.puerto), ManejadorCorreccion)
+        print(f"Escuchando en http://{args.host}:{args.puerto}")
+
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServicio detenido.")
+    finally:
+        servidor.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# Vigilar_entregas.py
+# --------------------------------
+# Modo vigilancia para la corrección de exámenes: revisa periódicamente
+#   - Rubrica_Tecnica/Inventarios   (BPMN)  -> Evaluacion_BPMN_Tecnica_B2.csv,
+#                                              Evaluacion_BPMN_Administrativa_B2.csv,
+#                                              Notas_BPMN_B2.csv
+#   - Para_corregir_BD              (BD)    -> Grado_Similitud/resumen_similitud.csv
+#   - Para_corregir_SQL             (SQL)   -> Depuracion_SQL/_consolidado_matching_crosstab.csv
+#                                              y <alumno>_matching_crosstab.csv
+# y vuelve a evaluar SOLO las entregas nuevas, modificadas o borradas,
+# actualizando sus filas en los CSV de forma atómica (ver comun/vigilancia.py).
+# Usa las mismas rutas (variables de entorno) y la misma caché que los scripts.
+#
+# Uso:
+#   python Vigilar_entregas.py                    # las tres carpetas, hasta Ctrl+C
+#   python Vigilar_entregas.py --solo bpmn,bd     # solo algunas
+#   python Vigilar_entregas.py --una-vez          # una sincronización y termina
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "bpmn"))
+sys.path.insert(0, os.path.join(RAIZ, "database"))
+
+from comun.ejecutor import ejecutar_en_lote, fila_de_error
+from comun.cache import abrir_cache, leer_bytes
+from comun.vigilancia import TablaCSV, Vigilancia, instantanea, escribir_csv_atomico, vigilar
+
+import Calcular_pipeline_BPMN_B2 as bpmn
+import CompararBD_contra_Canonico as bd
+import CompararSQL_contra_Canonico as sql
+from Calcular_rubrica_tecnica_B2 import cargar_inventario, compilar_canonico
+
+
+# ============================================================
+# BPMN
+# ============================================================
+
+class VigilanciaBPMN(Vigilancia):
+    nombre = "BPMN"
+
+    def __init__(self):
+        self.carpeta = bpmn.INV_DIR
+        super().__init__([
+            TablaCSV(bpmn.TEC_CSV, bpmn.CAMPOS_TEC),
+            TablaCSV(bpmn.ADM_CSV, bpmn.CAMPOS_ADM),
+            TablaCSV(bpmn.OUT_CSV, bpmn.CAMPOS_ICG),
+        ])
+        self.canon = None
+
+    def ruta_canonico(self):
+        return os.path.join(bpmn.INV_DIR, bpmn.CANON_FILENAME)
+
+    def instantanea(self):
+        return instantanea(self.carpeta, ".txt", excluir=[self.ruta_canonico()])
+
+    def clave(self, path):
+        return os.path.basename(path)
+
+    def preparar(self):
+        self.canon = compilar_canonico(cargar_inventario(self.ruta_canonico()))
+
+    def evaluar(self, grupos):
+        tec, adm, icg = self.tablas
+        paths = [p for rutas in grupos.values() for p in rutas]
+        cache = abrir_cache(bpmn.BASE_DIR, "bpmn_pipeline", leer_bytes(self.ruta_canonico()),
+                            bpmn.version_pipeline())
+        with cache:
+            for path, filas, error in ejecutar_en_lote(paths, bpmn.evaluar_archivo, self.canon, cache=cache):
+                fn = os.path.basename(path)
+                if error is not None:
+                    print(f"[BPMN] [ERROR] {fn} -> {error}")
+                    filas = [fila_de_error(t.campos, fn, error) for t in self.tablas]
+                else:
+                    filas = [{"archivo": fn, **f} for f in filas]
+                for tabla, fila in zip((tec, adm, icg), filas):
+                    tabla.reemplazar(fn, [fila])
+
+
+# ============================================================
+# BASE DE DATOS
+# ============================================================
+
+class VigilanciaBD(Vigilancia):
+    nombre = "BD"
+
+    def __init__(self):
+        self.carpeta = bd.CARPETA_ORIGEN_JSON
+        super().__init__([
+            TablaCSV(os.path.join(bd.CARPETA_SALIDA, bd.NOMBRE_SALIDA_CSV), bd.CAMPOS_SALIDA,
+                     encoding="utf-8-sig"),
+        ])
+        self.canon = None
+
+    def ruta_canonico(self):
+        return bd.rutas_canonicos()[0]
+
+    def rutas_canonicas(self):
+        return bd.rutas_canonicos()
+
+    def instantanea(self):
+        return instantanea(self.carpeta, ".json", excluir=self.rutas_canonicas())
+
+    def clave(self, path):
+        return os.path.basename(path)
+
+    def preparar(self):
+        self.canon = bd.cargar_canonicos(self.rutas_canonicas())
+
+    def evaluar(self, grupos):
+        tabla, = self.tablas
+        paths = [p for rutas in grupos.values() for p in rutas]
+        cache = abrir_cache(bd.CARPETA_SALIDA, "bd_similitud", bd.bytes_canonicos(self.rutas_canonicas()),
+                            bd.version_rubrica_bd())
+        with cache:
+            for path, scores, e in ejecutar_en_lote(paths, bd.evaluar_archivo, self.canon, cache=cache):
+                fn = os.path.basename(path)
+                if e is not None:
+                    valores = bd.fila_de_error(fn, e)
+                else:
+                    valores = [fn, *scores]
+                tabla.reemplazar(fn, [dict(zip(bd.CAMPOS_SALIDA, valores))])
+
+
+# ============================================================
+# SQL (CROSSTAB)
+# ============================================================
+
+class VigilanciaSQL(Vigilancia):
+    nombre = "SQL"
+
+    def __init__(self, entrada, salida, canonico=None, canon_dir=None, fixture=sql.DEFAULT_FIXTURE,
+                 segundos=sql.ejecucion_sql.SEGUNDOS_MAX, max_filas=sql.ejecucion_sql.FILAS_MAX):
+        self.carpeta = str(entrada)
+        self.salida = Path(salida)
+        self._canonico = Path(canonico) if canonico else None
+        self.canon_dir = Path(canon_dir) if canon_dir else Path(entrada).parent / "Consignas_SQL"
+        self.canon_path = None
+        self.canon_fp = None
+        # con fixture, igual que compare_folder: también se corrige por resultado
+        self.fixture = Path(fixture) if fixture else None
+        self.segundos = segundos
+        self.max_filas = max_filas
+        super().__init__([
+            TablaCSV(str(self.salida / "_consolidado_matching_crosstab.csv"), clave="alumno"),
+        ])
+
+    def ruta_canonico(self):
+        if self._canonico:
+            return str(self._canonico)
+        encontrado = sql.auto_find_canonico(self.canon_dir)
+        return str(encontrado) if encontrado else str(self.canon_dir / "<canónico>")
+
+    def rutas_canonicas(self):
+        # si cambia la base de prueba, se revisa todo otra vez
+        return [self.ruta_canonico()] + ([str(self.fixture)] if self.fixture else [])
+
+    def instantanea(self):
+        return instantanea(self.carpeta, ".json", recursiva=True)
+
+    def clave(self, path):
+        # mismo criterio que _json_por_alumno: primera subcarpeta bajo la entrada
+        rel = Path(path).parent.relative_to(self.carpeta)
+        return rel.parts[0] if rel.parts else Path(self.carpeta).name
+
+    def preparar(self):
+        self.canon_path = Path(self.ruta_canonico())
+        canon_fp = sql.load_canonic_fp(self.canon_path)
+        if not canon_fp:
+            raise ValueError(f"No se pudieron obtener fingerprints canónicos de {self.canon_path}")
+        self.canon_fp = canon_fp
+
+    def evaluar(self, grupos):
+        tabla, = self.tablas
+        # todas las consultas de cada alumno afectado, en el orden de compare_folder
+        paths = [Path(p) for alumno in sorted(grupos) for p in sorted(grupos[alumno], key=Path)]
+        filas_de = {alumno: [] for alumno in grupos}
+        # misma caché (espacio, contexto y versión) que compare_folder sin --similitud
+        espacio = "sql_crosstab" + ("_ejecucion" if self.fixture else "")
+        canon_bytes, version = sql.clave_cache_sql(leer_bytes(self.canon_path), self.fixture,
+                                                   self.segundos, self.max_filas)
+        cache = abrir_cache(str(self.salida), espacio, canon_bytes, version)
+        with cache:
+            ejecucion = None
+            if self.fixture:
+                ejecucion = sql.cargar_ejecucion(cache, self.canon_path, self.fixture,
+                                                 self.segundos, self.max_filas)
+            banco = sql.compile_banco(self.canon_fp, ejecucion)
+            for json_path, filas, e in ejecutar_en_lote(paths, sql.compare_json, banco, cache=cache):
+                alumno = self.clave(json_path)
+                if e is not None:
+                    print(f"[SQL] [ERROR] {json_path}: {e}")
+                    continue
+                filas_de[alumno] += [{"alumno": alumno, "file": json_path.name, **f} for f in filas]
+
+        # no se reescribe un consolidado con columnas que esta vigilancia no produce
+        # (ej. resultado_% de una corrida con --fixture): quedarían vacías
+        producidas = next((set(f[0]) for f in filas_de.values() if f), None)
+        if producidas is not None and tabla.campos:
+            faltan = [c for c in tabla.campos if c not in producidas]
+            if faltan:
+                raise ValueError(f"{tabla.ruta} tiene columnas que la vigilancia no genera ({', '.join(faltan)}); "
+                                 "usá la misma --fixture que la corrida completa o borrá el consolidado.")
+
+        for alumno, filas in filas_de.items():
+            if filas:
+                tabla.reemplazar(alumno, filas)
+                escribir_csv_atomico(str(self.salida / f"{alumno}_matching_crosstab.csv"),
+                                     list(filas[0].keys()), filas)
+            else:
+                tabla.eliminar(alumno)
+                self.eliminar(alumno)
+
+    def eliminar(self, clave):
+        parcial = self.salida / f"{clave}_matching_crosstab.csv"
+        if parcial.is_file():
+            parcial.unlink()
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Re-evalúa solo las entregas nuevas o modificadas y actualiza los CSV.")
+    ap.add_argument("--solo", default="bpmn,bd,sql", help="Vigilancias a activar, separadas por comas (bpmn, bd, sql).")
+    ap.add_argument("--intervalo", type=float, default=None, help="Segundos entre revisiones (por defecto INTERVALO_VIGILANCIA o 5).")
+    ap.add_argument("--una-vez", action="store_true", help="Sincroniza una vez y termina.")
+    ap.add_argument("--sql-input", default=sql.DEFAULT_INPUT, help="Carpeta de entregas SQL.")
+    ap.add_argument("--sql-out", default=sql.DEFAULT_OUTPUT, help="Carpeta de salida SQL.")
+    ap.add_argument("--canonico", help="JSON canónico SQL (si se omite, se busca en --canon_dir).")
+    ap.add_argument("--canon_dir", default=sql.DEFAULT_CANON_DIR, help="Carpeta donde buscar el canónico SQL.")
+    ap.add_argument("--fixture", default=sql.DEFAULT_FIXTURE, help="Base SQLite de prueba para corregir SQL por resultado (por defecto FIXTURE_SQL).")
+    ap.add_argument("--limite_segundos", type=float, default=sql.ejecucion_sql.SEGUNDOS_MAX, help="Tiempo máximo por consulta con --fixture.")
+    ap.add_argument("--limite_filas", type=int, default=sql.ejecucion_sql.FILAS_MAX, help="Filas máximas por consulta con --fixture.")
+    args = ap.parse_args()
+
+    activas = {s.strip().lower() for s in args.solo.split(",") if s.strip()}
+    vigilancias = []
+    if "bpmn" in activas:
+        vigilancias.append(VigilanciaBPMN())
+    if "bd" in activas:
+        vigilancias.append(VigilanciaBD())
+    if "sql" in activas:
+        vigilancias.append(VigilanciaSQL(args.sql_input, args.sql_out, args.canonico, args.canon_dir,
+                                         args.fixture, args.limite_segundos, args.limite_filas))
+    if not vigilancias:
+        raise SystemExit("[Error] --solo no indica ninguna vigilancia válida (bpmn, bd, sql).")
+
+    for v in vigilancias:
+        print(f"[{v.nombre}] Vigilando {v.carpeta}")
+    vigilar(vigilancias, args.intervalo, args.una_vez)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# generar_cohorte.py
+# --------------------------------
+# Genera una cohorte sintética (pero con la forma de las entregas reales)
+# para medir el rendimiento de los scripts de corrección:
+#
+#   <destino>/Rubrica_Tecnica/Inventarios/     inventarios BPMN (tipo;subtipo;nombre_visible;cantidad)
+#   <destino>/Canónico_2c2025_TemaB_schema.json  + Para_corregir_BD/*.json   (tables/fields/relations)
+#   <destino>/Consignas_SQL/ + Para_corregir_SQL/<Apellido>/consultas.json  (consultas crosstab)
+#   <destino>/Devoluciones_BD/Devolucion_BD_<Apellido>.md
+#   <destino>/Resultados_SQL_TemaB.xlsx       (solo si están pandas y openpyxl)
+#
+# Cada alumno es una variación aleatoria del canónico (elementos faltantes,
+# subtipos cambiados, nombres con otras mayúsculas/tildes, extras), con una
+# semilla fija para que dos corridas generen exactamente lo mismo.
+#
+# Uso:
+#   python benchmarks/generar_cohorte.py --alumnos 1000 --destino ./_benchmarks/1000
+
+import os
+import json
+import random
+import argparse
+
+APELLIDOS = ["Gomez", "Perez", "Rodriguez", "Fernandez", "Lopez", "Martinez", "Garcia",
+             "Sanchez", "Romero", "Sosa", "Torres", "Alvarez", "Ruiz", "Ramirez", "Benitez",
+             "Acosta", "Medina", "Herrera", "Suarez", "Aguirre", "Gimenez", "Molina", "Silva"]
+
+
+def apellidos(alumnos):
+    """Apellidos únicos y estables: Gomez00000, Perez00001, ..."""
+    return [f"{APELLIDOS[i % len(APELLIDOS)]}{i:05d}" for i in range(alumnos)]
+
+
+# ============================================================
+# BPMN
+# ============================================================
+
+CANON_FILENAME_BPMN = "Inventario_Tema_B2.txt"
+
+# (tipo, subtipo, nombre_visible, cantidad) del modelo de referencia
+INVENTARIO_CANONICO = [
+    ("Evento", "StartEvent/Conditional", "Llega el camión", 1),
+    ("Evento", "IntermediateEvent/Signal", "Señal RFID", 2),
+    ("Evento", "EndEvent/None", "Mercadería ingresada", 1),
+    ("Evento", "EndEvent/Terminate", "Remito rechazado", 1),
+    ("Compuerta", "Exclusive", "¿RE válido?", 2),
+    ("Compuerta", "Inclusive", "¿Diferencias?", 2),
+    ("Compuerta", "Parallel", "", 2),
+    ("Actividad", "TaskService", "Consultar RE en ARCA", 1),
+    ("Actividad", "TaskService", "Comparar remito con ARCA", 1),
+    ("Actividad", "TaskService", "Cambiar estado del remito", 1),
+    ("Actividad", "TaskService", "Registrar lote", 1),
+    ("Actividad", "TaskService", "Actualizar stock", 1),
+    ("Actividad", "TaskUser", "Control físico de la mercadería", 1),
+    ("Actividad", "TaskUser", "Verificar existencia en depósito", 1),
+    ("Actividad", "TaskUser", "Reubicar mercadería", 1),
+    ("Actividad", "TaskManual", "Avisar al chofer", 1),
+    ("Actividad", "TaskManual", "Descargar camión", 1),
+    ("Actividad", "TaskUser", "Registrar movimiento", 1),
+    ("DataStore", "DataStore", "Base de stock", 3),
+]
+
+SUBTIPOS_ALTERNATIVOS = {
+    "Evento": ["StartEvent/None", "StartEvent/Message", "StartEvent/Parallel", "IntermediateEvent/Timer",
+               "IntermediateEvent/Message", "EndEvent/Message"],
+    "Compuerta": ["Exclusive", "Inclusive", "Parallel", "EventBased"],
+    "Actividad": ["TaskService", "TaskUser", "TaskManual", "Task", "TaskScript", "TaskSend"],
+    "DataStore": ["DataStore"],
+}
+
+NOMBRES_EXTRA = ["Generar RE", "Enviar RE a ARCA", "Re verificar", "Controlar lote", "Cargar camion",
+                 "Cambiar Estado Factura", "Emitir factura", "Registrar pedido", "Aprobar", "Control fisico"]
+
+
+def _fila_inventario(rnd, tipo, subtipo, nombre, cantidad):
+    if rnd.random() < 0.15:
+        subtipo = rnd.choice(SUBTIPOS_ALTERNATIVOS[tipo])
+    if rnd.random() < 0.2:
+        nombre = nombre.upper() if rnd.random() < 0.5 else nombre.lower()
+    if rnd.random() < 0.2:
+        cantidad = max(0, cantidad + rnd.choice((-1, 1, 2)))
+    texto = str(cantidad)
+    if rnd.random() < 0.02:
+        texto = rnd.choice(("", " ", "x"))  # celdas vacías o inválidas, como en los exports reales
+    return f"{tipo};{subtipo};{nombre};{texto}"
+
+
+def inventario_alumno(rnd):
+    faltantes = rnd.random() * 0.5
+    filas = ["tipo;subtipo;nombre_visible;cantidad"]
+    for tipo, subtipo, nombre, cantidad in INVENTARIO_CANONICO:
+        if rnd.random() >= faltantes:
+            filas.append(_fila_inventario(rnd, tipo, subtipo, nombre, cantidad))
+    for _ in range(rnd.randint(0, 25)):
+        tipo = rnd.choice(("Actividad", "Actividad", "Actividad", "Evento", "Compuerta", "DataStore"))
+        filas.append(_fila_inventario(rnd, tipo, rnd.choice(SUBTIPOS_ALTERNATIVOS[tipo]),
+                                      rnd.choice(NOMBRES_EXTRA), 1))
+    return "\n".join(filas) + "\n"
+
+
+def generar_inventarios(destino, nombres, rnd):
+    carpeta = os.path.join(destino, "Rubrica_Tecnica", "Inventarios")
+    os.makedirs(carpeta, exist_ok=True)
+    canon = ["tipo;subtipo;nombre_visible;cantidad"] + [f"{t};{s};{n};{c}" for t, s, n, c in INVENTARIO_CANONICO]
+    with open(os.path.join(carpeta, CANON_FILENAME_BPMN), "w", encoding="utf-8") as f:
+        f.write("\n".join(canon) + "\n")
+    for apellido in nombres:
+        with open(os.path.join(carpeta, f"{apellido}.txt"), "w", encoding="utf-8") as f:
+            f.write(inventario_alumno(rnd))
+
+
+# ============================================================
+# BASE DE DATOS
+# ============================================================
+
+NOMBRE_CANONICO_BD = "Canónico_2c2025_TemaB_schema.json"
+
+TABLAS = ["Clientes", "Proveedores", "Facturas", "Remitos", "Artículos", "Depósitos",
+          "Lotes", "Choferes", "Camiones", "Pedidos", "Movimientos", "Ubicaciones"]
+CAMPOS = ["Nombre", "Fecha", "Código", "Cantidad", "Descripción", "Estado"]
+
+
+def _variante(rnd, nombre):
+    r = rnd.random()
+    if r < 0.08:
+        return nombre.upper()
+    if r < 0.16:
+        return nombre.lower() + " "
+    if r < 0.22:
+        return nombre.replace("í", "i").replace("ó", "o").replace("é", "e")
+    return nombre
+
+
+def esquema(rnd, faltantes=0.0):
+    d = {"tables": [], "fields": [], "relations": []}
+    elegidas = [t for t in TABLAS if rnd.random() >= faltantes]
+    for t in elegidas:
+        nombre = _variante(rnd, t)
+        d["tables"].append({"table": nombre})
+        for campo in [f"Id {t}"] + CAMPOS:
+            if rnd.random() >= faltantes:
+                d["fields"].append({"table": nombre, "field": _variante(rnd, campo), "pk": campo == f"Id {t}"})
+    for padre, hija in zip(elegidas, elegidas[1:]):
+        if rnd.random() >= faltantes:
+            d["relations"].append({
+                "parent_table": padre, "child_table": hija,
+                "fields": [{"child_field": f"Id {padre}", "parent_field": f"Id {padre}"}],
+                "enforced": rnd.random() > 0.3,
+                "update_cascade": rnd.random() > 0.5,
+                "delete_cascade": rnd.random() > 0.5,
+            })
+    return d
+
+
+def generar_esquemas(destino, nombres, rnd):
+    carpeta = os.path.join(destino, "Para_corregir_BD")
+    os.makedirs(carpeta, exist_ok=True)
+    with open(os.path.join(destino, NOMBRE_CANONICO_BD), "w", encoding="utf-8") as f:
+        json.dump(esquema(random.Random(0)), f, ensure_ascii=False)
+    for apellido in nombres:
+        with open(os.path.join(carpeta, f"{apellido}.json"), "w", encoding="utf-8") as f:
+            json.dump(esquema(rnd, rnd.random() * 0.5), f, ensure_ascii=False)
+
+
+# ============================================================
+# SQL (CROSSTAB)
+# ============================================================
+
+AGREGADOS = ["Sum", "Count", "Avg", "Max"]
+PIVOTS = ['Format([Fecha],"mmm")', "Clientes.Zona", "[Depósito]", "Year([Fecha])"]
+TABLAS_SQL = [["Facturas", "Clientes"], ["Remitos", "Artículos"], ["Pedidos", "Clientes", "Facturas"], ["Lotes"]]
+
+
+def consulta_crosstab(rnd, k, canonica=False):
+    tablas = TABLAS_SQL[k % 4] if canonica or rnd.random() < 0.5 else rnd.sample(
+        ["Facturas", "[Clientes]", "Remitos", "Artículos", "Pedidos", "Lotes"], rnd.randint(1, 3))
+    agg = AGREGADOS[k % 4] if canonica or rnd.random() < 0.6 else rnd.choice(AGREGADOS)
+    pivot = PIVOTS[k % 4] if canonica or rnd.random() < 0.6 else rnd.choice(PIVOTS)
+    origen = tablas[0] + "".join(f" INNER JOIN {t} ON {tablas[0]}.Id = {t}.Id" for t in tablas[1:])
+    return (f"TRANSFORM {agg}(d.Importe) AS Total\nSELECT d.Codigo FROM {origen}\n"
+            f"WHERE d.Estado = 1 GROUP BY d.Codigo\nPIVOT {pivot};")
+
+
+def generar_consultas(destino, nombres, rnd):
+    carpeta = os.path.join(destino, "Consignas_SQL")
+    os.makedirs(carpeta, exist_ok=True)
+    canon = {"items": [{"name": f"Consulta {k}b", "sql": consulta_crosstab(rnd, k, True)} for k in range(2, 6)]
+             + [{"name": "Consulta 1", "sql": "SELECT * FROM Clientes;"}]}
+    with open(os.path.join(carpeta, "Consignas_Canonico_TemaB.json"), "w", encoding="utf-8") as f:
+        json.dump(canon, f, ensure_ascii=False)
+
+    for apellido in nombres:
+        alumno = os.path.join(destino, "Para_corregir_SQL", apellido)
+        os.makedirs(alumno, exist_ok=True)
+        items = [{"name": f"Consulta {k}", "sql": consulta_crosstab(rnd, k)} for k in range(2, 6)]
+        items.append({"name": "Consulta 1", "sql": "SELECT * FROM Clientes;"})
+        with open(os.path.join(alumno, "consultas.json"), "w", encoding="utf-8") as f:
+            json.dump({"items": items}, f, ensure_ascii=False)
+
+
+# ============================================================
+# DEVOLUCIONES BD + EXCEL SQL (integración)
+# ============================================================
+
+def generar_devoluciones(destino, nombres, rnd):
+    carpeta = os.path.join(destino, "Devoluciones_BD")
+    os.makedirs(carpeta, exist_ok=True)
+    filas_excel = []
+    for apellido in nombres:
+        icg = rnd.uniform(20, 100)
+        with open(os.path.join(carpeta, f"Devolucion_BD_{apellido}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Devolución BD – {apellido}\n\n"
+                    f"- Tablas: {rnd.uniform(0, 100):.1f} %\n"
+                    f"- Relaciones: {rnd.uniform(0, 100):.1f} %\n\n"
+                    f"ICG = {icg:.2f} %\n".replace(".", ","))
+        sims = [round(rnd.uniform(0, 100), 2) for _ in range(3)]
+        filas_excel.append({"Apellido_Inferido": apellido,
+                            "Sim_Consigna1": sims[0], "Sim_Consigna2": sims[1], "Sim_Consigna3": sims[2],
+                            "Promedio_Sim_SQL": round(sum(sims) / 3, 2)})
+
+    try:
+        import pandas as pd
+        pd.DataFrame(filas_excel).to_excel(os.path.join(destino, "Resultados_SQL_TemaB.xlsx"), index=False)
+    except ImportError:
+        print("[AVISO] Sin pandas/openpyxl: no se genera Resultados_SQL_TemaB.xlsx.")
+
+
+# ============================================================
+# COHORTE COMPLETA
+# ============================================================
+
+def generar_cohorte(destino, alumnos, semilla=0):
+    """Genera todas las entradas de los scripts para `alumnos` alumnos."""
+    nombres = apellidos(alumnos)
+    generar_inventarios(destino, nombres, random.Random(semilla))
+    generar_esquemas(destino, nombres, random.Random(semilla + 1))
+    generar_consultas(destino, nombres, random.Random(semilla + 2))
+    generar_devoluciones(destino, nombres, random.Random(semilla + 3))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Genera una cohorte sintética para los benchmarks.")
+    ap.add_argument("--alumnos", type=int, default=1000, help="Cantidad de alumnos (ej. 100 a 100000).")
+    ap.add_argument("--destino", required=True, help="Carpeta donde crear la cohorte.")
+    ap.add_argument("--semilla", type=int, default=0, help="Semilla aleatoria.")
+    args = ap.parse_args()
+
+    generar_cohorte(args.destino, args.alumnos, args.semilla)
+    print(f"✅ Cohorte de {args.alumnos} alumnos generada en: {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
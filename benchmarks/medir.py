@@ -0,0 +1,381 @@
+# medir.py
+# --------------------------------
+# Benchmarks de los scripts de corrección sobre cohortes sintéticas
+# (ver generar_cohorte.py). Para cada tamaño de cohorte mide:
+#
+#   - funciones: las funciones de puntaje aisladas (evaluar_inventario,
+#     evaluar_filas, calcular_icg, score_student, compare_folder);
+#   - scripts:   los seis scripts completos, tal como se corren a mano.
+#
+# Cada etapa corre en un proceso propio, así el pico de memoria (RSS) es
+# el de esa etapa. Se informan archivos/seg, tiempo total y RSS máximo, y
+# se comparan con las líneas base guardadas en lineas_base.json: una baja
+# de archivos/seg o una suba de RSS mayor a la tolerancia es una regresión
+# (el script termina con código 1).
+#
+# Las funciones se repiten sobre la cohorte hasta juntar DURACION_MINIMA
+# segundos (con 100 alumnos una pasada dura milésimas y sería puro ruido).
+# Los scripts no se pueden repetir dentro del proceso: si una corrida dura
+# menos de SEGUNDOS_MINIMOS (casi todo es arrancar Python), su archivos/seg
+# se informa pero no se compara con la línea base.
+#
+# Uso:
+#   python benchmarks/medir.py                         # 100 y 1000 alumnos
+#   python benchmarks/medir.py --alumnos 100,10000,100000
+#   python benchmarks/medir.py --guardar               # actualiza las líneas base
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import tempfile
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(DIR_BENCH)
+sys.path.insert(0, DIR_BENCH)
+
+from generar_cohorte import generar_cohorte, CANON_FILENAME_BPMN, NOMBRE_CANONICO_BD
+
+LINEAS_BASE = os.path.join(DIR_BENCH, "lineas_base.json")
+TOLERANCIA = 0.40
+DURACION_MINIMA = 0.5
+SEGUNDOS_MINIMOS = 0.25
+
+FUNCIONES = [
+    "tecnica.evaluar_inventario",
+    "administrativa.evaluar_filas",
+    "integracion.calcular_icg",
+    "bd.score_student",
+    "sql.compare_folder",
+]
+
+# (script, carpeta) en el orden en que se corren (la integración usa los CSV anteriores)
+SCRIPTS = [
+    ("Calcular_rubrica_tecnica_B2", "bpmn"),
+    ("Calcular_rubrica_administrativa_B2", "bpmn"),
+    ("Calcular_integracion_rubricas_B2", "bpmn"),
+    ("CompararBD_contra_Canonico", "database"),
+    ("CompararSQL_contra_Canonico", "database"),
+    ("Genera_nueva_integracion_SQL", "database"),
+]
+
+
+# ============================================================
+# ETAPAS DE FUNCIONES (se ejecutan en el proceso hijo)
+# ============================================================
+
+def _archivos(carpeta, extension, excluir=""):
+    return sorted(os.path.join(carpeta, fn) for fn in os.listdir(carpeta)
+                  if fn.lower().endswith(extension) and fn != excluir)
+
+
+def _repetir(pasada):
+    """Corre pasada() hasta juntar DURACION_MINIMA segundos; devuelve (pasadas, segundos medidos)."""
+    pasadas, segundos = 0, 0.0
+    while pasadas == 0 or segundos < DURACION_MINIMA:
+        segundos += pasada()
+        pasadas += 1
+    return pasadas, segundos
+
+
+def medir_funcion(nombre, cohorte):
+    """
+    Corre una función de puntaje sobre toda la cohorte, las veces necesarias
+    para medir al menos DURACION_MINIMA; devuelve (archivos, pasadas, segundos).
+    """
+    sys.path.insert(0, os.path.join(RAIZ, "bpmn"))
+    sys.path.insert(0, os.path.join(RAIZ, "database"))
+    inv_dir = os.path.join(cohorte, "Rubrica_Tecnica", "Inventarios")
+
+    def cronometrar(funcion):
+        def pasada():
+            inicio = time.perf_counter()
+            funcion()
+            return time.perf_counter() - inicio
+        return pasada
+
+    if nombre == "tecnica.evaluar_inventario":
+        from Calcular_rubrica_tecnica_B2 import cargar_inventario, compilar_canonico, evaluar_inventario
+        paths = _archivos(inv_dir, ".txt", CANON_FILENAME_BPMN)
+        canon = compilar_canonico(cargar_inventario(os.path.join(inv_dir, CANON_FILENAME_BPMN)))
+
+        @cronometrar
+        def pasada():
+            for p in paths:
+                evaluar_inventario(cargar_inventario(p), canon)
+
+    elif nombre == "administrativa.evaluar_filas":
+        from Calcular_rubrica_administrativa_B2 import cargar_inventario_filas, evaluar_filas
+        paths = _archivos(inv_dir, ".txt", CANON_FILENAME_BPMN)
+
+        @cronometrar
+        def pasada():
+            for p in paths:
+                evaluar_filas(cargar_inventario_filas(p))
+
+    elif nombre == "integracion.calcular_icg":
+        from Calcular_integracion_rubricas_B2 import calcular_icg
+        paths = _archivos(inv_dir, ".txt", CANON_FILENAME_BPMN)
+
+        @cronometrar
+        def pasada():
+            for i in range(len(paths)):
+                calcular_icg(float(i % 101), float((i * 7) % 101))
+
+    elif nombre == "bd.score_student":
+        from CompararBD_contra_Canonico import load_schema, compile_canon, score_student
+        paths = _archivos(os.path.join(cohorte, "Para_corregir_BD"), ".json")
+        canon = compile_canon(load_schema(os.path.join(cohorte, NOMBRE_CANONICO_BD)))
+
+        @cronometrar
+        def pasada():
+            for p in paths:
+                score_student(canon, load_schema(p))
+
+    elif nombre == "sql.compare_folder":
+        from pathlib import Path
+        import contextlib
+        import io
+        from CompararSQL_contra_Canonico import auto_find_canonico, load_canonic_fp, compare_folder
+        entrada = Path(cohorte) / "Para_corregir_SQL"
+        paths = sorted(entrada.iterdir())
+        canon = auto_find_canonico(Path(cohorte) / "Consignas_SQL")
+        fp = load_canonic_fp(canon)
+
+        def pasada():
+            # cada pasada escribe en una carpeta nueva (borrarla no se mide)
+            salida = tempfile.mkdtemp(prefix="bench_sql_")
+            inicio = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    compare_folder(entrada, fp, Path(salida), workers=1, canonic_path=canon)
+                return time.perf_counter() - inicio
+            finally:
+                shutil.rmtree(salida, ignore_errors=True)
+
+    else:
+        raise ValueError(f"Etapa desconocida: {nombre}")
+
+    pasadas, segundos = _repetir(pasada)
+    return len(paths), pasadas, segundos
+
+
+# ============================================================
+# EJECUCIÓN MEDIDA DE PROCESOS HIJOS
+# ============================================================
+
+def _rss_mb(uso):
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return uso.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def ejecutar_medido(cmd, env=None, cwd=None, capturar=False):
+    """
+    Corre cmd y devuelve (código, segundos, rss_mb, salida).
+    rss_mb es el pico de memoria del proceso (None si el sistema no lo informa).
+    """
+    # stderr va a un temporal: leer dos pipes uno después del otro puede trabarse
+    with tempfile.TemporaryFile() as f_err:
+        inicio = time.perf_counter()
+        p = subprocess.Popen(cmd, env=env, cwd=cwd,
+                             stdout=subprocess.PIPE if capturar else subprocess.DEVNULL,
+                             stderr=f_err, text=True, encoding="utf-8", errors="replace")
+        salida = p.stdout.read() if capturar else ""
+        if hasattr(os, "wait4"):
+            # wait4 devuelve el uso de recursos de ESTE hijo (incluido su pico de RSS)
+            _, estado, uso = os.wait4(p.pid, 0)
+            p.returncode = os.waitstatus_to_exitcode(estado)
+            rss = _rss_mb(uso)
+        else:
+            p.wait()
+            rss = None
+        segundos = time.perf_counter() - inicio
+        if p.returncode != 0:
+            f_err.seek(0)
+            errores = f_err.read().decode("utf-8", errors="replace")
+            raise RuntimeError(f"{' '.join(cmd)} terminó con código {p.returncode}:\n{errores[-2000:]}")
+    return p.returncode, segundos, rss, salida
+
+
+def _entorno(cohorte, workers):
+    env = dict(os.environ)
+    env.update({
+        "PYTHONIOENCODING": "utf-8",
+        "CACHE_RESULTADOS": "0",        # se mide el cálculo, no la caché
+        "NUM_WORKERS": str(workers),
+        "RUBRICA_BASE_DIR": os.path.join(cohorte, "Rubrica_Tecnica"),
+        "CARPETA_ORIGEN_JSON": os.path.join(cohorte, "Para_corregir_BD"),
+        "CARPETA_CANONICO": cohorte,
+        "CARPETA_SALIDA": os.path.join(cohorte, "Grado_Similitud"),
+        "RUTA_DEVOLUCIONES_BD": os.path.join(cohorte, "Devoluciones_BD"),
+        "RUTA_SALIDA": os.path.join(cohorte, "Devolucion_Integral_2"),
+        "RUTA_EXCEL_SQL": os.path.join(cohorte, "Resultados_SQL_TemaB.xlsx"),
+    })
+    return env
+
+
+def medir_script(nombre, carpeta, cohorte, env):
+    cmd = [sys.executable, os.path.join(RAIZ, carpeta, nombre + ".py")]
+    if nombre == "CompararSQL_contra_Canonico":
+        cmd += ["--input", os.path.join(cohorte, "Para_corregir_SQL"),
+                "--canon_dir", os.path.join(cohorte, "Consignas_SQL"),
+                "--out", os.path.join(cohorte, "Depuracion_SQL")]
+    return ejecutar_medido(cmd, env=env, cwd=cohorte)
+
+
+def _omitir_script(nombre, cohorte):
+    """Motivo para no correr un script en este entorno (o None)."""
+    if nombre == "Genera_nueva_integracion_SQL":
+        import importlib.util
+        if importlib.util.find_spec("pandas") is None:
+            return "falta pandas"
+        if not os.path.isfile(os.path.join(cohorte, "Resultados_SQL_TemaB.xlsx")):
+            return "falta el Excel SQL (pandas/openpyxl al generar)"
+    return None
+
+
+# ============================================================
+# COHORTES Y LÍNEAS BASE
+# ============================================================
+
+def preparar_cohorte(destino, alumnos, semilla):
+    cohorte = os.path.join(destino, str(alumnos))
+    marca = os.path.join(cohorte, ".cohorte.json")
+    esperado = {"alumnos": alumnos, "semilla": semilla}
+    if os.path.isfile(marca):
+        with open(marca, "r", encoding="utf-8") as f:
+            if json.load(f) == esperado:
+                return cohorte
+    shutil.rmtree(cohorte, ignore_errors=True)
+    print(f"Generando cohorte de {alumnos} alumnos en {cohorte} ...")
+    generar_cohorte(cohorte, alumnos, semilla)
+    with open(marca, "w", encoding="utf-8") as f:
+        json.dump(esperado, f)
+    return cohorte
+
+
+def cargar_lineas_base():
+    if not os.path.isfile(LINEAS_BASE):
+        return {}
+    with open(LINEAS_BASE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def comparar(resultado, base, tolerancia):
+    """Devuelve la lista de regresiones de una etapa respecto de su línea base."""
+    if not base:
+        return []
+    problemas = []
+    # una corrida muy corta es casi todo ruido: solo se controla el RSS
+    corta = resultado.get("segundos_medidos", resultado["segundos"]) < SEGUNDOS_MINIMOS
+    if not corta and resultado["archivos_por_seg"] < base["archivos_por_seg"] * (1 - tolerancia):
+        problemas.append(f"archivos/seg {resultado['archivos_por_seg']:.0f} < base {base['archivos_por_seg']:.0f}")
+    if resultado.get("rss_mb") and base.get("rss_mb") and resultado["rss_mb"] > base["rss_mb"] * (1 + tolerancia):
+        problemas.append(f"RSS {resultado['rss_mb']:.1f} MB > base {base['rss_mb']:.1f} MB")
+    return problemas
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks de los scripts de corrección sobre cohortes sintéticas.")
+    ap.add_argument("--alumnos", default="100,1000", help="Tamaños de cohorte separados por comas (100 a 100000).")
+    ap.add_argument("--destino", default=os.path.join(RAIZ, "_benchmarks"), help="Carpeta de trabajo para las cohortes.")
+    ap.add_argument("--semilla", type=int, default=0, help="Semilla de la cohorte sintética.")
+    ap.add_argument("--workers", type=int, default=1, help="NUM_WORKERS para los scripts (1 = comparable entre máquinas).")
+    ap.add_argument("--solo", choices=["funciones", "scripts"], help="Medir solo funciones o solo scripts.")
+    ap.add_argument("--repeticiones", type=int, default=3, help="Corridas por etapa (se informa la mejor).")
+    ap.add_argument("--tolerancia", type=float, default=TOLERANCIA, help="Variación admitida respecto de la línea base.")
+    ap.add_argument("--guardar", action="store_true", help="Guarda los resultados como nuevas líneas base.")
+    ap.add_argument("--etapa", help=argparse.SUPPRESS)     # uso interno: proceso hijo
+    ap.add_argument("--cohorte", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.etapa:
+        archivos, pasadas, segundos = medir_funcion(args.etapa, args.cohorte)
+        print(json.dumps({"archivos": archivos, "pasadas": pasadas, "segundos": segundos}))
+        return
+
+    lineas_base = cargar_lineas_base()
+    nuevas = {}
+    regresiones = []
+
+    for alumnos in [int(a) for a in args.alumnos.split(",") if a.strip()]:
+        cohorte = preparar_cohorte(args.destino, alumnos, args.semilla)
+        env = _entorno(cohorte, args.workers)
+        base_tamanio = lineas_base.get(str(alumnos), {})
+        resultados = {}
+
+        print(f"\n=== Cohorte de {alumnos} alumnos ===")
+        print(f"{'etapa':<42}{'archivos':>9}{'seg':>9}{'arch/seg':>11}{'RSS MB':>9}")
+
+        etapas = []
+        if args.solo != "scripts":
+            etapas += [(n, None) for n in FUNCIONES]
+        if args.solo != "funciones":
+            etapas += SCRIPTS
+
+        for nombre, carpeta in etapas:
+            if carpeta is not None:
+                motivo = _omitir_script(nombre, cohorte)
+                if motivo:
+                    print(f"{nombre:<42}{'omitido (' + motivo + ')':>38}")
+                    continue
+
+            # se queda con la mejor de N corridas (la menos afectada por ruido)
+            mejores = None
+            for _ in range(max(1, args.repeticiones)):
+                if carpeta is None:
+                    cmd = [sys.executable, os.path.abspath(__file__), "--etapa", nombre, "--cohorte", cohorte]
+                    _, _, rss, salida = ejecutar_medido(cmd, env=env, capturar=True)
+                    medido = json.loads(salida.strip().splitlines()[-1])
+                    # segundos por pasada sobre la cohorte, y el total medido
+                    corrida = (medido["segundos"] / medido["pasadas"], medido["archivos"], rss, medido["segundos"])
+                else:
+                    _, segundos, rss, _ = medir_script(nombre, carpeta, cohorte, env)
+                    corrida = (segundos, alumnos, rss, segundos)
+                if mejores is None or corrida[0] < mejores[0]:
+                    mejores = corrida
+            segundos, archivos, rss, medidos = mejores
+
+            resultado = {
+                "archivos": archivos,
+                "segundos": round(segundos, 4),
+                "segundos_medidos": round(medidos, 4),
+                "archivos_por_seg": round(archivos / segundos, 1) if segundos > 0 else 0.0,
+                "rss_mb": round(rss, 1) if rss is not None else None,
+            }
+            resultados[nombre] = resultado
+            rss_txt = f"{resultado['rss_mb']:.1f}" if resultado["rss_mb"] is not None else "-"
+            nota = "  (corta: arch/seg sin comparar)" if medidos < SEGUNDOS_MINIMOS else ""
+            print(f"{nombre:<42}{archivos:>9}{segundos:>9.2f}{resultado['archivos_por_seg']:>11.0f}{rss_txt:>9}{nota}")
+
+            for problema in comparar(resultado, base_tamanio.get(nombre), args.tolerancia):
+                regresiones.append(f"{alumnos} alumnos / {nombre}: {problema}")
+
+        nuevas[str(alumnos)] = resultados
+
+    if args.guardar:
+        # por etapa: --solo funciones no borra las líneas base de los scripts
+        for tamanio, resultados in nuevas.items():
+            lineas_base.setdefault(tamanio, {}).update(resultados)
+        with open(LINEAS_BASE, "w", encoding="utf-8") as f:
+            json.dump(lineas_base, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\nLíneas base guardadas en: {LINEAS_BASE}")
+        return
+
+    if regresiones:
+        print("\n[REGRESIÓN]")
+        for r in regresiones:
+            print(" - " + r)
+        sys.exit(1)
+    print("\n✅ Sin regresiones respecto de las líneas base.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
 import os
+import sys
 import csv
+import heapq
+import tempfile
+from itertools import groupby
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from comun.columnar import EscritorColumnar
 
 # ============================================================
 # CONFIGURACIÓN DE RUTAS Y ARCHIVOS
@@ -11,23 +18,117 @@ ADM_CSV = os.path.join(BASE_DIR, "Evaluacion_BPMN_Administrativa_B2.csv")
 
 OUT_CSV = os.path.join(BASE_DIR, "Notas_BPMN_B2.csv")
 
+# Filas que se ordenan en memoria por tramo cuando un CSV de entrada
+# no viene ordenado por 'archivo' (el resto se ordena en disco)
+FILAS_POR_TRAMO = int(os.getenv("INTEGRACION_FILAS_POR_TRAMO", "100000"))
+
+# Componentes de la nota: (CSV, columna de puntaje, columna de salida)
+COMPONENTES = [
+    (TEC_CSV, "puntaje_tecnico_pct", "nota_tecnica_pct"),
+    (ADM_CSV, "puntaje_administrativo_pct", "nota_administrativa_pct"),
+]
+
+CAMPOS_SALIDA = [
+    "archivo",
+    "nota_tecnica_pct",
+    "nota_administrativa_pct",
+    "ICG_pct",
+]
+
 
 # ============================================================
-# FUNCIONES AUXILIARES
+# JOIN POR 'archivo' EN STREAMING (SORT-MERGE EXTERNO)
 # ============================================================
 
-def leer_csv_a_dict(path, clave_col):
-    """
-    Lee un CSV y devuelve un diccionario:
-    { valor_clave: fila_completa(dict) }
-    """
-    data = {}
-    with open(path, "r", encoding="utf-8") as f:
+def _esta_ordenado(path, clave_col):
+    """Recorre el CSV una vez y dice si ya viene ordenado por clave_col."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
         reader = csv.DictReader(f)
+        anterior = None
         for row in reader:
-            key = row[clave_col]
-            data[key] = row
-    return data
+            clave = row[clave_col]
+            if anterior is not None and clave < anterior:
+                return False
+            anterior = clave
+    return True
+
+
+def _leer_filas(path, clave_col):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield row[clave_col], row
+
+
+def _escribir_tramo(filas, carpeta, campos):
+    """Ordena un tramo en memoria y lo guarda en un CSV temporal; devuelve su ruta."""
+    filas.sort(key=lambda kv: kv[0])
+    fd, ruta = tempfile.mkstemp(suffix=".csv", dir=carpeta)
+    with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        for clave, row in filas:
+            writer.writerow([clave] + [row.get(c) for c in campos])
+    return ruta
+
+
+def _leer_tramo(ruta, campos):
+    with open(ruta, "r", encoding="utf-8", newline="") as f:
+        for valores in csv.reader(f):
+            yield valores[0], dict(zip(campos, valores[1:]))
+
+
+def leer_csv_ordenado(path, clave_col, carpeta_temporal, filas_por_tramo=FILAS_POR_TRAMO):
+    """
+    Genera (clave, fila) del CSV ordenado por clave_col, con memoria acotada:
+    - si el CSV ya está ordenado, se lee en streaming tal cual;
+    - si no, se parte en tramos de filas_por_tramo filas, cada tramo se
+      ordena y se guarda en carpeta_temporal, y los tramos se intercalan
+      con heapq.merge.
+    Si una clave se repite, gana la última fila con esa clave en el orden del
+    archivo (las anteriores se descartan).
+    """
+    if _esta_ordenado(path, clave_col):
+        filas = _leer_filas(path, clave_col)
+    else:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            campos = csv.DictReader(f).fieldnames or []
+        tramos = []
+        tramo = []
+        for clave, row in _leer_filas(path, clave_col):
+            tramo.append((clave, row))
+            if len(tramo) >= filas_por_tramo:
+                tramos.append(_escribir_tramo(tramo, carpeta_temporal, campos))
+                tramo = []
+        if tramo:
+            tramos.append(_escribir_tramo(tramo, carpeta_temporal, campos))
+        # merge estable: a igual clave, primero los tramos anteriores del archivo
+        filas = heapq.merge(*[_leer_tramo(t, campos) for t in tramos], key=lambda kv: kv[0])
+
+    for clave, grupo in groupby(filas, key=lambda kv: kv[0]):
+        for ultima in grupo:
+            pass
+        yield ultima
+
+
+def unir_por_clave(fuentes):
+    """
+    Full outer join de N iteradores (clave, fila) ordenados por clave.
+    Genera (clave, [fila_0, ..., fila_N-1]) en orden, con {} donde
+    una fuente no tiene esa clave. Solo guarda una fila por fuente.
+    """
+    actuales = [next(fuente, None) for fuente in fuentes]
+    while True:
+        claves = [a[0] for a in actuales if a is not None]
+        if not claves:
+            return
+        clave = min(claves)
+        filas = []
+        for i, actual in enumerate(actuales):
+            if actual is not None and actual[0] == clave:
+                filas.append(actual[1])
+                actuales[i] = next(fuentes[i], None)
+            else:
+                filas.append({})
+        yield clave, filas
 
 
 def to_float(value, default=0.0):
@@ -41,6 +142,14 @@ def to_float(value, default=0.0):
         return default
 
 
+def calcular_icg(nota_tec, nota_adm):
+    """
+    Índice de Calidad Global:
+        ICG = 0.55 × Técnica + 0.45 × Administrativa
+    """
+    return round(0.55 * nota_tec + 0.45 * nota_adm, 2)
+
+
 # ============================================================
 # PROGRAMA PRINCIPAL
 # ============================================================
@@ -53,50 +162,35 @@ def main():
         print(f"No se encontró archivo administrativo: {ADM_CSV}")
         return
 
-    # Leemos ambos CSV a diccionarios indexados por 'archivo'
-    tec = leer_csv_a_dict(TEC_CSV, "archivo")
-    adm = leer_csv_a_dict(ADM_CSV, "archivo")
-
-    # Unimos las claves (nombres de archivo)
-    todos_archivos = sorted(set(tec.keys()) | set(adm.keys()))
-
-    resultados = []
-
-    for arch in todos_archivos:
-        fila_tec = tec.get(arch, {})
-        fila_adm = adm.get(arch, {})
-
-        # Columnas esperadas de entrada:
-        # - puntaje_tecnico_pct
-        # - puntaje_administrativo_pct
-        nota_tec = to_float(fila_tec.get("puntaje_tecnico_pct", 0.0))
-        nota_adm = to_float(fila_adm.get("puntaje_administrativo_pct", 0.0))
-
-        icg = round(0.55 * nota_tec + 0.45 * nota_adm, 2)
-
-        resultados.append({
-            "archivo": arch,
-            "nota_tecnica_pct": nota_tec,
-            "nota_administrativa_pct": nota_adm,
-            "ICG_pct": icg,
-        })
-
-        print(f"{arch}: Técnica={nota_tec}  Adm={nota_adm}  ICG={icg}")
-
-    # Guardamos archivo final
-    with open(OUT_CSV, "w", encoding="utf-8", newline="") as f:
-        fieldnames = [
-            "archivo",
-            "nota_tecnica_pct",
-            "nota_administrativa_pct",
-            "ICG_pct",
-        ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+    # Join por 'archivo' en streaming: cada CSV se lee ordenado por archivo
+    # (en disco si hace falta) y cada nota se escribe apenas se calcula,
+    # sin cargar la cohorte en memoria. Para sumar componentes alcanza con
+    # agregarlos a COMPONENTES (y a la fórmula del ICG).
+    with tempfile.TemporaryDirectory(prefix="integracion_") as carpeta_temporal, \
+            open(OUT_CSV, "w", encoding="utf-8", newline="") as f:
+        writer = EscritorColumnar(OUT_CSV, CAMPOS_SALIDA, csv.DictWriter(f, fieldnames=CAMPOS_SALIDA))
         writer.writeheader()
-        for row in resultados:
-            writer.writerow(row)
+
+        fuentes = [leer_csv_ordenado(path, "archivo", carpeta_temporal) for path, _, _ in COMPONENTES]
+        for arch, filas in unir_por_clave(fuentes):
+            notas = {
+                salida: to_float(fila.get(columna, 0.0))
+                for (_, columna, salida), fila in zip(COMPONENTES, filas)
+            }
+            nota_tec = notas["nota_tecnica_pct"]
+            nota_adm = notas["nota_administrativa_pct"]
+
+            icg = calcular_icg(nota_tec, nota_adm)
+
+            writer.writerow({"archivo": arch, **notas, "ICG_pct": icg})
+
+            print(f"{arch}: Técnica={nota_tec}  Adm={nota_adm}  ICG={icg}")
+
+        columnar = writer.guardar()
 
     print(f"\nArchivo generado: {OUT_CSV}")
+    if columnar:
+        print(f"Archivo columnar: {columnar}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+import os
+import sys
+import csv
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from comun.ejecutor import ejecutar_en_lote, fila_de_error
+from comun.cache import abrir_cache, leer_bytes, version_rubrica, hash_bytes
+from comun.columnar import EscritorColumnar
+from comun import normalizacion
+
+import Calcular_rubrica_tecnica_B2
+import Calcular_rubrica_administrativa_B2
+import Calcular_integracion_rubricas_B2
+import palabras_clave
+from Calcular_rubrica_tecnica_B2 import (
+    cargar_inventario,
+    compilar_canonico,
+    inventario_desde_filas,
+    evaluar_inventario,
+    CAMPOS_SALIDA as CAMPOS_TEC,
+)
+from Calcular_rubrica_administrativa_B2 import (
+    cargar_inventario_filas,
+    evaluar_filas,
+    CAMPOS_SALIDA as CAMPOS_ADM,
+)
+from Calcular_integracion_rubricas_B2 import (
+    calcular_icg,
+    CAMPOS_SALIDA as CAMPOS_ICG,
+)
+from inventario_paquete import leer_paquete
+
+# ============================================================
+# CONFIGURACIÓN DE RUTAS
+# ============================================================
+# Mismas rutas que los tres scripts individuales: este pipeline
+# genera exactamente sus tres CSV, pero leyendo cada inventario una sola vez.
+
+BASE_DIR = os.getenv("RUBRICA_BASE_DIR", "./Rubrica_Tecnica")
+INV_DIR = os.path.join(BASE_DIR, "Inventarios")
+
+CANON_FILENAME = "Inventario_Tema_B2.txt"
+
+TEC_CSV = os.path.join(BASE_DIR, "Evaluacion_BPMN_Tecnica_B2.csv")
+ADM_CSV = os.path.join(BASE_DIR, "Evaluacion_BPMN_Administrativa_B2.csv")
+OUT_CSV = os.path.join(BASE_DIR, "Notas_BPMN_B2.csv")
+
+# Paquete opcional con los inventarios de toda la cohorte en un solo archivo
+# (alumno;tipo;subtipo;nombre_visible;cantidad, ver inventario_paquete.py).
+# Si se indica, se lee en lugar de los .txt de INV_DIR; el canónico sigue en INV_DIR.
+PAQUETE = os.getenv("INVENTARIO_PAQUETE", "").strip()
+
+
+# ============================================================
+# EVALUACIÓN COMBINADA
+# ============================================================
+
+def evaluar_archivo(path, canon):
+    """
+    Lee el inventario UNA vez y aplica las dos rúbricas sobre esa lectura.
+
+    Devuelve (fila_tecnica, fila_administrativa, fila_icg), todas sin "archivo".
+    """
+    return evaluar_filas_combinadas(cargar_inventario_filas(path), canon)
+
+
+def evaluar_grupo(grupo, canon):
+    """Igual que evaluar_archivo, para un bloque (alumno, filas) de un paquete."""
+    return evaluar_filas_combinadas(grupo[1], canon)
+
+
+def clave_grupo(grupo):
+    """Clave de caché de un bloque del paquete: hash de su contenido."""
+    alumno, filas = grupo
+    return hash_bytes(json.dumps([alumno, list(filas)], ensure_ascii=False).encode("utf-8"))
+
+
+def evaluar_filas_combinadas(filas, canon):
+    inv_est = inventario_desde_filas(filas)
+
+    fila_tec = evaluar_inventario(inv_est, canon)
+    fila_adm = evaluar_filas(filas)
+
+    nota_tec = fila_tec["puntaje_tecnico_pct"]
+    nota_adm = fila_adm["puntaje_administrativo_pct"]
+    fila_icg = {
+        "nota_tecnica_pct": nota_tec,
+        "nota_administrativa_pct": nota_adm,
+        "ICG_pct": calcular_icg(nota_tec, nota_adm),
+    }
+    return fila_tec, fila_adm, fila_icg
+
+
+def version_pipeline():
+    """Versión de la rúbrica para la caché: fuentes del pipeline, de los tres scripts, de las palabras clave y de la normalización."""
+    return version_rubrica(
+        __file__,
+        Calcular_rubrica_tecnica_B2.__file__,
+        Calcular_rubrica_administrativa_B2.__file__,
+        Calcular_integracion_rubricas_B2.__file__,
+        palabras_clave.__file__,
+        normalizacion.__file__,
+    )
+
+
+# ============================================================
+# PROCESAMIENTO PRINCIPAL
+# ============================================================
+
+def main():
+    canon_path = os.path.join(INV_DIR, CANON_FILENAME)
+    if not os.path.isfile(canon_path):
+        print(f"No se encontró el inventario canónico: {canon_path}")
+        return
+
+    canon = compilar_canonico(cargar_inventario(canon_path))
+
+    if PAQUETE:
+        if not os.path.isfile(PAQUETE):
+            print(f"No se encontró el paquete de inventarios: {PAQUETE}")
+            return
+        # los bloques se leen a medida que el ejecutor los pide
+        items = leer_paquete(PAQUETE)
+        tarea, clave, nombre = evaluar_grupo, clave_grupo, lambda grupo: grupo[0]
+    else:
+        archivos = sorted(
+            fn for fn in os.listdir(INV_DIR)
+            if fn.lower().endswith(".txt") and fn != CANON_FILENAME
+        )
+        if not archivos:
+            print("No se encontraron inventarios de alumnos para procesar.")
+            return
+        items = [os.path.join(INV_DIR, fn) for fn in archivos]
+        tarea, clave, nombre = evaluar_archivo, None, os.path.basename
+
+    # Solo se recalculan los inventarios nuevos o modificados
+    cache = abrir_cache(BASE_DIR, "bpmn_pipeline", leer_bytes(canon_path), version_pipeline())
+
+    with cache, \
+         open(TEC_CSV, "w", encoding="utf-8", newline="") as f_tec, \
+         open(ADM_CSV, "w", encoding="utf-8", newline="") as f_adm, \
+         open(OUT_CSV, "w", encoding="utf-8", newline="") as f_icg:
+        w_tec = EscritorColumnar(TEC_CSV, CAMPOS_TEC, csv.DictWriter(f_tec, fieldnames=CAMPOS_TEC))
+        w_adm = EscritorColumnar(ADM_CSV, CAMPOS_ADM, csv.DictWriter(f_adm, fieldnames=CAMPOS_ADM))
+        w_icg = EscritorColumnar(OUT_CSV, CAMPOS_ICG, csv.DictWriter(f_icg, fieldnames=CAMPOS_ICG))
+        w_tec.writeheader()
+        w_adm.writeheader()
+        w_icg.writeheader()
+
+        for item, filas, error in ejecutar_en_lote(items, tarea, canon, cache=cache, clave=clave):
+            filename = nombre(item)
+            if error is not None:
+                w_tec.writerow(fila_de_error(CAMPOS_TEC, filename, error))
+                w_adm.writerow(fila_de_error(CAMPOS_ADM, filename, error))
+                w_icg.writerow(fila_de_error(CAMPOS_ICG, filename, error))
+                print(f"[ERROR] {filename} -> {error}")
+                continue
+
+            fila_tec, fila_adm, fila_icg = filas
+            w_tec.writerow({"archivo": filename, **fila_tec})
+            w_adm.writerow({"archivo": filename, **fila_adm})
+            w_icg.writerow({"archivo": filename, **fila_icg})
+
+            print(f"[OK] {filename} -> Técnico = {fila_icg['nota_tecnica_pct']}%  "
+                  f"Adm = {fila_icg['nota_administrativa_pct']}%  ICG = {fila_icg['ICG_pct']}%")
+
+        columnares = [w.guardar() for w in (w_tec, w_adm, w_icg)]
+
+    print("\nArchivos generados:")
+    print(TEC_CSV)
+    print(ADM_CSV)
+    print(OUT_CSV)
+    for ruta in columnares:
+        if ruta:
+            print(ruta)
+
+
+if __name__ == "__main__":
+    main()
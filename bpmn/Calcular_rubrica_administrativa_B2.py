@@ -1,6 +1,17 @@
 import os
+import sys
 import csv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from comun.ejecutor import ejecutar_en_lote, fila_de_error
+from comun.cache import abrir_cache, version_rubrica
+from comun.columnar import EscritorColumnar
+from comun import normalizacion
+from comun.normalizacion import plegar, internar
+
+import palabras_clave
+from palabras_clave import AutomataPalabras
+
 # ============================================================
 # CONFIGURACIÓN DE RUTAS
 # ============================================================
@@ -14,6 +25,83 @@ CANON_FILENAME = "Inventario_Tema_B2.txt"
 # Archivo de salida con la evaluación administrativa
 OUT_CSV = os.path.join(BASE_DIR, "Evaluacion_BPMN_Administrativa_B2.csv")
 
+CAMPOS_SALIDA = [
+    "archivo",
+    "arca_pct",
+    "control_fisico_pct",
+    "control_automatico_pct",
+    "sgbd_pct",
+    "puntaje_administrativo_pct",
+]
+
+
+# ============================================================
+# FILAS DE INVENTARIO (COLUMNAS PARALELAS)
+# ============================================================
+
+class FilasInventario:
+    """
+    Filas de un inventario guardadas por columnas (listas paralelas
+    tipo / subtipo / nombre / cantidad) en lugar de un dict por fila.
+
+    Las filas quedan agrupadas por tipo (respetando el orden del archivo
+    dentro de cada tipo) y rangos[tipo] = (inicio, fin) indica dónde está
+    cada grupo: un criterio que solo mira actividades recorre
+    indices("Actividad") sin filtrar el resto.
+
+    Recorrerlas con `for fila in filas` sigue devolviendo los dicts
+    {"tipo", "subtipo", "nombre", "cantidad"} del formato anterior.
+    """
+
+    __slots__ = ("tipo", "subtipo", "nombre", "cantidad", "rangos")
+
+    def __init__(self, tuplas=()):
+        """tuplas: iterable de (tipo, subtipo, nombre, cantidad)."""
+        por_tipo = {}
+        for t in tuplas:
+            por_tipo.setdefault(t[0], []).append(t)
+
+        self.tipo, self.subtipo, self.nombre, self.cantidad = [], [], [], []
+        self.rangos = {}
+        for tipo, grupo in por_tipo.items():
+            inicio = len(self.tipo)
+            for _, subtipo, nombre, cantidad in grupo:
+                self.tipo.append(tipo)
+                self.subtipo.append(subtipo)
+                self.nombre.append(nombre)
+                self.cantidad.append(cantidad)
+            self.rangos[tipo] = (inicio, len(self.tipo))
+
+    @classmethod
+    def desde_filas(cls, filas):
+        """Convierte una lista de dicts (formato anterior); si ya son FilasInventario, las devuelve igual."""
+        if isinstance(filas, cls):
+            return filas
+        return cls((f["tipo"], f["subtipo"], f["nombre"], f["cantidad"]) for f in filas)
+
+    def indices(self, tipo):
+        return range(*self.rangos.get(tipo, (0, 0)))
+
+    def __len__(self):
+        return len(self.tipo)
+
+    def __getitem__(self, i):
+        return {"tipo": self.tipo[i], "subtipo": self.subtipo[i],
+                "nombre": self.nombre[i], "cantidad": self.cantidad[i]}
+
+    def __iter__(self):
+        for i in range(len(self.tipo)):
+            yield self[i]
+
+    def __eq__(self, otro):
+        return isinstance(otro, FilasInventario) and list(self) == list(otro)
+
+    def __getstate__(self):
+        return (self.tipo, self.subtipo, self.nombre, self.cantidad, self.rangos)
+
+    def __setstate__(self, estado):
+        self.tipo, self.subtipo, self.nombre, self.cantidad, self.rangos = estado
+
 
 # ============================================================
 # LECTURA DE INVENTARIOS
@@ -24,43 +112,146 @@ def cargar_inventario_filas(path_txt):
     Lee un archivo de inventario con formato:
     tipo;subtipo;nombre_visible;cantidad
 
-    Devuelve una lista de filas:
+    Devuelve un FilasInventario (columnas tipo, subtipo, nombre, cantidad
+    y rangos por tipo). Recorrido fila por fila da:
     [
         {"tipo": ..., "subtipo": ..., "nombre": ..., "cantidad": int},
         ...
     ]
     """
-    filas = []
     with open(path_txt, "r", encoding="utf-8") as f:
-        reader = csv.reader(f, delimiter=";")
-        header = next(reader, None)  # salteamos encabezado
+        return filas_desde_lineas(f)
 
-        for row in reader:
-            if len(row) < 4:
-                continue
-            tipo, subtipo, nombre, cantidad_str = row
-            cantidad_str = cantidad_str.strip()
-            if not cantidad_str:
-                continue
-            try:
-                cantidad = int(cantidad_str)
-            except ValueError:
-                continue
 
-            filas.append({
-                "tipo": tipo.strip(),
-                "subtipo": subtipo.strip(),
-                "nombre": nombre.strip(),
-                "cantidad": cantidad
-            })
-    return filas
+def filas_desde_lineas(lineas):
+    """
+    Igual que cargar_inventario_filas, sobre las líneas ya leídas
+    (ej. el texto de un inventario recibido por el servicio de corrección).
+    """
+    filas = []
+    reader = csv.reader(lineas, delimiter=";")
+    header = next(reader, None)  # salteamos encabezado
+
+    for row in reader:
+        if len(row) < 4:
+            continue
+        tipo, subtipo, nombre, cantidad_str = row
+        cantidad_str = cantidad_str.strip()
+        if not cantidad_str:
+            continue
+        try:
+            cantidad = int(cantidad_str)
+        except ValueError:
+            continue
+
+        filas.append((
+            internar(tipo.strip()),
+            internar(subtipo.strip()),
+            nombre.strip(),
+            cantidad,
+        ))
+    return FilasInventario(filas)
 
 
 # ============================================================
 # FUNCIONES DE PUNTAJE – RÚBRICA ADMINISTRATIVA (Tema B)
 # ============================================================
 
-def puntaje_arca(filas):
+# Palabras clave de los criterios, agrupadas. Se compilan una sola vez en un
+# autómata (ver palabras_clave.py) y se buscan en el nombre de cada actividad
+# plegado (minúsculas y sin tildes, ver comun/normalizacion.py) y con un
+# espacio a cada lado (para detectar " re " como palabra).
+# Por el plegado, "control físico" también encuentra "Control fisico" y viceversa.
+PALABRAS_CLAVE = {
+    # Validación contra ARCA
+    "arca": ["arca"],
+    "validacion": ["compar", "verific", "consult"],
+    "re": [" re "],
+    # Control de existencia física: palabras fuertes (100%) y de chofer (40%)
+    "fisico_fuerte": [
+        "existenc",   # existencia
+        "lote",
+        "reubic",     # reubicar/reubicación
+        "movim",      # movimiento/movimientos
+        "control físico",
+    ],
+    "fisico_chofer": ["chofer", "camión"],
+    # Rol del SGBD
+    "cambiar_estado": ["cambiar estado"],
+    "remito": ["remito"],
+    "factura": ["factura"],
+}
+
+_AUTOMATA = AutomataPalabras({g: [plegar(p) for p in ps] for g, ps in PALABRAS_CLAVE.items()})
+_ARCA = _AUTOMATA.bit("arca")
+_VALIDACION = _AUTOMATA.bit("validacion")
+_RE = _AUTOMATA.bit("re")
+_FUERTE = _AUTOMATA.bit("fisico_fuerte")
+_CHOFER = _AUTOMATA.bit("fisico_chofer")
+_CAMBIAR_ESTADO = _AUTOMATA.bit("cambiar_estado")
+_REMITO = _AUTOMATA.bit("remito")
+_FACTURA = _AUTOMATA.bit("factura")
+
+
+def indicadores_administrativos(filas):
+    """
+    Recorre las filas UNA vez y devuelve todo lo que usan los cuatro criterios:
+    cada nombre de actividad se pliega y se analiza una sola vez, y cada
+    criterio va directo al rango de su tipo (Actividad, DataStore, ...).
+    filas puede ser un FilasInventario o una lista de dicts.
+    """
+    filas = FilasInventario.desde_filas(filas)
+    subtipos, nombres, cantidades = filas.subtipo, filas.nombre, filas.cantidad
+
+    ind = {
+        "arca": False,
+        "arca_validacion": False,
+        "re_sin_arca": False,
+        "manual_user": False,
+        "fisico_fuerte": False,
+        "fisico_chofer": False,
+        "estado_remito": False,
+        "estado_factura": False,
+        "datastores": 0,
+        "signal": 0,
+        "inclusive": 0,
+    }
+
+    for i in filas.indices("Actividad"):
+        m = _AUTOMATA.buscar(" " + plegar(nombres[i]) + " ")
+        if m & _ARCA:
+            ind["arca"] = True
+            if m & _VALIDACION:
+                ind["arca_validacion"] = True
+        elif m & _RE:
+            ind["re_sin_arca"] = True
+
+        if subtipos[i] in ("TaskManual", "TaskUser"):
+            ind["manual_user"] = True
+            if m & _FUERTE:
+                ind["fisico_fuerte"] = True
+            if m & _CHOFER:
+                ind["fisico_chofer"] = True
+
+        if m & _CAMBIAR_ESTADO:
+            if m & _REMITO:
+                ind["estado_remito"] = True
+            if m & _FACTURA:
+                ind["estado_factura"] = True
+
+    for i in filas.indices("DataStore"):
+        ind["datastores"] += cantidades[i]
+    for i in filas.indices("Evento"):
+        if subtipos[i].startswith("IntermediateEvent/Signal"):
+            ind["signal"] += cantidades[i]
+    for i in filas.indices("Compuerta"):
+        if subtipos[i] == "Inclusive":
+            ind["inclusive"] += cantidades[i]
+
+    return ind
+
+
+def puntaje_arca(filas, ind=None):
     """
     1) VALIDACIÓN CONTRA ARCA – 40%
 
@@ -69,45 +260,19 @@ def puntaje_arca(filas):
     40%  → aparece “RE” pero NO ARCA explícito (ej. “Generar RE”).
     0%   → no hay referencia alguna a ARCA ni RE.
     """
+    if ind is None:
+        ind = indicadores_administrativos(filas)
 
-    nombres_actividad = []
-    for fila in filas:
-        if fila["tipo"] == "Actividad":
-            nombres_actividad.append(fila["nombre"])
-
-    nombres_lower = [n.lower() for n in nombres_actividad]
-
-    # ARCA + verbos de validación
-    verbos_validacion = ["compar", "verific", "consult"]
-    has_arca_validacion = False
-    has_arca = False
-
-    for n in nombres_lower:
-        if "arca" in n:
-            has_arca = True
-            if any(v in n for v in verbos_validacion):
-                has_arca_validacion = True
-
-    # "RE" sin ARCA (ej. "Generar RE")
-    has_re_sin_arca = False
-    for n in nombres_lower:
-        if "arca" in n:
-            continue
-        padded = " " + n + " "
-        if " re " in padded:
-            has_re_sin_arca = True
-            break
-
-    if has_arca_validacion:
+    if ind["arca_validacion"]:
         return 100.0
-    if has_arca:
+    if ind["arca"]:
         return 70.0
-    if has_re_sin_arca:
+    if ind["re_sin_arca"]:
         return 40.0
     return 0.0
 
 
-def puntaje_control_fisico(filas):
+def puntaje_control_fisico(filas, ind=None):
     """
     2) CONTROL DE EXISTENCIA FÍSICA – 25%
 
@@ -116,41 +281,21 @@ def puntaje_control_fisico(filas):
     40%  → hay nombres como “chofer/camión” que sugieren intervención física.
     0%   → ninguna tarea manual/usuario.
     """
+    if ind is None:
+        ind = indicadores_administrativos(filas)
 
-    manual_user = [fila for fila in filas
-                   if fila["tipo"] == "Actividad"
-                   and fila["subtipo"] in ("TaskManual", "TaskUser")]
-
-    if not manual_user:
+    if not ind["manual_user"]:
         return 0.0
-
-    nombres_lower = [f["nombre"].lower() for f in manual_user]
-
-    # Palabras fuertes para 100%
-    claves_fuertes = [
-        "existenc",   # existencia
-        "lote",
-        "reubic",     # reubicar/reubicación
-        "movim",      # movimiento/movimientos
-        "control físico",
-        "control fisico"
-    ]
-    # Palabras para 40%
-    claves_chofer = ["chofer", "camion", "camión"]
-
-    for n in nombres_lower:
-        if any(c in n for c in claves_fuertes):
-            return 100.0
-
-    for n in nombres_lower:
-        if any(c in n for c in claves_chofer):
-            return 40.0
+    if ind["fisico_fuerte"]:
+        return 100.0
+    if ind["fisico_chofer"]:
+        return 40.0
 
     # Si hay manual/user pero sin palabras claras
     return 70.0
 
 
-def puntaje_control_automatico(filas):
+def puntaje_control_automatico(filas, ind=None):
     """
     3) CONTROL AUTOMÁTICO – RFID – 25%
 
@@ -159,15 +304,11 @@ def puntaje_control_automatico(filas):
     40%  → tiene 1 Signal o una Inclusiva aislada.
     0%   → no modela señales ni inclusivas.
     """
+    if ind is None:
+        ind = indicadores_administrativos(filas)
 
-    num_signal = 0
-    num_inclusive = 0
-
-    for fila in filas:
-        if fila["tipo"] == "Evento" and fila["subtipo"].startswith("IntermediateEvent/Signal"):
-            num_signal += fila["cantidad"]
-        elif fila["tipo"] == "Compuerta" and fila["subtipo"] == "Inclusive":
-            num_inclusive += fila["cantidad"]
+    num_signal = ind["signal"]
+    num_inclusive = ind["inclusive"]
 
     if num_signal >= 2 and num_inclusive >= 1:
         return 100.0
@@ -178,7 +319,7 @@ def puntaje_control_automatico(filas):
     return 0.0
 
 
-def puntaje_sgbd(filas):
+def puntaje_sgbd(filas, ind=None):
     """
     4) ROL DEL SGBD (estado documental) – 10%
 
@@ -187,28 +328,14 @@ def puntaje_sgbd(filas):
     40%  → aparece “Cambiar Estado Factura”.
     0%   → no aparece ningún indicio de estado ni persistencia.
     """
+    if ind is None:
+        ind = indicadores_administrativos(filas)
 
-    nombres_actividad = []
-    total_datastores = 0
-
-    for fila in filas:
-        if fila["tipo"] == "Actividad":
-            nombres_actividad.append(fila["nombre"])
-        elif fila["tipo"] == "DataStore":
-            total_datastores += fila["cantidad"]
-
-    nombres_lower = [n.lower() for n in nombres_actividad]
-
-    has_cambiar_estado_remito = any("cambiar estado" in n and "remito" in n
-                                    for n in nombres_lower)
-    has_cambiar_estado_factura = any("cambiar estado" in n and "factura" in n
-                                     for n in nombres_lower)
-
-    if has_cambiar_estado_remito and total_datastores > 0:
+    if ind["estado_remito"] and ind["datastores"] > 0:
         return 100.0
-    if has_cambiar_estado_remito:
+    if ind["estado_remito"]:
         return 70.0
-    if has_cambiar_estado_factura:
+    if ind["estado_factura"]:
         return 40.0
     return 0.0
 
@@ -230,64 +357,75 @@ def puntaje_administrativo_total(p_arca, p_fisico, p_auto, p_sgbd):
     )
 
 
+def evaluar_filas(filas):
+    """
+    Aplica los cuatro criterios administrativos a las filas de un inventario
+    y devuelve la fila de salida (sin la columna "archivo").
+    """
+    ind = indicadores_administrativos(filas)
+    p_arca = puntaje_arca(filas, ind)
+    p_fisico = puntaje_control_fisico(filas, ind)
+    p_auto = puntaje_control_automatico(filas, ind)
+    p_sgbd = puntaje_sgbd(filas, ind)
+    p_total = puntaje_administrativo_total(p_arca, p_fisico, p_auto, p_sgbd)
+
+    return {
+        "arca_pct": p_arca,
+        "control_fisico_pct": p_fisico,
+        "control_automatico_pct": p_auto,
+        "sgbd_pct": p_sgbd,
+        "puntaje_administrativo_pct": p_total,
+    }
+
+
 # ============================================================
 # PROCESAMIENTO PRINCIPAL
 # ============================================================
 
+def evaluar_archivo(path, contexto=None):
+    """
+    Tarea del ejecutor de lotes: lee un inventario y devuelve su fila administrativa.
+    """
+    return evaluar_filas(cargar_inventario_filas(path))
+
+
 def main():
     if not os.path.isdir(INV_DIR):
         print(f"No existe la carpeta de inventarios: {INV_DIR}")
         return
 
-    resultados = []
-
-    for filename in os.listdir(INV_DIR):
-        if not filename.lower().endswith(".txt"):
-            continue
-        if filename == CANON_FILENAME:
-            continue  # saltamos el canónico
-
-        path = os.path.join(INV_DIR, filename)
-        filas = cargar_inventario_filas(path)
-
-        p_arca = puntaje_arca(filas)
-        p_fisico = puntaje_control_fisico(filas)
-        p_auto = puntaje_control_automatico(filas)
-        p_sgbd = puntaje_sgbd(filas)
-        p_total = puntaje_administrativo_total(p_arca, p_fisico, p_auto, p_sgbd)
-
-        resultados.append({
-            "archivo": filename,
-            "arca_pct": p_arca,
-            "control_fisico_pct": p_fisico,
-            "control_automatico_pct": p_auto,
-            "sgbd_pct": p_sgbd,
-            "puntaje_administrativo_pct": p_total,
-        })
-
-        print(f"[OK] {filename} -> Administrativo = {p_total}%")
-
-    if not resultados:
+    archivos = sorted(
+        fn for fn in os.listdir(INV_DIR)
+        if fn.lower().endswith(".txt") and fn != CANON_FILENAME  # saltamos el canónico
+    )
+    if not archivos:
         print("No se encontraron inventarios de alumnos para procesar.")
         return
 
-    with open(OUT_CSV, "w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "archivo",
-                "arca_pct",
-                "control_fisico_pct",
-                "control_automatico_pct",
-                "sgbd_pct",
-                "puntaje_administrativo_pct",
-            ]
-        )
+    paths = [os.path.join(INV_DIR, fn) for fn in archivos]
+
+    # Solo se recalculan los inventarios nuevos o modificados (esta rúbrica no usa canónico)
+    cache = abrir_cache(BASE_DIR, "bpmn_administrativa", b"", version_rubrica(__file__, palabras_clave.__file__, normalizacion.__file__))
+
+    with cache, open(OUT_CSV, "w", encoding="utf-8", newline="") as f:
+        writer = EscritorColumnar(OUT_CSV, CAMPOS_SALIDA, csv.DictWriter(f, fieldnames=CAMPOS_SALIDA))
         writer.writeheader()
-        for row in resultados:
-            writer.writerow(row)
+
+        for path, fila, error in ejecutar_en_lote(paths, evaluar_archivo, cache=cache):
+            filename = os.path.basename(path)
+            if error is not None:
+                writer.writerow(fila_de_error(CAMPOS_SALIDA, filename, error))
+                print(f"[ERROR] {filename} -> {error}")
+                continue
+
+            writer.writerow({"archivo": filename, **fila})
+            print(f"[OK] {filename} -> Administrativo = {fila['puntaje_administrativo_pct']}%")
+
+        columnar = writer.guardar()
 
     print(f"\nEvaluación administrativa guardada en: {OUT_CSV}")
+    if columnar:
+        print(columnar)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,14 @@
 import os
+import sys
 import csv
 from collections import defaultdict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from comun.ejecutor import ejecutar_en_lote, fila_de_error
+from comun.cache import abrir_cache, leer_bytes, version_rubrica
+from comun.columnar import EscritorColumnar
+from comun.normalizacion import internar
+
 # ============================================================
 # CONFIGURACIÓN DE RUTAS
 # ============================================================
@@ -15,6 +22,22 @@ CANON_FILENAME = "Inventario_Tema_B2.txt"
 # Archivo de salida con la evaluación técnica
 OUT_CSV = os.path.join(BASE_DIR, "Evaluacion_BPMN_Tecnica_B2.csv")
 
+CAMPOS_SALIDA = [
+    "archivo",
+    "eventos_pct",
+    "compuertas_pct",
+    "tareas_pct",
+    "data_stores_pct",
+    "puntaje_tecnico_pct",
+]
+
+# Agregados por prefijo de subtipo de evento, calculados en la misma pasada
+# que lee el archivo. Se guardan bajo un tipo reservado:
+#   inv["*"]["StartEvent*"] = suma de los subtipos que empiezan con "StartEvent"
+# (la clave existe solo si apareció algún subtipo con ese prefijo).
+AGREGADOS = "*"
+PREFIJOS_EVENTO = ("StartEvent", "StartEvent/Parallel", "IntermediateEvent", "EndEvent")
+
 
 # ============================================================
 # LECTURA DE INVENTARIOS
@@ -30,7 +53,8 @@ def cargar_inventario(path_txt):
         "Evento":    {"StartEvent/Conditional": 1, "IntermediateEvent/Signal": 2, ...},
         "Compuerta": {"Exclusive": 3, "Inclusive": 2, "Parallel": 2},
         "Actividad": {"TaskService": 10, "TaskUser": 8, "TaskManual": 1, ...},
-        "DataStore": {"DataStore": 4}
+        "DataStore": {"DataStore": 4},
+        "*":         {"StartEvent*": 1, "IntermediateEvent*": 2, ...}   # agregados por prefijo
     }
     """
     inv = defaultdict(lambda: defaultdict(int))
@@ -51,20 +75,74 @@ def cargar_inventario(path_txt):
             except ValueError:
                 continue
 
-            tipo = tipo.strip()
-            subtipo = subtipo.strip()
-            inv[tipo][subtipo] += cantidad
+            _acumular(inv, internar(tipo.strip()), internar(subtipo.strip()), cantidad)
 
     return inv
 
 
+def inventario_desde_filas(filas):
+    """
+    Arma el mismo diccionario que cargar_inventario a partir de las filas
+    ya leídas por cargar_inventario_filas (rúbrica administrativa),
+    sin volver a abrir el archivo.
+    """
+    inv = defaultdict(lambda: defaultdict(int))
+    if hasattr(filas, "rangos"):
+        # FilasInventario: columnas paralelas, sin armar un dict por fila
+        for tipo, subtipo, cantidad in zip(filas.tipo, filas.subtipo, filas.cantidad):
+            _acumular(inv, tipo, subtipo, cantidad)
+        return inv
+    for fila in filas:
+        _acumular(inv, fila["tipo"], fila["subtipo"], fila["cantidad"])
+    return inv
+
+
+def _acumular(inv, tipo, subtipo, cantidad):
+    inv[tipo][subtipo] += cantidad
+    if tipo == "Evento":
+        for prefijo in PREFIJOS_EVENTO:
+            if subtipo.startswith(prefijo):
+                inv[AGREGADOS][prefijo + "*"] += cantidad
+
+
+def agregados_de(inv):
+    """
+    Devuelve los agregados por prefijo del inventario.
+    Si el inventario no los trae (armado a mano), los calcula.
+    """
+    agregados = inv.get(AGREGADOS)
+    if agregados is not None:
+        return agregados
+
+    agregados = {}
+    for subtipo, cantidad in inv.get("Evento", {}).items():
+        for prefijo in PREFIJOS_EVENTO:
+            if subtipo.startswith(prefijo):
+                agregados[prefijo + "*"] = agregados.get(prefijo + "*", 0) + cantidad
+    return agregados
+
+
+def compilar_canonico(inv_canon):
+    """
+    Deriva UNA sola vez, del inventario canónico, las constantes que usan
+    las funciones de puntaje (en lugar de recalcularlas para cada alumno).
+    Devuelve un dict simple (se puede enviar a los procesos del pool).
+    """
+    fines = agregados_de(inv_canon).get("EndEvent*", 0)
+    return {
+        "fines": fines,
+        "limite_fines": max(1, fines),
+    }
+
+
 # ============================================================
 # FUNCIONES DE PUNTAJE (TEMA B2)
 # ============================================================
 
-def puntaje_eventos(inv_est, inv_canon):
+def puntaje_eventos(inv_est, canon):
     """
     Calcula el % de similitud para EVENTOS según las reglas del Tema B2.
+    canon es el canónico ya compilado con compilar_canonico.
 
     Regla clave B2:
     - El inicio esperado es StartEvent/Conditional.
@@ -72,11 +150,11 @@ def puntaje_eventos(inv_est, inv_canon):
     """
 
     eventos_est = inv_est.get("Evento", {})
-    eventos_can = inv_canon.get("Evento", {})
+    agregados = agregados_de(inv_est)
 
     # --- Inicio ---
-    total_start = sum(c for s, c in eventos_est.items() if s.startswith("StartEvent"))
-    has_start_parallel = any(s.startswith("StartEvent/Parallel") for s in eventos_est.keys())
+    total_start = agregados.get("StartEvent*", 0)
+    has_start_parallel = "StartEvent/Parallel*" in agregados
     has_start_cond = eventos_est.get("StartEvent/Conditional", 0) > 0
 
     if total_start == 0:
@@ -101,12 +179,11 @@ def puntaje_eventos(inv_est, inv_canon):
         score_inter = 70        # más de 2 señales
 
     # --- Fines ---
-    fines_est = sum(c for s, c in eventos_est.items() if s.startswith("EndEvent"))
-    fines_can = sum(c for s, c in eventos_can.items() if s.startswith("EndEvent"))
+    fines_est = agregados.get("EndEvent*", 0)
 
     if fines_est == 0:
         score_fin = 0           # sin evento de fin
-    elif fines_est <= max(1, fines_can):
+    elif fines_est <= canon["limite_fines"]:
         score_fin = 60          # fines simples, cantidad razonable
     else:
         score_fin = 70          # más de lo necesario, pero aceptables
@@ -237,10 +314,38 @@ def puntaje_tecnico_total(score_ev, score_gw, score_ta, score_ds):
     )
 
 
+def evaluar_inventario(inv_est, canon):
+    """
+    Aplica los cuatro criterios técnicos a un inventario y devuelve
+    la fila de salida (sin la columna "archivo").
+    canon es el canónico compilado con compilar_canonico.
+    """
+    score_ev = puntaje_eventos(inv_est, canon)
+    score_gw = puntaje_compuertas(inv_est)
+    score_ta = puntaje_tareas(inv_est)
+    score_ds = puntaje_datastores(inv_est)
+    score_total = puntaje_tecnico_total(score_ev, score_gw, score_ds, score_ta)  # OJO al orden si lo cambiás
+
+    return {
+        "eventos_pct": score_ev,
+        "compuertas_pct": score_gw,
+        "tareas_pct": score_ta,
+        "data_stores_pct": score_ds,
+        "puntaje_tecnico_pct": score_total,
+    }
+
+
 # ============================================================
 # PROCESAMIENTO PRINCIPAL
 # ============================================================
 
+def evaluar_archivo(path, canon):
+    """
+    Tarea del ejecutor de lotes: lee un inventario y devuelve su fila técnica.
+    """
+    return evaluar_inventario(cargar_inventario(path), canon)
+
+
 def main():
     # Cargar inventario canónico
     canon_path = os.path.join(INV_DIR, CANON_FILENAME)
@@ -248,57 +353,41 @@ def main():
         print(f"No se encontró el inventario canónico: {canon_path}")
         return
 
-    inv_canon = cargar_inventario(canon_path)
-
-    resultados = []
-
-    for filename in os.listdir(INV_DIR):
-        if not filename.lower().endswith(".txt"):
-            continue
-        if filename == CANON_FILENAME:
-            continue  # salteamos el canónico
-
-        path = os.path.join(INV_DIR, filename)
-        inv_est = cargar_inventario(path)
-
-        score_ev = puntaje_eventos(inv_est, inv_canon)
-        score_gw = puntaje_compuertas(inv_est)
-        score_ta = puntaje_tareas(inv_est)
-        score_ds = puntaje_datastores(inv_est)
-        score_total = puntaje_tecnico_total(score_ev, score_gw, score_ds, score_ta)  # OJO al orden si lo cambiás
-
-        resultados.append({
-            "archivo": filename,
-            "eventos_pct": score_ev,
-            "compuertas_pct": score_gw,
-            "tareas_pct": score_ta,
-            "data_stores_pct": score_ds,
-            "puntaje_tecnico_pct": score_total,
-        })
-
-        print(f"[OK] {filename} -> Técnico = {score_total}%")
-
-    # Escribir CSV de salida
-    if resultados:
-        with open(OUT_CSV, "w", encoding="utf-8", newline="") as f:
-            writer = csv.DictWriter(
-                f,
-                fieldnames=[
-                    "archivo",
-                    "eventos_pct",
-                    "compuertas_pct",
-                    "tareas_pct",
-                    "data_stores_pct",
-                    "puntaje_tecnico_pct",
-                ]
-            )
-            writer.writeheader()
-            for row in resultados:
-                writer.writerow(row)
-
-        print(f"\nEvaluación técnica guardada en: {OUT_CSV}")
-    else:
+    canon = compilar_canonico(cargar_inventario(canon_path))
+
+    archivos = sorted(
+        fn for fn in os.listdir(INV_DIR)
+        if fn.lower().endswith(".txt") and fn != CANON_FILENAME  # salteamos el canónico
+    )
+    if not archivos:
         print("No se encontraron inventarios de alumnos para procesar.")
+        return
+
+    paths = [os.path.join(INV_DIR, fn) for fn in archivos]
+
+    # Solo se recalculan los inventarios nuevos o modificados
+    cache = abrir_cache(BASE_DIR, "bpmn_tecnica", leer_bytes(canon_path), version_rubrica(__file__))
+
+    # Escribir CSV de salida a medida que llegan los resultados (en orden)
+    with cache, open(OUT_CSV, "w", encoding="utf-8", newline="") as f:
+        writer = EscritorColumnar(OUT_CSV, CAMPOS_SALIDA, csv.DictWriter(f, fieldnames=CAMPOS_SALIDA))
+        writer.writeheader()
+
+        for path, fila, error in ejecutar_en_lote(paths, evaluar_archivo, canon, cache=cache):
+            filename = os.path.basename(path)
+            if error is not None:
+                writer.writerow(fila_de_error(CAMPOS_SALIDA, filename, error))
+                print(f"[ERROR] {filename} -> {error}")
+                continue
+
+            writer.writerow({"archivo": filename, **fila})
+            print(f"[OK] {filename} -> Técnico = {fila['puntaje_tecnico_pct']}%")
+
+        columnar = writer.guardar()
+
+    print(f"\nEvaluación técnica guardada en: {OUT_CSV}")
+    if columnar:
+        print(columnar)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,228 @@
+import os
+import csv
+
+import numpy as np
+
+from Calcular_rubrica_tecnica_B2 import (
+    INV_DIR,
+    CANON_FILENAME,
+    OUT_CSV,
+    CAMPOS_SALIDA,
+    AGREGADOS,
+    cargar_inventario,
+    compilar_canonico,
+)
+from inventario_compacto import ArchivoInventarios
+from comun.columnar import EscritorColumnar
+
+# ============================================================
+# RÚBRICA TÉCNICA B2 – MODO LOTE VECTORIZADO
+# ============================================================
+# Carga toda la cohorte en una matriz alumnos × (tipo, subtipo) y calcula
+# los cuatro criterios y el total sobre columnas completas.
+# Reglas y resultados idénticos a las funciones puntaje_* del script técnico.
+
+
+# ============================================================
+# CARGA DE LA COHORTE
+# ============================================================
+
+def cargar_matriz_cohorte(paths):
+    """
+    Lee los inventarios y devuelve (conteos, presentes, columnas):
+
+    - conteos:   matriz int64 alumnos × columnas con las cantidades sumadas.
+    - presentes: matriz bool con True si el (tipo, subtipo) apareció en el archivo
+                 (aunque su cantidad sume 0, igual que la clave en el dict escalar).
+    - columnas:  lista de (tipo, subtipo) en el orden de las columnas.
+    """
+    return ArchivoInventarios.desde_archivos(paths).matriz()
+
+
+# ============================================================
+# AUXILIARES
+# ============================================================
+
+def _mascara(columnas, tipo, condicion):
+    return np.array([t == tipo and condicion(s) for t, s in columnas], dtype=bool)
+
+
+def _suma(conteos, mascara):
+    return conteos[:, mascara].sum(axis=1)
+
+
+def _columna(conteos, columnas, tipo, subtipo):
+    try:
+        return conteos[:, columnas.index((tipo, subtipo))]
+    except ValueError:
+        return np.zeros(conteos.shape[0], dtype=np.int64)
+
+
+def _presente(presentes, columnas, tipo, subtipo):
+    try:
+        return presentes[:, columnas.index((tipo, subtipo))]
+    except ValueError:
+        return np.zeros(presentes.shape[0], dtype=bool)
+
+
+def _redondear(valores, decimales=2):
+    """
+    round() de Python aplicado a cada valor distinto (tabla de búsqueda),
+    para obtener exactamente los mismos float que las funciones escalares.
+    """
+    unicos, inversa = np.unique(valores, return_inverse=True)
+    tabla = np.array([round(float(v), decimales) for v in unicos], dtype=np.float64)
+    return tabla[inversa.reshape(-1)]
+
+
+# ============================================================
+# FUNCIONES DE PUNTAJE VECTORIZADAS (TEMA B2)
+# ============================================================
+
+def puntajes_eventos(conteos, presentes, columnas, canon):
+    """Equivalente vectorizado de puntaje_eventos."""
+    # agregados por prefijo ya calculados al leer cada inventario
+    total_start = _columna(conteos, columnas, AGREGADOS, "StartEvent*")
+    has_start_parallel = _presente(presentes, columnas, AGREGADOS, "StartEvent/Parallel*")
+    has_start_cond = _columna(conteos, columnas, "Evento", "StartEvent/Conditional") > 0
+
+    score_inicio = np.select(
+        [total_start == 0, has_start_parallel, has_start_cond],
+        [0, 100, 70],
+        default=50,
+    )
+
+    señales = _columna(conteos, columnas, "Evento", "IntermediateEvent/Signal")
+    score_inter = np.select(
+        [señales == 0, señales == 1, señales == 2],
+        [0, 50, 100],
+        default=70,
+    )
+
+    fines_est = _columna(conteos, columnas, AGREGADOS, "EndEvent*")
+    score_fin = np.select(
+        [fines_est == 0, fines_est <= canon["limite_fines"]],
+        [0, 60],
+        default=70,
+    )
+
+    return _redondear((score_inicio + score_inter + score_fin) / 3.0)
+
+
+def puntajes_compuertas(conteos, columnas):
+    """Equivalente vectorizado de puntaje_compuertas."""
+    excl = _columna(conteos, columnas, "Compuerta", "Exclusive")
+    incl = _columna(conteos, columnas, "Compuerta", "Inclusive")
+    par = _columna(conteos, columnas, "Compuerta", "Parallel")
+    total = _suma(conteos, _mascara(columnas, "Compuerta", lambda s: True))
+
+    return np.select(
+        [
+            total == 0,
+            (excl >= 2) & (incl >= 2) & (par >= 2),
+            (excl >= 1) & (incl >= 1) & (par >= 1),
+            (par > 0) & (incl == 0),
+            total < 2,
+        ],
+        [0.0, 100.0, 70.0, 20.0, 20.0],
+        default=40.0,
+    )
+
+
+def puntajes_tareas(conteos, columnas):
+    """Equivalente vectorizado de puntaje_tareas."""
+    total = _suma(conteos, _mascara(columnas, "Actividad", lambda s: True))
+    service = _columna(conteos, columnas, "Actividad", "TaskService")
+    user = _columna(conteos, columnas, "Actividad", "TaskUser")
+    manual = _columna(conteos, columnas, "Actividad", "TaskManual")
+
+    categorias_no_cero = (service > 0).astype(int) + (user > 0) + (manual > 0)
+    base = np.array([0.0, 20.0, 60.0, 100.0])[categorias_no_cero]
+
+    penalizar = (total < 10) | (total > 40)
+    base = np.where(penalizar, base * 0.7, base)
+    base = np.where(total == 0, 0.0, base)
+    return _redondear(base)
+
+
+def puntajes_datastores(conteos, columnas):
+    """Equivalente vectorizado de puntaje_datastores."""
+    total = _suma(conteos, _mascara(columnas, "DataStore", lambda s: True))
+    return np.select(
+        [(total >= 2) & (total <= 4), (total == 0) | (total == 1), total >= 6],
+        [100.0, 20.0, 40.0],
+        default=70.0,
+    )
+
+
+def puntajes_tecnico_total(score_ev, score_gw, score_ta, score_ds):
+    """Equivalente vectorizado de puntaje_tecnico_total (mismo orden de sumas)."""
+    return _redondear(
+        0.20 * score_ev +
+        0.45 * score_gw +
+        0.25 * score_ta +
+        0.10 * score_ds
+    )
+
+
+def evaluar_cohorte(conteos, presentes, columnas, canon):
+    """
+    Calcula todas las columnas de la rúbrica técnica para la cohorte.
+    Devuelve un dict {columna_de_salida: array}, en el mismo formato que evaluar_inventario.
+    """
+    score_ev = puntajes_eventos(conteos, presentes, columnas, canon)
+    score_gw = puntajes_compuertas(conteos, columnas)
+    score_ta = puntajes_tareas(conteos, columnas)
+    score_ds = puntajes_datastores(conteos, columnas)
+    score_total = puntajes_tecnico_total(score_ev, score_gw, score_ds, score_ta)  # mismo orden que evaluar_inventario
+
+    return {
+        "eventos_pct": score_ev,
+        "compuertas_pct": score_gw,
+        "tareas_pct": score_ta,
+        "data_stores_pct": score_ds,
+        "puntaje_tecnico_pct": score_total,
+    }
+
+
+# ============================================================
+# PROCESAMIENTO PRINCIPAL
+# ============================================================
+
+def main():
+    canon_path = os.path.join(INV_DIR, CANON_FILENAME)
+    if not os.path.isfile(canon_path):
+        print(f"No se encontró el inventario canónico: {canon_path}")
+        return
+
+    canon = compilar_canonico(cargar_inventario(canon_path))
+
+    archivos = sorted(
+        fn for fn in os.listdir(INV_DIR)
+        if fn.lower().endswith(".txt") and fn != CANON_FILENAME
+    )
+    if not archivos:
+        print("No se encontraron inventarios de alumnos para procesar.")
+        return
+
+    conteos, presentes, columnas = cargar_matriz_cohorte(
+        [os.path.join(INV_DIR, fn) for fn in archivos]
+    )
+    puntajes = evaluar_cohorte(conteos, presentes, columnas, canon)
+    listas = {c: v.tolist() for c, v in puntajes.items()}
+
+    with open(OUT_CSV, "w", encoding="utf-8", newline="") as f:
+        writer = EscritorColumnar(OUT_CSV, CAMPOS_SALIDA, csv.DictWriter(f, fieldnames=CAMPOS_SALIDA))
+        writer.writeheader()
+        for i, filename in enumerate(archivos):
+            writer.writerow({"archivo": filename, **{c: v[i] for c, v in listas.items()}})
+        columnar = writer.guardar()
+
+    print(f"[OK] {len(archivos)} inventarios evaluados (modo vectorizado).")
+    print(f"\nEvaluación técnica guardada en: {OUT_CSV}")
+    if columnar:
+        print(columnar)
+
+
+if __name__ == "__main__":
+    main()
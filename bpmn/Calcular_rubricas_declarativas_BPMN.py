@@ -0,0 +1,141 @@
+import os
+import sys
+import csv
+import glob
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from comun.ejecutor import ejecutar_en_lote, fila_de_error
+from comun.cache import abrir_cache, leer_bytes, version_rubrica
+from comun.columnar import EscritorColumnar
+from comun import normalizacion
+
+from Calcular_rubrica_administrativa_B2 import cargar_inventario_filas
+from rubrica_declarativa import cargar_especificacion, compilar_rubrica
+import rubrica_declarativa
+
+# ============================================================
+# CONFIGURACIÓN DE RUTAS
+# ============================================================
+# Evalúa cada inventario contra VARIOS temas en una sola lectura.
+# Cada tema se define en un JSON de rubricas/ (ver rubrica_declarativa.py)
+# y genera sus propios CSV (técnico, administrativo y notas).
+
+BASE_DIR = os.getenv("RUBRICA_BASE_DIR", "./Rubrica_Tecnica")
+INV_DIR = os.path.join(BASE_DIR, "Inventarios")
+
+# Especificaciones a usar: lista separada por comas, o todas las de rubricas/
+RUBRICAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rubricas")
+RUBRICAS = [p.strip() for p in os.getenv("RUBRICAS_BPMN", "").split(",") if p.strip()] \
+    or sorted(glob.glob(os.path.join(RUBRICAS_DIR, "*.json")))
+
+
+# ============================================================
+# EVALUACIÓN
+# ============================================================
+
+# Rúbricas ya compiladas en este proceso (se compilan una vez por proceso del pool)
+_compiladas = None
+
+
+def evaluar_archivo(path, temas):
+    """
+    Tarea del ejecutor de lotes: lee el inventario UNA vez y lo evalúa con
+    todas las rúbricas. temas es una lista de (especificación, filas_canónico).
+    Devuelve una lista (un elemento por tema) de {rubrica: fila_sin_archivo}.
+    """
+    global _compiladas
+    if _compiladas is None:
+        _compiladas = [compilar_rubrica(espec, filas_canon) for espec, filas_canon in temas]
+
+    filas = cargar_inventario_filas(path)
+    return [rubrica.evaluar(filas) for rubrica in _compiladas]
+
+
+# ============================================================
+# PROCESAMIENTO PRINCIPAL
+# ============================================================
+
+def main():
+    if not RUBRICAS:
+        print(f"No se encontraron especificaciones de rúbricas en: {RUBRICAS_DIR}")
+        return
+
+    temas = []
+    compiladas = []
+    canon_bytes = b""
+    for ruta in RUBRICAS:
+        espec = cargar_especificacion(ruta)
+        canon_path = os.path.join(INV_DIR, espec["canonico"])
+        if not os.path.isfile(canon_path):
+            print(f"No se encontró el inventario canónico: {canon_path}")
+            return
+        filas_canon = cargar_inventario_filas(canon_path)
+        # se compila acá también para validar la especificación antes de procesar
+        compiladas.append(compilar_rubrica(espec, filas_canon))
+        temas.append((espec, filas_canon))
+        canon_bytes += leer_bytes(canon_path)
+
+    canonicos = {c.canonico for c in compiladas}
+    archivos = sorted(
+        fn for fn in os.listdir(INV_DIR)
+        if fn.lower().endswith(".txt") and fn not in canonicos
+    )
+    if not archivos:
+        print("No se encontraron inventarios de alumnos para procesar.")
+        return
+
+    paths = [os.path.join(INV_DIR, fn) for fn in archivos]
+    version = version_rubrica(__file__, rubrica_declarativa.__file__, normalizacion.__file__, *RUBRICAS)
+    cache = abrir_cache(BASE_DIR, "bpmn_declarativa", canon_bytes, version)
+
+    abiertos = []
+    try:
+        # un writer por (tema, rúbrica)
+        writers = []
+        for rubrica in compiladas:
+            por_rubrica = {}
+            for nombre, archivo_salida in rubrica.salidas.items():
+                ruta = os.path.join(BASE_DIR, archivo_salida)
+                f = open(ruta, "w", encoding="utf-8", newline="")
+                abiertos.append(f)
+                w = EscritorColumnar(ruta, rubrica.columnas[nombre],
+                                     csv.DictWriter(f, fieldnames=rubrica.columnas[nombre]))
+                w.writeheader()
+                por_rubrica[nombre] = w
+            writers.append(por_rubrica)
+
+        with cache:
+            for path, resultados, error in ejecutar_en_lote(paths, evaluar_archivo, temas, cache=cache):
+                filename = os.path.basename(path)
+                if error is not None:
+                    for rubrica, por_rubrica in zip(compiladas, writers):
+                        for nombre, w in por_rubrica.items():
+                            w.writerow(fila_de_error(rubrica.columnas[nombre], filename, error))
+                    print(f"[ERROR] {filename} -> {error}")
+                    continue
+
+                resumen = []
+                for rubrica, por_rubrica, resultado in zip(compiladas, writers, resultados):
+                    for nombre, w in por_rubrica.items():
+                        w.writerow({"archivo": filename, **resultado[nombre]})
+                    if "integracion" in resultado:
+                        nota = list(resultado["integracion"].values())[-1]
+                        resumen.append(f"{rubrica.tema} = {nota}%")
+                print(f"[OK] {filename} -> " + "  ".join(resumen))
+
+        columnares = [w.guardar() for por_rubrica in writers for w in por_rubrica.values()]
+    finally:
+        for f in abiertos:
+            f.close()
+
+    print("\nArchivos generados:")
+    for rubrica in compiladas:
+        for archivo_salida in rubrica.salidas.values():
+            print(os.path.join(BASE_DIR, archivo_salida))
+    for ruta in columnares:
+        if ruta:
+            print(ruta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import os
+import sys
+from array import array
+
+from Calcular_rubrica_tecnica_B2 import cargar_inventario, inventario_desde_filas
+from Calcular_rubrica_administrativa_B2 import cargar_inventario_filas, FilasInventario
+
+# ============================================================
+# REPRESENTACIÓN COMPACTA DE INVENTARIOS
+# ============================================================
+# Para mantener en memoria archivos completos de inventarios (varios
+# cuatrimestres) y re-corregirlos o analizarlos sin volver a leer los .txt.
+#
+# - Un vocabulario global asigna un entero a cada (tipo, subtipo) y,
+#   opcionalmente, a cada nombre visible. Los textos se internan, así
+#   "IntermediateEvent/Signal" existe una sola vez para todo el archivo.
+# - Los conteos de cada alumno se guardan en buffers array() contiguos
+#   (formato CSR: inicio de cada alumno + ids + cantidades), en lugar de
+#   un defaultdict de defaultdicts por alumno.
+
+
+class Vocabulario:
+    """Mapa bidireccional texto(s) <-> id entero, con cadenas internadas."""
+
+    def __init__(self):
+        self._ids = {}
+        self.claves = []
+
+    def id(self, clave):
+        i = self._ids.get(clave)
+        if i is None:
+            if isinstance(clave, tuple):
+                clave = tuple(sys.intern(c) for c in clave)
+            else:
+                clave = sys.intern(clave)
+            i = len(self.claves)
+            self._ids[clave] = i
+            self.claves.append(clave)
+        return i
+
+    def buscar(self, clave):
+        return self._ids.get(clave)
+
+    def __len__(self):
+        return len(self.claves)
+
+
+class ArchivoInventarios:
+    """
+    Colección compacta de inventarios.
+
+    - agregar_archivo(path, etiqueta) lee un .txt y lo agrega.
+    - inventario(i) devuelve el dict {tipo: {subtipo: cantidad}} de cargar_inventario.
+    - filas(i) devuelve las filas de cargar_inventario_filas (si se guardaron nombres).
+    - matriz() devuelve (conteos, presentes, columnas) para el modo vectorizado.
+    """
+
+    def __init__(self, con_nombres=False):
+        self.con_nombres = con_nombres
+        self.tipos = Vocabulario()      # (tipo, subtipo) -> id
+        self.nombres = Vocabulario()    # nombre visible -> id
+        self.archivos = []
+        self.etiquetas = []
+
+        # conteos agregados por (tipo, subtipo)
+        self._inicio = array("q", [0])
+        self._ids = array("i")
+        self._cantidades = array("q")
+
+        # filas originales (solo con_nombres)
+        self._inicio_filas = array("q", [0])
+        self._filas_tipo = array("i")
+        self._filas_nombre = array("i")
+        self._filas_cantidad = array("q")
+
+    def __len__(self):
+        return len(self.archivos)
+
+    # --------------------------------------------------------
+    # Carga
+    # --------------------------------------------------------
+
+    def agregar(self, archivo, inv, filas=None, etiqueta=""):
+        """Agrega un inventario ya leído (dict de cargar_inventario y, opcional, sus filas)."""
+        for tipo, subtipos in inv.items():
+            for subtipo, cantidad in subtipos.items():
+                self._ids.append(self.tipos.id((tipo, subtipo)))
+                self._cantidades.append(cantidad)
+        self._inicio.append(len(self._ids))
+
+        if self.con_nombres:
+            filas = FilasInventario.desde_filas(filas or ())
+            for tipo, subtipo, nombre in zip(filas.tipo, filas.subtipo, filas.nombre):
+                self._filas_tipo.append(self.tipos.id((tipo, subtipo)))
+                self._filas_nombre.append(self.nombres.id(nombre))
+            self._filas_cantidad.extend(filas.cantidad)
+            self._inicio_filas.append(len(self._filas_tipo))
+
+        self.archivos.append(sys.intern(archivo))
+        self.etiquetas.append(sys.intern(etiqueta))
+
+    def agregar_archivo(self, path, archivo=None, etiqueta=""):
+        archivo = archivo or os.path.basename(path)
+        if self.con_nombres:
+            filas = cargar_inventario_filas(path)
+            self.agregar(archivo, inventario_desde_filas(filas), filas, etiqueta)
+        else:
+            self.agregar(archivo, cargar_inventario(path), etiqueta=etiqueta)
+
+    @classmethod
+    def desde_archivos(cls, paths, con_nombres=False, etiqueta=""):
+        archivo = cls(con_nombres=con_nombres)
+        for path in paths:
+            archivo.agregar_archivo(path, etiqueta=etiqueta)
+        return archivo
+
+    # --------------------------------------------------------
+    # Acceso
+    # --------------------------------------------------------
+
+    def conteos(self, i):
+        """Genera ((tipo, subtipo), cantidad) del alumno i."""
+        claves = self.tipos.claves
+        for k in range(self._inicio[i], self._inicio[i + 1]):
+            yield claves[self._ids[k]], self._cantidades[k]
+
+    def inventario(self, i):
+        """Mismo formato que cargar_inventario (con dicts comunes)."""
+        inv = {}
+        for (tipo, subtipo), cantidad in self.conteos(i):
+            inv.setdefault(tipo, {})[subtipo] = cantidad
+        return inv
+
+    def filas(self, i):
+        """Mismo formato que cargar_inventario_filas."""
+        if not self.con_nombres:
+            raise ValueError("El archivo se creó sin nombres (con_nombres=False).")
+        claves = self.tipos.claves
+        nombres = self.nombres.claves
+        filas = []
+        for k in range(self._inicio_filas[i], self._inicio_filas[i + 1]):
+            tipo, subtipo = claves[self._filas_tipo[k]]
+            filas.append((tipo, subtipo, nombres[self._filas_nombre[k]], self._filas_cantidad[k]))
+        return FilasInventario(filas)
+
+    def matriz(self):
+        """
+        Devuelve (conteos, presentes, columnas) como Calcular_rubrica_tecnica_B2_vectorizada:
+        matrices alumnos × (tipo, subtipo) y la lista de columnas. Requiere numpy.
+        """
+        import numpy as np
+
+        n = len(self.archivos)
+        inicio = np.frombuffer(self._inicio, dtype=np.int64)
+        filas = np.repeat(np.arange(n), np.diff(inicio))
+        cols = np.frombuffer(self._ids, dtype=np.int32) if len(self._ids) else np.zeros(0, dtype=np.int32)
+        valores = np.frombuffer(self._cantidades, dtype=np.int64) if len(self._cantidades) else np.zeros(0, dtype=np.int64)
+
+        conteos = np.zeros((n, len(self.tipos)), dtype=np.int64)
+        presentes = np.zeros((n, len(self.tipos)), dtype=bool)
+        conteos[filas, cols] = valores
+        presentes[filas, cols] = True
+        return conteos, presentes, list(self.tipos.claves)
+
+    def bytes_aproximados(self):
+        """Tamaño de los buffers numéricos (sin contar los textos del vocabulario)."""
+        buffers = (self._inicio, self._ids, self._cantidades,
+                   self._inicio_filas, self._filas_tipo, self._filas_nombre, self._filas_cantidad)
+        return sum(b.itemsize * len(b) for b in buffers)
@@ -0,0 +1,92 @@
+import os
+import sys
+import csv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from comun.normalizacion import internar
+
+from Calcular_rubrica_administrativa_B2 import FilasInventario
+
+# ============================================================
+# LECTURA DE PAQUETES DE INVENTARIOS (UN ARCHIVO POR COHORTE)
+# ============================================================
+# El exportador puede generar un único archivo con todos los alumnos:
+#
+#   alumno;tipo;subtipo;nombre_visible;cantidad
+#   Perez_Juan;Evento;StartEvent/Conditional;Inicio;1
+#   Perez_Juan;Compuerta;Exclusive;¿Stock?;2
+#   Gomez_Ana;Evento;StartEvent/Conditional;Inicio;1
+#   ...
+#
+# leer_paquete() lo recorre en streaming y entrega las filas de cada alumno
+# (agrupando filas consecutivas) con el mismo formato que
+# cargar_inventario_filas, sin cargar la cohorte completa en memoria y
+# sin abrir miles de archivos chicos (útil en carpetas de red).
+
+# Columnas esperadas (si el encabezado las nombra, se respetan sus posiciones)
+COLUMNAS_PAQUETE = ("alumno", "tipo", "subtipo", "nombre_visible", "cantidad")
+
+# Buffer de lectura: pocas lecturas grandes en lugar de muchas chicas
+BUFFER_LECTURA = 1 << 20
+
+
+def _posiciones(header):
+    """Índice de cada columna según el encabezado; si no las nombra, orden por defecto."""
+    nombres = [h.strip().lower() for h in header or []]
+    if all(c in nombres for c in COLUMNAS_PAQUETE):
+        return tuple(nombres.index(c) for c in COLUMNAS_PAQUETE)
+    return tuple(range(len(COLUMNAS_PAQUETE)))
+
+
+def leer_paquete(path):
+    """
+    Genera (alumno, filas) por cada bloque de filas consecutivas del mismo alumno.
+    filas es un FilasInventario, igual que lo que devuelve cargar_inventario_filas.
+
+    Las filas incompletas o con cantidad vacía / no numérica se saltean,
+    igual que en los inventarios individuales.
+    Si un alumno vuelve a aparecer después de otro, el paquete no está
+    agrupado y se lanza ValueError (sus notas quedarían partidas).
+    """
+    vistos = set()
+    actual = None
+    filas = []
+
+    with open(path, "r", encoding="utf-8", newline="", buffering=BUFFER_LECTURA) as f:
+        reader = csv.reader(f, delimiter=";")
+        i_alu, i_tipo, i_sub, i_nom, i_cant = _posiciones(next(reader, None))
+        minimo = max(i_alu, i_tipo, i_sub, i_nom, i_cant) + 1
+
+        for row in reader:
+            if len(row) < minimo:
+                continue
+            alumno = row[i_alu].strip()
+            cantidad_str = row[i_cant].strip()
+            if not alumno or not cantidad_str:
+                continue
+            try:
+                cantidad = int(cantidad_str)
+            except ValueError:
+                continue
+
+            if alumno != actual:
+                if actual is not None:
+                    yield actual, FilasInventario(filas)
+                if alumno in vistos:
+                    raise ValueError(
+                        f"{path}: el alumno {alumno!r} aparece en bloques no consecutivos "
+                        f"(ordenar el paquete por alumno)"
+                    )
+                vistos.add(alumno)
+                actual = alumno
+                filas = []
+
+            filas.append((
+                internar(row[i_tipo].strip()),
+                internar(row[i_sub].strip()),
+                row[i_nom].strip(),
+                cantidad,
+            ))
+
+    if actual is not None:
+        yield actual, FilasInventario(filas)
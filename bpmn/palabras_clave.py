@@ -0,0 +1,95 @@
+# ============================================================
+# BÚSQUEDA DE PALABRAS CLAVE (AHO-CORASICK)
+# ============================================================
+# Los criterios administrativos buscan muchas palabras clave dentro de
+# los nombres de actividades ("arca", "compar", "lote", "chofer", ...).
+# En lugar de probar cada lista con `in` por separado, todas las palabras
+# de todos los criterios se compilan UNA vez en un autómata de
+# Aho-Corasick: cada nombre se recorre una sola vez y devuelve, a la vez,
+# qué grupos de palabras aparecieron (como máscara de bits).
+#
+# Agregar palabras o grupos no agrega recorridos por nombre.
+
+
+class AutomataPalabras:
+    """
+    Autómata multi-patrón sobre grupos de palabras:
+
+        automata = AutomataPalabras({"arca": ["arca"], "chofer": ["chofer", "camion"]})
+        mascara = automata.buscar("avisar al chofer")
+        if mascara & automata.bit("chofer"): ...
+
+    Las palabras se buscan como subcadenas, tal cual (sin pasar a minúsculas:
+    eso lo decide quien llama).
+    """
+
+    # Nombres distintos que se recuerdan (los nombres se repiten mucho entre alumnos)
+    MAX_MEMO = 1 << 16
+
+    def __init__(self, grupos):
+        self.grupos = list(grupos)
+        self._bits = {g: 1 << i for i, g in enumerate(self.grupos)}
+
+        # transiciones[estado] = {caracter: estado}, salida[estado] = máscara
+        self._transiciones = [{}]
+        self._salida = [0]
+        for grupo, palabras in grupos.items():
+            for palabra in palabras:
+                if not palabra:
+                    raise ValueError(f"Grupo {grupo!r}: palabra vacía")
+                self._agregar(palabra, self._bits[grupo])
+        self._fallos = self._enlazar()
+        self._memo = {}
+
+    def _agregar(self, palabra, bit):
+        estado = 0
+        for c in palabra:
+            siguiente = self._transiciones[estado].get(c)
+            if siguiente is None:
+                siguiente = len(self._transiciones)
+                self._transiciones.append({})
+                self._salida.append(0)
+                self._transiciones[estado][c] = siguiente
+            estado = siguiente
+        self._salida[estado] |= bit
+
+    def _enlazar(self):
+        """Enlaces de fallo por niveles (BFS); cada estado hereda la salida de su fallo."""
+        fallos = [0] * len(self._transiciones)
+        cola = list(self._transiciones[0].values())
+        i = 0
+        while i < len(cola):
+            estado = cola[i]
+            i += 1
+            for c, hijo in self._transiciones[estado].items():
+                cola.append(hijo)
+                f = fallos[estado]
+                while f and c not in self._transiciones[f]:
+                    f = fallos[f]
+                destino = self._transiciones[f].get(c, 0)
+                fallos[hijo] = destino if destino != hijo else 0
+                self._salida[hijo] |= self._salida[fallos[hijo]]
+        return fallos
+
+    def bit(self, grupo):
+        return self._bits[grupo]
+
+    def buscar(self, texto):
+        """Devuelve la máscara de grupos con al menos una palabra contenida en texto."""
+        mascara = self._memo.get(texto)
+        if mascara is not None:
+            return mascara
+
+        transiciones, fallos, salida = self._transiciones, self._fallos, self._salida
+        estado = 0
+        mascara = 0
+        for c in texto:
+            while estado and c not in transiciones[estado]:
+                estado = fallos[estado]
+            estado = transiciones[estado].get(c, 0)
+            mascara |= salida[estado]
+
+        if len(self._memo) >= self.MAX_MEMO:
+            self._memo.clear()
+        self._memo[texto] = mascara
+        return mascara
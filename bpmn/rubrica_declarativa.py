@@ -0,0 +1,356 @@
+import os
+import sys
+import ast
+import json
+import keyword
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from comun.normalizacion import plegar
+
+from Calcular_rubrica_administrativa_B2 import FilasInventario
+
+# ============================================================
+# RÚBRICAS DECLARATIVAS
+# ============================================================
+# Una rúbrica se describe en un JSON (ver rubricas/B2.json) con:
+#
+#   "metricas":  valores que se extraen del inventario en UNA pasada
+#                (sumas por tipo/subtipo/prefijo, cantidad de filas,
+#                presencia de subtipos, palabras clave en nombres de actividades,
+#                y métricas del inventario canónico con "canon").
+#   "derivadas": expresiones sobre otras métricas.
+#   "rubricas":  por cada rúbrica, sus criterios como tablas de decisión
+#                (lista ordenada de [condición, puntaje] + "defecto"),
+#                y el total ponderado con sus pesos.
+#   "integracion": nota final a partir de los totales de cada rúbrica.
+#
+# compilar_rubrica() valida las claves y las expresiones y genera UNA función
+# Python por tema (if/elif en el mismo orden que las reglas), que se compila
+# una sola vez. Una clave desconocida es un error (así un typo como "defeco"
+# no pasa en silencio); para anotar algo en el JSON se usa "_comentario",
+# que se acepta en cualquier objeto de la especificación.
+
+
+# Nodos permitidos en condiciones y derivadas
+_NODOS_PERMITIDOS = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.Name, ast.Load, ast.Constant, ast.Call,
+)
+_FUNCIONES_PERMITIDAS = {"max", "min"}
+# Únicos nombres globales del código generado
+_GLOBALES = {"max": max, "min": min, "round": round}
+
+
+def _validar_expresion(expr, nombres, donde):
+    """
+    Verifica que la expresión solo use métricas conocidas, números,
+    comparaciones, operadores lógicos/aritméticos y max/min.
+    """
+    try:
+        arbol = ast.parse(str(expr), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"{donde}: expresión inválida {expr!r} ({e.msg})")
+
+    for nodo in ast.walk(arbol):
+        if not isinstance(nodo, _NODOS_PERMITIDOS):
+            raise ValueError(f"{donde}: elemento no permitido en {expr!r}: {type(nodo).__name__}")
+        if isinstance(nodo, ast.Call):
+            if not isinstance(nodo.func, ast.Name) or nodo.func.id not in _FUNCIONES_PERMITIDAS or nodo.keywords:
+                raise ValueError(f"{donde}: solo se permiten max() y min() en {expr!r}")
+        elif isinstance(nodo, ast.Name):
+            if nodo.id not in nombres and nodo.id not in _FUNCIONES_PERMITIDAS:
+                raise ValueError(f"{donde}: métrica desconocida {nodo.id!r} en {expr!r}")
+        elif isinstance(nodo, ast.Constant):
+            if not isinstance(nodo.value, (int, float, bool)):
+                raise ValueError(f"{donde}: solo se permiten constantes numéricas en {expr!r}")
+    return f"({ast.unparse(arbol.body)})"
+
+
+# Claves de cada objeto de la especificación
+COMENTARIO = "_comentario"
+_CLAVES_ESPEC = {"tema", "canonico", "metricas", "derivadas", "rubricas", "integracion"}
+_CLAVES_METRICA = {
+    "suma": {"subtipo", "prefijo"},
+    "filas": {"subtipos"},
+    "presente": {"prefijo"},
+    "nombres": {"subtipos", "contiene", "sin", "palabras"},
+}
+_CLAVES_RUBRICA = {"archivo_salida", "criterios", "total"}
+_CLAVES_CRITERIO = {"columna", "decimales", "tabla", "defecto", "ajustes", "promedio"}
+_CLAVES_TABLA = {"tabla", "defecto", "ajustes"}
+_CLAVES_TOTAL = {"columna", "decimales", "pesos"}
+_CLAVES_INTEGRACION = {"archivo_salida", "notas", "total"}
+
+
+def _claves(objeto, permitidas, donde):
+    """Verifica que el objeto sea un dict sin claves fuera de `permitidas` (salvo "_comentario")."""
+    if not isinstance(objeto, dict):
+        raise ValueError(f"{donde}: se esperaba un objeto y se encontró {objeto!r}")
+    desconocidas = sorted(set(objeto) - permitidas - {COMENTARIO})
+    if desconocidas:
+        raise ValueError(f"{donde}: clave(s) desconocida(s) {', '.join(map(repr, desconocidas))}")
+
+
+def _validar_claves(espec):
+    """Rechaza claves desconocidas en la especificación, sus métricas, criterios y totales."""
+    tema = espec.get("tema", "?") if isinstance(espec, dict) else "?"
+    _claves(espec, _CLAVES_ESPEC, tema)
+    for nombre, definicion in espec.get("metricas", {}).items():
+        donde = f"{tema} métrica {nombre}"
+        # "canon" envuelve una definición común, que se mide sobre el canónico
+        if isinstance(definicion, dict) and "canon" in definicion:
+            _claves(definicion, {"canon"}, donde)
+            definicion = definicion["canon"]
+        tipo = next((t for t in _CLAVES_METRICA if isinstance(definicion, dict) and t in definicion), None)
+        if tipo is None:
+            raise ValueError(f"Métrica {nombre!r}: definición no reconocida {definicion!r}")
+        _claves(definicion, _CLAVES_METRICA[tipo] | {tipo}, donde)
+    for rubrica, definicion in espec.get("rubricas", {}).items():
+        donde = f"{tema}/{rubrica}"
+        _claves(definicion, _CLAVES_RUBRICA, donde)
+        for criterio in definicion.get("criterios", []):
+            donde_criterio = f"{donde}/{criterio.get('columna', '?') if isinstance(criterio, dict) else '?'}"
+            _claves(criterio, _CLAVES_CRITERIO, donde_criterio)
+            for k, sub in enumerate(criterio.get("promedio", [])):
+                _claves(sub, _CLAVES_TABLA, f"{donde_criterio} parte {k + 1}")
+        _claves(definicion.get("total", {}), _CLAVES_TOTAL, f"{donde} total")
+    if "integracion" in espec:
+        _claves(espec["integracion"], _CLAVES_INTEGRACION, f"{tema}/integracion")
+        _claves(espec["integracion"].get("total", {}), _CLAVES_TOTAL, f"{tema}/integracion total")
+
+
+def _numero(valor, donde):
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        raise ValueError(f"{donde}: se esperaba un número y se encontró {valor!r}")
+    return repr(valor)
+
+
+# ============================================================
+# EXTRACCIÓN DE MÉTRICAS (una pasada por las filas)
+# ============================================================
+
+def _compilar_metrica(nombre, definicion):
+    """
+    Devuelve (tipo, valor_inicial, acumulador) para una métrica.
+    El acumulador recibe (valor_actual, subtipo, nombre_plegado, cantidad)
+    y devuelve el nuevo valor.
+    """
+    if "suma" in definicion:
+        tipo = definicion["suma"]
+        if "subtipo" in definicion:
+            exacto = definicion["subtipo"]
+            return tipo, 0, lambda v, s, n, c: v + c if s == exacto else v
+        if "prefijo" in definicion:
+            prefijo = definicion["prefijo"]
+            return tipo, 0, lambda v, s, n, c: v + c if s.startswith(prefijo) else v
+        return tipo, 0, lambda v, s, n, c: v + c
+
+    if "filas" in definicion:
+        tipo = definicion["filas"]
+        subtipos = frozenset(definicion.get("subtipos", ()))
+        if subtipos:
+            return tipo, 0, lambda v, s, n, c: v + 1 if s in subtipos else v
+        return tipo, 0, lambda v, s, n, c: v + 1
+
+    if "presente" in definicion:
+        tipo = definicion["presente"]
+        prefijo = definicion.get("prefijo", "")
+        return tipo, False, lambda v, s, n, c: v or s.startswith(prefijo)
+
+    if "nombres" in definicion:
+        tipo = definicion["nombres"]
+        subtipos = frozenset(definicion.get("subtipos", ()))
+        # las palabras se pliegan igual que los nombres (minúsculas y sin tildes)
+        grupos = [tuple(plegar(x) for x in g) for g in definicion.get("contiene", [])]
+        excluidas = tuple(plegar(x) for x in definicion.get("sin", ()))
+        palabras = tuple(f" {plegar(p)} " for p in definicion.get("palabras", ()))
+
+        def coincide(v, s, n, c):
+            if v:
+                return True
+            if subtipos and s not in subtipos:
+                return False
+            if any(x in n for x in excluidas):
+                return False
+            if not all(any(x in n for x in grupo) for grupo in grupos):
+                return False
+            if palabras:
+                rodeado = " " + n + " "
+                return any(p in rodeado for p in palabras)
+            return True
+
+        return tipo, False, coincide
+
+    raise ValueError(f"Métrica {nombre!r}: definición no reconocida {definicion!r}")
+
+
+def _extractor(definiciones):
+    """
+    Agrupa las métricas por tipo: cada grupo recorre solo el rango de filas de su tipo.
+    Devuelve una función filas -> {métrica: valor}.
+    """
+    por_tipo = {}
+    iniciales = {}
+    for nombre, definicion in definiciones.items():
+        tipo, inicial, acumulador = _compilar_metrica(nombre, definicion)
+        por_tipo.setdefault(tipo, []).append((nombre, acumulador))
+        iniciales[nombre] = inicial
+
+    def extraer(filas):
+        m = dict(iniciales)
+        filas = FilasInventario.desde_filas(filas)
+        subtipos, nombres, cantidades = filas.subtipo, filas.nombre, filas.cantidad
+        # solo los rangos de los tipos que alguna métrica usa
+        for tipo, acumuladores in por_tipo.items():
+            for i in filas.indices(tipo):
+                subtipo = subtipos[i]
+                nombre = plegar(nombres[i])
+                cantidad = cantidades[i]
+                for clave, acumulador in acumuladores:
+                    m[clave] = acumulador(m[clave], subtipo, nombre, cantidad)
+        return m
+
+    return extraer
+
+
+# ============================================================
+# GENERACIÓN DEL EVALUADOR
+# ============================================================
+
+def _codigo_tabla(regla, nombres, destino, donde, sangria):
+    lineas = []
+    palabra = "if"
+    for i, (condicion, puntaje) in enumerate(regla["tabla"]):
+        cond = _validar_expresion(condicion, nombres, f"{donde} regla {i + 1}")
+        lineas.append(f"{sangria}{palabra} {cond}:")
+        lineas.append(f"{sangria}    {destino} = {_numero(puntaje, f'{donde} regla {i + 1}')}")
+        palabra = "elif"
+    lineas.append(f"{sangria}else:")
+    lineas.append(f"{sangria}    {destino} = {_numero(regla.get('defecto', 0.0), f'{donde} defecto')}")
+
+    for i, (condicion, factor) in enumerate(regla.get("ajustes", [])):
+        cond = _validar_expresion(condicion, nombres, f"{donde} ajuste {i + 1}")
+        lineas.append(f"{sangria}if {cond}:")
+        lineas.append(f"{sangria}    {destino} *= {float(factor)!r}")
+    return lineas
+
+
+def _codigo_total(total, destino):
+    terminos = " + ".join(f"{float(peso)!r} * {destino}[{col!r}]" for col, peso in total["pesos"])
+    if "decimales" in total:
+        return f"round({terminos}, {int(total['decimales'])})"
+    return terminos
+
+
+def _generar_codigo(espec, nombres):
+    tema = espec.get("tema", "?")
+    # las variables auxiliares empiezan con "_" para no chocar con las métricas
+    lineas = ["def evaluar(_m):"]
+    for nombre in sorted(nombres):
+        lineas.append(f"    {nombre} = _m[{nombre!r}]")
+
+    nombres = set(nombres)
+    for nombre, expr in espec.get("derivadas", {}).items():
+        lineas.append(f"    {nombre} = {_validar_expresion(expr, nombres, f'{tema} derivada {nombre}')}")
+        nombres.add(nombre)
+
+    lineas.append("    _salida = {}")
+    for rubrica, definicion in espec["rubricas"].items():
+        lineas.append("    _r = {}")
+        for criterio in definicion["criterios"]:
+            col = criterio["columna"]
+            donde = f"{tema}/{rubrica}/{col}"
+            if "promedio" in criterio:
+                partes = []
+                for k, sub in enumerate(criterio["promedio"]):
+                    lineas += _codigo_tabla(sub, nombres, f"_p{k}", f"{donde} parte {k + 1}", "    ")
+                    partes.append(f"_p{k}")
+                valor = f"({' + '.join(partes)}) / {float(len(partes))!r}"
+            else:
+                lineas += _codigo_tabla(criterio, nombres, "_x", donde, "    ")
+                valor = "_x"
+            if "decimales" in criterio:
+                valor = f"round({valor}, {int(criterio['decimales'])})"
+            lineas.append(f"    _r[{col!r}] = {valor}")
+        total = definicion["total"]
+        lineas.append(f"    _r[{total['columna']!r}] = {_codigo_total(total, '_r')}")
+        lineas.append(f"    _salida[{rubrica!r}] = _r")
+
+    integracion = espec.get("integracion")
+    if integracion:
+        lineas.append("    _t = {_c: _v for _fila in _salida.values() for _c, _v in _fila.items()}")
+        lineas.append("    _n = {}")
+        for col, origen in integracion["notas"]:
+            lineas.append(f"    _n[{col!r}] = _t[{origen!r}]")
+        total = integracion["total"]
+        lineas.append(f"    _n[{total['columna']!r}] = {_codigo_total(total, '_n')}")
+        lineas.append("    _salida['integracion'] = _n")
+
+    lineas.append("    return _salida")
+    return "\n".join(lineas) + "\n"
+
+
+# ============================================================
+# COMPILACIÓN
+# ============================================================
+
+class RubricaCompilada:
+    """
+    Rúbrica de un tema lista para evaluar.
+
+    evaluar(filas) recibe las filas de cargar_inventario_filas y devuelve
+    {nombre_rubrica: {columna: puntaje}, ..., "integracion": {...}}.
+    """
+
+    def __init__(self, espec, filas_canon=None):
+        _validar_claves(espec)
+        self.tema = espec.get("tema", "?")
+        self.canonico = espec.get("canonico")
+        self.espec = espec
+
+        definiciones = espec.get("metricas", {})
+        propias = {n: d for n, d in definiciones.items() if "canon" not in d}
+        del_canon = {n: d["canon"] for n, d in definiciones.items() if "canon" in d}
+
+        for nombre in list(definiciones) + list(espec.get("derivadas", {})):
+            # ni palabras reservadas (True, None, ...) ni funciones del código generado
+            if (not nombre.isidentifier() or nombre.startswith("_") or keyword.iskeyword(nombre)
+                    or nombre in _GLOBALES):
+                raise ValueError(f"{self.tema}: nombre de métrica inválido {nombre!r}")
+
+        self._extraer = _extractor(propias)
+        # las métricas del canónico se calculan una única vez, al compilar
+        self._constantes = _extractor(del_canon)(filas_canon or [])
+
+        nombres = set(definiciones)
+        self.codigo = _generar_codigo(espec, nombres)
+        espacio = {"__builtins__": dict(_GLOBALES)}
+        exec(compile(self.codigo, f"<rubrica {self.tema}>", "exec"), espacio)
+        self._evaluar = espacio["evaluar"]
+
+        self.salidas = {r: d["archivo_salida"] for r, d in espec["rubricas"].items()}
+        self.columnas = {
+            r: ["archivo"] + [c["columna"] for c in d["criterios"]] + [d["total"]["columna"]]
+            for r, d in espec["rubricas"].items()
+        }
+        if "integracion" in espec:
+            integ = espec["integracion"]
+            self.salidas["integracion"] = integ["archivo_salida"]
+            self.columnas["integracion"] = ["archivo"] + [c for c, _ in integ["notas"]] + [integ["total"]["columna"]]
+
+    def evaluar(self, filas):
+        m = self._extraer(filas)
+        m.update(self._constantes)
+        return self._evaluar(m)
+
+
+def cargar_especificacion(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compilar_rubrica(espec, filas_canon=None):
+    """Compila una especificación (dict) junto con las filas de su inventario canónico."""
+    return RubricaCompilada(espec, filas_canon)
@@ -0,0 +1,152 @@
+# aproximado.py
+# --------------------------------
+# Búsqueda aproximada de nombres (tablas, campos) contra un conjunto fijo
+# de nombres canónicos, tolerando errores de tipeo y plurales:
+# "proveedores" ~ "proveedor", "cleinte" ~ "cliente".
+#
+# Comparar cada nombre del alumno contra todos los del canónico con
+# distancia de edición sería O(canónico × alumno) por tabla. En cambio,
+# los nombres canónicos se indexan UNA vez por n-gramas de caracteres
+# (índice invertido): para un nombre del alumno solo se verifican los
+# canónicos que comparten suficientes n-gramas como para estar a la
+# distancia pedida (filtro por conteo de n-gramas y por largo), y el
+# resultado se memoiza (los mismos nombres se repiten en toda la cohorte).
+#
+# La distancia es la de Damerau-Levenshtein restringida (inserción,
+# borrado, sustitución y transposición de dos letras vecinas), acotada:
+# se deja de calcular en cuanto supera el máximo.
+
+from collections import Counter
+
+# Relleno de los extremos para los n-gramas (no aparece en nombres normalizados)
+RELLENO = "\0"
+
+
+def distancia_acotada(a, b, maximo):
+    """
+    Distancia de edición entre a y b (con transposiciones), o maximo + 1
+    si es mayor que maximo.
+    """
+    if a == b:
+        return 0
+    la, lb = len(a), len(b)
+    if abs(la - lb) > maximo:
+        return maximo + 1
+
+    fuera = maximo + 1
+    previa = None
+    actual = list(range(lb + 1))
+    for i in range(1, la + 1):
+        anterior, previa = previa, actual
+        actual = [i] + [fuera] * lb
+        # solo la banda |i - j| <= maximo puede quedar dentro del máximo
+        desde = max(1, i - maximo)
+        hasta = min(lb, i + maximo)
+        minimo_fila = actual[0] if desde == 1 else fuera
+        ca = a[i - 1]
+        for j in range(desde, hasta + 1):
+            costo = 0 if ca == b[j - 1] else 1
+            d = min(previa[j] + 1, actual[j - 1] + 1, previa[j - 1] + costo)
+            if (anterior is not None and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1]
+                    and anterior[j - 2] + 1 < d):
+                d = anterior[j - 2] + 1
+            actual[j] = d
+            if d < minimo_fila:
+                minimo_fila = d
+        if minimo_fila > maximo:
+            return fuera
+    return min(actual[lb], fuera)
+
+
+def similitud(distancia, a, b):
+    """1 - distancia / largo del nombre más largo (1.0 = iguales)."""
+    largo = max(len(a), len(b))
+    return 1.0 - distancia / largo if largo else 1.0
+
+
+class IndiceAproximado:
+    """
+    Índice de n-gramas sobre nombres canónicos:
+
+        indice = IndiceAproximado(["cliente", "proveedor"], distancia_max=2, similitud_min=0.8)
+        indice.buscar("proveedores")   # -> ("proveedor", 0.818...)
+        indice.buscar("xyz")           # -> None
+
+    buscar devuelve el canónico más cercano (menor distancia; ante empate,
+    el primero en el orden recibido) con su similitud, o None si ninguno
+    está a distancia <= distancia_max con similitud >= similitud_min.
+    """
+
+    # Nombres distintos que se recuerdan (los nombres se repiten mucho entre alumnos)
+    MAX_MEMO = 1 << 16
+
+    def __init__(self, nombres, distancia_max=2, similitud_min=0.0, n=2):
+        self.nombres = list(dict.fromkeys(nombres))
+        self.distancia_max = distancia_max
+        self.similitud_min = similitud_min
+        self.n = n
+
+        # n-grama -> [(índice del nombre, veces que aparece)]
+        self._postings = {}
+        self._largos = []
+        # largo -> índices de los nombres con ese largo (para los nombres cortos,
+        # que pueden no compartir ningún n-grama y estar igual a distancia_max)
+        self._por_largo = {}
+        for i, nombre in enumerate(self.nombres):
+            self._largos.append(len(nombre))
+            self._por_largo.setdefault(len(nombre), []).append(i)
+            for grama, veces in self._gramas(nombre).items():
+                self._postings.setdefault(grama, []).append((i, veces))
+        self._memo = {}
+
+    def _gramas(self, s):
+        n = self.n
+        s = RELLENO * (n - 1) + s + RELLENO * (n - 1)
+        return Counter(s[i:i + n] for i in range(len(s) - n + 1))
+
+    def candidatos(self, nombre):
+        """
+        Índices de los nombres canónicos que pueden estar a distancia <= distancia_max.
+        Un nombre de largo L tiene L + n - 1 n-gramas y cada edición (una
+        transposición incluida) cambia a lo sumo n + 1 de ellos: los que
+        comparten menos de max(L) + n - 1 - (n + 1) * distancia_max quedan afuera.
+        Solo se recorren los nombres que comparten algún n-grama; los que no
+        comparten ninguno solo pueden quedar si ese mínimo es <= 0 (nombres
+        cortos) y se buscan por largo.
+        """
+        compartidos = {}
+        for grama, veces in self._gramas(nombre).items():
+            for i, veces_c in self._postings.get(grama, ()):
+                compartidos[i] = compartidos.get(i, 0) + min(veces, veces_c)
+
+        n, dmax, largo = self.n, self.distancia_max, len(nombre)
+        largos = self._largos
+        salida = []
+        for i, cantidad in compartidos.items():
+            largo_c = largos[i]
+            if abs(largo_c - largo) <= dmax and cantidad >= max(largo, largo_c) + n - 1 - (n + 1) * dmax:
+                salida.append(i)
+        # sin n-gramas en común: solo los largos con mínimo <= 0
+        for largo_c in range(max(0, largo - dmax), largo + dmax + 1):
+            if max(largo, largo_c) + n - 1 - (n + 1) * dmax <= 0:
+                salida.extend(i for i in self._por_largo.get(largo_c, ()) if i not in compartidos)
+        salida.sort()
+        return salida
+
+    def buscar(self, nombre):
+        if nombre in self._memo:
+            return self._memo[nombre]
+
+        mejor = None
+        mejor_d = self.distancia_max + 1
+        for i in self.candidatos(nombre):
+            canonico = self.nombres[i]
+            d = distancia_acotada(nombre, canonico, mejor_d - 1 if mejor is not None else self.distancia_max)
+            if d < mejor_d and similitud(d, nombre, canonico) >= self.similitud_min:
+                mejor, mejor_d = canonico, d
+        resultado = (mejor, similitud(mejor_d, nombre, mejor)) if mejor is not None else None
+
+        if len(self._memo) >= self.MAX_MEMO:
+            self._memo.clear()
+        self._memo[nombre] = resultado
+        return resultado
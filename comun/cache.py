@@ -0,0 +1,164 @@
+# cache.py
+# --------------------------------
+# Caché persistente de resultados, direccionada por contenido.
+# Cada resultado se guarda bajo el hash de los bytes de la entrega,
+# dentro de un "contexto" que combina los bytes del canónico y la
+# versión de la rúbrica. Si el canónico o la rúbrica cambian, el
+# contexto cambia y las entradas viejas se eliminan al abrir la caché.
+# Así, volver a correr un script con algunas entregas tardías solo
+# recalcula los archivos nuevos o modificados.
+
+import os
+import json
+import hashlib
+import sqlite3
+
+# Nombre del archivo de caché (se crea en la carpeta de salida de cada script)
+NOMBRE_CACHE = ".cache_resultados.sqlite"
+
+# Variable de entorno: ruta alternativa de la caché, o "0" para desactivarla
+ENV_CACHE = "CACHE_RESULTADOS"
+
+
+def hash_bytes(*partes):
+    h = hashlib.sha256()
+    for p in partes:
+        h.update(hashlib.sha256(p).digest())
+    return h.hexdigest()
+
+
+def hash_archivo(path):
+    with open(path, "rb") as f:
+        return hash_contenido(f.read())
+
+
+def hash_contenido(datos):
+    """Misma clave que hash_archivo, para un archivo ya leído."""
+    return hashlib.sha256(datos).hexdigest()
+
+
+def version_rubrica(*paths, extra=""):
+    """
+    Versión de la rúbrica: hash del código fuente de los scripts que la implementan.
+    Cualquier cambio en las reglas invalida automáticamente lo guardado.
+    """
+    partes = [extra.encode("utf-8")]
+    for p in paths:
+        with open(p, "rb") as f:
+            partes.append(f.read())
+    return hash_bytes(*partes)
+
+
+class CacheResultados:
+    """
+    Caché de resultados de un script ("espacio") para un canónico y una versión de rúbrica.
+
+    Uso:
+        with abrir_cache(carpeta, "bd_similitud", canon_bytes, version) as cache:
+            r = cache.obtener(clave)
+            cache.guardar(clave, resultado)
+
+    Los resultados deben poder serializarse a JSON (las tuplas vuelven como listas).
+    """
+
+    activa = True
+
+    def __init__(self, ruta, espacio, canonico_bytes, version):
+        self.ruta = ruta
+        self.espacio = espacio
+        self.contexto = hash_bytes(canonico_bytes, version.encode("utf-8"))
+        self.aciertos = 0
+        self.fallos = 0
+        self._pendientes = 0
+
+        self._con = sqlite3.connect(ruta)
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            " espacio TEXT NOT NULL,"
+            " contexto TEXT NOT NULL,"
+            " clave TEXT NOT NULL,"
+            " resultado TEXT NOT NULL,"
+            " PRIMARY KEY (espacio, contexto, clave))"
+        )
+        self.compactar()
+
+    def compactar(self):
+        """Elimina las entradas de este espacio calculadas con otro canónico o rúbrica."""
+        cur = self._con.execute(
+            "DELETE FROM resultados WHERE espacio = ? AND contexto <> ?",
+            (self.espacio, self.contexto),
+        )
+        self._con.commit()
+        if cur.rowcount > 0:
+            self._con.execute("VACUUM")
+        return cur.rowcount
+
+    def obtener(self, clave):
+        fila = self._con.execute(
+            "SELECT resultado FROM resultados WHERE espacio = ? AND contexto = ? AND clave = ?",
+            (self.espacio, self.contexto, clave),
+        ).fetchone()
+        if fila is None:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return json.loads(fila[0])
+
+    def guardar(self, clave, resultado):
+        self._con.execute(
+            "INSERT OR REPLACE INTO resultados (espacio, contexto, clave, resultado) VALUES (?, ?, ?, ?)",
+            (self.espacio, self.contexto, clave, json.dumps(resultado)),
+        )
+        self._pendientes += 1
+        if self._pendientes >= 500:
+            self._con.commit()
+            self._pendientes = 0
+
+    def cerrar(self):
+        self._con.commit()
+        self._con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        if self.aciertos or self.fallos:
+            print(f"[CACHE] {self.aciertos} reutilizados, {self.fallos} recalculados ({self.ruta})")
+
+
+class _SinCache:
+    """Reemplazo nulo cuando la caché está desactivada (CACHE_RESULTADOS=0)."""
+
+    activa = False
+
+    def obtener(self, clave):
+        return None
+
+    def guardar(self, clave, resultado):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def abrir_cache(carpeta, espacio, canonico_bytes, version):
+    """
+    Abre la caché del script. Por defecto vive en carpeta/.cache_resultados.sqlite;
+    CACHE_RESULTADOS permite indicar otra ruta o desactivarla con "0".
+    """
+    ruta = os.getenv(ENV_CACHE, "").strip()
+    if ruta == "0":
+        return _SinCache()
+    if not ruta:
+        os.makedirs(carpeta, exist_ok=True)
+        ruta = os.path.join(carpeta, NOMBRE_CACHE)
+    return CacheResultados(ruta, espacio, canonico_bytes, version)
+
+
+def leer_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,314 @@
+# columnar.py
+# --------------------------------
+# Salida columnar opcional, junto a los CSV de resultados.
+# Con SALIDA_COLUMNAR=1 cada script guarda, además de su CSV, el mismo
+# contenido por columnas y con tipos:
+#   - <nombre>.parquet  si pyarrow está instalado;
+#   - <nombre>.npz      (NumPy) si no.
+# Los puntajes quedan como columnas float64/int64 y los textos (archivo,
+# alumno, consigna, ...) como una tabla de cadenas distintas más un
+# código entero por fila, así el análisis posterior carga millones de
+# puntajes sin volver a parsear texto.
+#
+# Las filas de error ("ERROR" en las columnas de puntaje y el mensaje en
+# la última) dejan NaN en las columnas numéricas y el mensaje en una
+# columna extra "error".
+#
+# SALIDA_COLUMNAR: "0" (por defecto, desactivada), "1" (parquet o npz
+# según lo instalado) o "npz" (siempre npz).
+#
+# Las filas no quedan en memoria: cada FILAS_POR_BLOQUE se vuelcan a un
+# temporal y guardar() arma el archivo bloque por bloque (un row group
+# de Parquet por bloque; en npz, los arreglos de cada bloque se
+# concatenan al final).
+
+import os
+import pickle
+import tempfile
+
+ENV_COLUMNAR = "SALIDA_COLUMNAR"
+
+# Valores que cuentan como "sin dato" en una columna numérica
+FALTANTES = ("", "ERROR", None)
+
+COLUMNA_ERROR = "error"
+SUFIJO_TABLA = "__tabla"
+
+FILAS_POR_BLOQUE = 50_000
+
+# Orden de los tipos al combinar bloques: basta un bloque con texto para
+# que la columna sea texto, y uno con faltantes para que sea float
+_ORDEN_TIPOS = {"int": 0, "float": 1, "texto": 2}
+
+
+def formato_columnar():
+    """Devuelve "parquet", "npz" o None (desactivada) según SALIDA_COLUMNAR y lo instalado."""
+    valor = os.getenv(ENV_COLUMNAR, "0").strip().lower()
+    if valor in ("", "0", "no", "false"):
+        return None
+    if valor == "npz":
+        return "npz"
+    try:
+        import pyarrow  # noqa: F401
+        return "parquet"
+    except ImportError:
+        return "npz"
+
+
+def ruta_columnar(ruta_csv, formato):
+    return os.path.splitext(ruta_csv)[0] + "." + formato
+
+
+def _numero(valor):
+    """float/int del valor, o None si no es un número."""
+    if isinstance(valor, bool):
+        return int(valor)
+    if isinstance(valor, (int, float)):
+        return valor
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _tipar(valores, error, tipo=None):
+    """
+    Decide el tipo de una columna: numérica si todas las celdas con dato
+    (salteando las filas de error) son números; si no, texto.
+    Devuelve ("int" | "float", lista de números/None) o ("texto", lista de str).
+    Con tipo, convierte al tipo ya decidido (el de todos los bloques).
+    """
+    if tipo == "texto":
+        return "texto", ["" if v is None else str(v) for v in valores]
+    numeros = []
+    enteros = True
+    for valor, es_error in zip(valores, error):
+        if es_error or valor in FALTANTES:
+            numeros.append(None)
+            enteros = False
+            continue
+        n = _numero(valor)
+        if n is None:
+            return "texto", ["" if v is None else str(v) for v in valores]
+        enteros = enteros and isinstance(n, int)
+        numeros.append(n)
+    if tipo == "float":
+        return "float", [None if n is None else float(n) for n in numeros]
+    return ("int" if enteros and numeros else "float"), numeros
+
+
+class EscritorColumnar:
+    """
+    Acompaña al writer del CSV (csv.DictWriter, o csv.writer con filas
+    en el orden de campos y el encabezado ya escrito): cada
+    writerow se escribe en el CSV y, si la salida columnar está activa,
+    también se acumula por columnas, en bloques de filas_por_bloque que
+    se vuelcan a un temporal. guardar() escribe el archivo columnar al
+    final (de forma atómica).
+
+        writer = EscritorColumnar(OUT_CSV, CAMPOS_SALIDA, csv.DictWriter(f, fieldnames=CAMPOS_SALIDA))
+        writer.writeheader()
+        ...
+        writer.guardar()
+
+    campos puede ser None si se conoce recién con la primera fila (dict).
+    """
+
+    def __init__(self, ruta_csv, campos, writer=None, formato=None, filas_por_bloque=FILAS_POR_BLOQUE):
+        self.ruta_csv = ruta_csv
+        self.campos = list(campos) if campos else None
+        self.writer = writer
+        self.formato = formato or formato_columnar()
+        self.filas_por_bloque = filas_por_bloque
+        self.columnas = None
+        self.errores = []
+        # bloques ya volcados: archivo temporal, cantidad y tipo de cada columna
+        self._volcado = None
+        self._bloques = 0
+        self._tipos = None
+        self._hay_errores = False
+
+    def writeheader(self):
+        self.writer.writeheader()
+
+    def writerow(self, fila):
+        if self.writer is not None:
+            self.writer.writerow(fila)
+        if self.formato is None:
+            return
+
+        if self.campos is None:
+            self.campos = list(fila.keys())
+        if self.columnas is None:
+            self.columnas = [[] for _ in self.campos]
+        valores = [fila.get(c) for c in self.campos] if isinstance(fila, dict) else list(fila)
+        for columna, valor in zip(self.columnas, valores):
+            columna.append(valor)
+        es_error = any(v == "ERROR" for v in valores)
+        self.errores.append(str(valores[-1]) if es_error else "")
+        if len(self.errores) >= self.filas_por_bloque:
+            self._volcar()
+
+    def _tipadas(self, columnas, errores, tipos=None):
+        """{campo: (tipo, valores)} de un bloque; con tipos, usando los de todos los bloques."""
+        es_error = [bool(e) for e in errores]
+        sin_error = [False] * len(errores)
+        tipadas = {}
+        for i, (campo, valores) in enumerate(zip(self.campos, columnas)):
+            # el mensaje de las filas de error va a la columna "error"
+            tipadas[campo] = _tipar(valores, es_error if i else sin_error, tipos[i] if tipos else None)
+        return tipadas
+
+    def _volcar(self):
+        """Pasa el bloque en memoria al temporal y actualiza el tipo de cada columna."""
+        if not self.errores:
+            return
+        tipos = [tipo for tipo, _ in self._tipadas(self.columnas, self.errores).values()]
+        if self._tipos is None:
+            self._tipos = tipos
+        else:
+            self._tipos = [max(a, b, key=_ORDEN_TIPOS.get) for a, b in zip(self._tipos, tipos)]
+        if self._volcado is None:
+            self._volcado = tempfile.TemporaryFile(prefix=".tmp_columnar_")
+        pickle.dump((self.columnas, self.errores), self._volcado, protocol=pickle.HIGHEST_PROTOCOL)
+        self._bloques += 1
+        self._hay_errores = self._hay_errores or any(self.errores)
+        self.columnas = [[] for _ in self.campos]
+        self.errores = []
+
+    def _esquema(self):
+        """{campo: tipo} final, con la columna "error" si alguna fila la necesita."""
+        tipos = self._tipos or ["float"] * len(self.campos)
+        esquema = dict(zip(self.campos, tipos))
+        if self._hay_errores:
+            esquema[COLUMNA_ERROR] = "texto"
+        return esquema
+
+    def _leer_bloques(self):
+        """Bloques volcados, en orden, como {campo: (tipo, valores)} con el tipo final de cada columna."""
+        if self._volcado is None:
+            return
+        self._volcado.seek(0)
+        for _ in range(self._bloques):
+            columnas, errores = pickle.load(self._volcado)
+            tipadas = self._tipadas(columnas, errores, self._tipos)
+            if self._hay_errores:
+                tipadas[COLUMNA_ERROR] = ("texto", errores)
+            yield tipadas
+
+    def guardar(self):
+        """Escribe el archivo columnar (si está activa); devuelve su ruta o None."""
+        if self.formato is None or self.campos is None:
+            return None
+
+        if self.columnas is None:
+            self.columnas = [[] for _ in self.campos]
+        self._volcar()
+
+        ruta = ruta_columnar(self.ruta_csv, self.formato)
+        carpeta = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(carpeta, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", suffix="." + self.formato, dir=carpeta)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                escribir = _escribir_parquet if self.formato == "parquet" else _escribir_npz
+                escribir(f, self._esquema(), self._leer_bloques())
+            os.replace(tmp, ruta)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        finally:
+            if self._volcado is not None:
+                self._volcado.close()
+                self._volcado = None
+                self._bloques = 0
+        return ruta
+
+
+# ============================================================
+# FORMATOS
+# ============================================================
+
+def _escribir_npz(f, esquema, bloques):
+    import numpy as np
+
+    # cada bloque se convierte a arreglos y se concatenan al final; las
+    # cadenas distintas se numeran en una sola tabla para todos los bloques
+    partes = [[] for _ in esquema]
+    codigos = [{} for _ in esquema]
+    for tipadas in bloques:
+        for i, (tipo, valores) in enumerate(tipadas.values()):
+            if tipo == "texto":
+                tabla = codigos[i]
+                partes[i].append(np.array([tabla.setdefault(v, len(tabla)) for v in valores], dtype=np.int32))
+            elif tipo == "int":
+                partes[i].append(np.array(valores, dtype=np.int64))
+            else:
+                partes[i].append(np.array([np.nan if v is None else v for v in valores], dtype=np.float64))
+
+    # los arreglos se guardan por posición (c0, c1, ...): los nombres de
+    # columna ("%Total", "file", ...) no siempre sirven como clave de savez
+    arreglos = {"__columnas__": np.array(list(esquema), dtype=str)}
+    for i, tipo in enumerate(esquema.values()):
+        clave = f"c{i}"
+        dtype = {"texto": np.int32, "int": np.int64}.get(tipo, np.float64)
+        arreglos[clave] = np.concatenate(partes[i]) if partes[i] else np.array([], dtype=dtype)
+        if tipo == "texto":
+            arreglos[clave + SUFIJO_TABLA] = np.array(list(codigos[i]), dtype=str)
+    np.savez(f, **arreglos)
+
+
+def _escribir_parquet(f, esquema, bloques):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tipos = {"texto": pa.dictionary(pa.int32(), pa.string()), "int": pa.int64(), "float": pa.float64()}
+    schema = pa.schema([(campo, tipos[tipo]) for campo, tipo in esquema.items()])
+    # un row group por bloque
+    with pq.ParquetWriter(f, schema) as writer:
+        for tipadas in bloques:
+            columnas = []
+            for tipo, valores in tipadas.values():
+                if tipo == "texto":
+                    columnas.append(pa.array(valores, type=pa.string()).dictionary_encode())
+                else:
+                    columnas.append(pa.array(valores, type=tipos[tipo]))
+            writer.write_table(pa.Table.from_arrays(columnas, schema=schema))
+
+
+# ============================================================
+# LECTURA
+# ============================================================
+
+def leer_columnar(ruta):
+    """
+    Lee un .parquet o .npz escrito por EscritorColumnar y devuelve
+    {columna: numpy.ndarray} en el orden original. Las columnas de texto
+    se devuelven decodificadas (tabla[códigos]).
+    """
+    import numpy as np
+
+    if ruta.lower().endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        tabla = pq.read_table(ruta, memory_map=True)
+        salida = {}
+        for c in tabla.column_names:
+            columna = tabla.column(c)
+            # cada row group trae su propio diccionario
+            if pa.types.is_dictionary(columna.type):
+                columna = pa.chunked_array([parte.dictionary_decode() for parte in columna.chunks],
+                                           type=columna.type.value_type)
+            salida[c] = columna.to_numpy()
+        return salida
+
+    with np.load(ruta) as datos:
+        salida = {}
+        for i, campo in enumerate(datos["__columnas__"].tolist()):
+            clave = f"c{i}"
+            if clave + SUFIJO_TABLA in datos.files:
+                salida[campo] = datos[clave + SUFIJO_TABLA][datos[clave]]
+            else:
+                salida[campo] = datos[clave]
+        return salida
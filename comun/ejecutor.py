@@ -0,0 +1,187 @@
+# ejecutor.py
+# --------------------------------
+# Ejecutor de lotes compartido por los scripts de corrección.
+# Reparte la evaluación de cada entrega en un pool de procesos y
+# devuelve los resultados EN ORDEN a medida que se completan, para
+# que el llamador los escriba en el CSV sin acumular toda la cohorte.
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from comun.cache import hash_archivo, leer_bytes
+
+# Cantidad de procesos por defecto (variable de entorno o núcleos disponibles)
+ENV_WORKERS = "NUM_WORKERS"
+
+# Hilos de lectura anticipada (ver precargar)
+ENV_HILOS_LECTURA = "HILOS_LECTURA"
+HILOS_LECTURA_POR_DEFECTO = 8
+
+
+def workers_por_defecto():
+    """
+    Devuelve la cantidad de procesos a usar:
+    NUM_WORKERS si está definida, si no la cantidad de núcleos.
+    """
+    valor = os.getenv(ENV_WORKERS, "").strip()
+    if valor:
+        try:
+            return max(1, int(valor))
+        except ValueError:
+            pass
+    return os.cpu_count() or 1
+
+
+# Contexto de solo lectura (ej. el canónico ya cargado) que cada proceso
+# recibe una única vez al arrancar, en lugar de viajar con cada tarea.
+_contexto = None
+
+
+def _inicializar(contexto):
+    global _contexto
+    _contexto = contexto
+
+
+def _llamar(funcion, item):
+    return funcion(item, _contexto)
+
+
+def _clave_cache(cache, item, clave=None):
+    if cache is None or not cache.activa:
+        return None
+    try:
+        return (clave or hash_archivo)(item)
+    except OSError:
+        return None  # el error real lo reporta la evaluación
+
+
+def ejecutar_en_lote(items, funcion, contexto=None, workers=None, ventana=None, cache=None, clave=None):
+    """
+    Aplica funcion(item, contexto) a cada item y genera tuplas
+    (item, resultado, error) en el MISMO orden que items.
+
+    - funcion debe estar definida a nivel de módulo (se envía a otros procesos).
+    - contexto se transfiere una vez por proceso; debe poder serializarse.
+    - Si la evaluación de un item lanza una excepción, se devuelve en "error"
+      (con resultado None) y el lote sigue con el resto.
+    - workers <= 1 evalúa en el mismo proceso, sin pool.
+    - ventana limita cuántas tareas hay en vuelo, para no retener la cohorte entera.
+    - cache (ver comun.cache): si se indica, cada item es la ruta de un archivo y
+      los resultados se buscan/guardan por el hash de su contenido; solo se
+      evalúan los archivos nuevos o modificados.
+    - clave: función item -> clave de caché, para items que no son rutas
+      (por defecto, el hash del contenido del archivo).
+    """
+    if workers is None:
+        workers = workers_por_defecto()
+
+    if workers <= 1:
+        for item in items:
+            k = _clave_cache(cache, item, clave)
+            if k is not None:
+                resultado = cache.obtener(k)
+                if resultado is not None:
+                    yield item, resultado, None
+                    continue
+            try:
+                resultado = funcion(item, contexto)
+            except Exception as e:
+                yield item, None, e
+                continue
+            if k is not None:
+                cache.guardar(k, resultado)
+            yield item, resultado, None
+        return
+
+    if ventana is None:
+        ventana = workers * 4
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_inicializar,
+                             initargs=(contexto,)) as pool:
+        # (item, clave, futuro, resultado_en_cache); futuro es None si hubo acierto
+        pendientes = deque()
+        en_vuelo = 0
+        iterador = iter(items)
+
+        def llenar():
+            nonlocal en_vuelo
+            for item in iterador:
+                k = _clave_cache(cache, item, clave)
+                resultado = cache.obtener(k) if k is not None else None
+                if resultado is not None:
+                    pendientes.append((item, k, None, resultado))
+                else:
+                    pendientes.append((item, k, pool.submit(_llamar, funcion, item), None))
+                    en_vuelo += 1
+                if en_vuelo >= ventana or len(pendientes) >= 4 * ventana:
+                    break
+
+        llenar()
+        while pendientes:
+            item, k, futuro, resultado = pendientes.popleft()
+            if futuro is None:
+                yield item, resultado, None
+            else:
+                en_vuelo -= 1
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    yield item, None, e
+                else:
+                    if k is not None:
+                        cache.guardar(k, resultado)
+                    yield item, resultado, None
+            llenar()
+
+
+def precargar(paths, hilos=None, adelanto=None):
+    """
+    Lee los archivos en un pool de hilos, adelantándose al que los consume,
+    y genera (path, datos, error) en el MISMO orden que paths.
+
+    Pensado para carpetas en red: mientras se evalúa una entrega, las
+    siguientes ya se están leyendo. A lo sumo hay `adelanto` archivos
+    leídos o en lectura a la vez (por defecto 4 por hilo), así la memoria
+    no depende del tamaño de la cohorte. Si la lectura falla, datos es
+    None y error la excepción.
+    """
+    if hilos is None:
+        try:
+            hilos = max(1, int(os.getenv(ENV_HILOS_LECTURA, "") or HILOS_LECTURA_POR_DEFECTO))
+        except ValueError:
+            hilos = HILOS_LECTURA_POR_DEFECTO
+    if adelanto is None:
+        adelanto = hilos * 4
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        pendientes = deque()
+        iterador = iter(paths)
+        for path in iterador:
+            pendientes.append((path, pool.submit(leer_bytes, path)))
+            if len(pendientes) >= adelanto:
+                break
+        while pendientes:
+            path, futuro = pendientes.popleft()
+            try:
+                datos, error = futuro.result(), None
+            except Exception as e:
+                datos, error = None, e
+            # se encola la siguiente lectura antes de entregar esta
+            siguiente = next(iterador, None)
+            if siguiente is not None:
+                pendientes.append((siguiente, pool.submit(leer_bytes, siguiente)))
+            yield path, datos, error
+
+
+def fila_de_error(campos, archivo, error):
+    """
+    Fila de salida para una entrega que no se pudo evaluar:
+    "ERROR" en cada columna de puntaje y el mensaje en la última
+    (mismo criterio que CompararBD_contra_Canonico).
+    """
+    fila = {c: "ERROR" for c in campos}
+    fila[campos[0]] = archivo
+    fila[campos[-1]] = str(error)
+    return fila
@@ -0,0 +1,218 @@
+# minhash.py
+# --------------------------------
+# Detección de entregas casi duplicadas (posibles copias) sin comparar
+# todos los pares: cada entrega se resume en un conjunto de "elementos"
+# (nombres, fragmentos de texto, ...) y de ese conjunto se calcula una
+# firma MinHash de K valores. Dos firmas coinciden en cada posición con
+# probabilidad igual a la similitud de Jaccard de los conjuntos.
+#
+# Las firmas se cortan en bandas (LSH): dos entregas son candidatas si
+# coinciden en al menos una banda entera. Solo los candidatos se
+# verifican con el Jaccard exacto, y los pares que superan el umbral se
+# unen en grupos (componentes conexas). El costo es casi lineal en la
+# cantidad de entregas, en lugar de cuadrático.
+#
+# Las entregas con exactamente el mismo conjunto se agrupan de entrada
+# (sin pasar por LSH), así mil copias idénticas no generan un millón de
+# pares candidatos. Los cubos con muchos candidatos (entregas parecidas
+# entre sí) se filtran comparando las firmas en bloque con numpy.
+
+import zlib
+
+# Primo de Mersenne 2^31 - 1 para las permutaciones (a * x + b) mod P
+# (con a, x < 2^31 el producto entra en un uint64 de numpy)
+PRIMO = (1 << 31) - 1
+
+# Probabilidad mínima de que un par con Jaccard = umbral quede como
+# candidato (se eligen las bandas para cumplirla con la menor cantidad de
+# candidatos falsos; estos solo cuestan una verificación exacta)
+RECALL_MINIMO = 0.99
+
+# Antes del Jaccard exacto, los candidatos se filtran por el Jaccard que
+# estiman sus firmas (fracción de posiciones iguales); se descartan los que
+# quedan más de este margen por debajo del umbral. Con 128 permutaciones
+# el desvío de la estimación es ~0.035 cerca de 0.8: 0.15 son más de 4 desvíos.
+MARGEN_ESTIMACION = 0.15
+
+# Filas de un cubo que se comparan juntas contra todo el cubo (acota la memoria)
+BLOQUE = 64
+
+
+def bandas_para(permutaciones, umbral, recall=RECALL_MINIMO):
+    """
+    (bandas, filas por banda) para firmas de `permutaciones` valores: la
+    mayor cantidad de filas por banda (menos candidatos falsos) con la que
+    un par en el umbral todavía es candidato con probabilidad >= recall.
+    """
+    elegido = (permutaciones, 1)
+    for filas in range(1, permutaciones + 1):
+        bandas = permutaciones // filas
+        if 1 - (1 - umbral ** filas) ** bandas >= recall:
+            elegido = (bandas, filas)
+    return elegido
+
+
+def jaccard(a, b):
+    """Similitud de Jaccard entre dos conjuntos (1.0 si ambos están vacíos)."""
+    comunes = len(a & b)
+    union = len(a) + len(b) - comunes
+    return comunes / union if union else 1.0
+
+
+class IndiceLSH:
+    """
+    Agrupa claves (archivos, alumnos, ...) cuyos conjuntos de elementos
+    tienen Jaccard >= umbral:
+
+        indice = IndiceLSH(umbral=0.8)
+        for archivo, elementos in ...:
+            indice.agregar(archivo, elementos)
+        for grupo in indice.grupos():
+            for archivo, jaccard_max, mas_parecido in grupo: ...
+
+    Los elementos son cadenas; el orden de agregado no cambia el resultado.
+    """
+
+    def __init__(self, umbral=0.8, permutaciones=128, semilla=1):
+        import numpy as np
+
+        self.umbral = umbral
+        self.permutaciones = permutaciones
+        self.bandas, self.filas = bandas_para(permutaciones, umbral)
+
+        azar = np.random.RandomState(semilla)
+        self._a = azar.randint(1, PRIMO, size=permutaciones).astype(np.uint64)
+        self._b = azar.randint(0, PRIMO, size=permutaciones).astype(np.uint64)
+
+        # cada elemento distinto tiene un número (los conjuntos de números
+        # se intersecan más rápido que los de cadenas)
+        self._elementos = {}
+        # cada conjunto distinto tiene un número: sus elementos (tupla
+        # ordenada de números) y las claves que lo comparten
+        self._id_de = {}
+        self._conjuntos = []
+        self._claves = []
+        self._firmas = []
+        # (banda, valores de la banda) -> números de conjunto en ese cubo
+        self._cubos = {}
+
+    def firma(self, elementos):
+        """Firma MinHash (arreglo de `permutaciones` valores) de un conjunto no vacío de cadenas."""
+        import numpy as np
+
+        x = np.fromiter((zlib.crc32(e.encode("utf-8")) & PRIMO for e in elementos),
+                        dtype=np.uint64, count=len(elementos))
+        return ((np.outer(self._a, x) + self._b[:, None]) % PRIMO).min(axis=1).astype(np.uint32)
+
+    def agregar(self, clave, elementos):
+        """Registra la clave con su conjunto de elementos (los conjuntos vacíos se ignoran)."""
+        unicos = set(elementos)
+        if not unicos:
+            return
+        numeros = self._elementos
+        conjunto = tuple(sorted(numeros.setdefault(e, len(numeros)) for e in unicos))
+        n = self._id_de.get(conjunto)
+        if n is not None:
+            self._claves[n].append(clave)  # idéntico a uno ya indexado
+            return
+        n = self._id_de[conjunto] = len(self._conjuntos)
+        self._conjuntos.append(conjunto)
+        self._claves.append([clave])
+
+        firma = self.firma(list(unicos))
+        self._firmas.append(firma)
+        for banda in range(self.bandas):
+            valores = firma[banda * self.filas:(banda + 1) * self.filas].tobytes()
+            self._cubos.setdefault((banda, valores), []).append(n)
+
+    def _candidatos(self, cubo):
+        """
+        Pares del cubo cuyo Jaccard estimado por las firmas no descarta el
+        umbral, como claves a * cantidad + b (a < b, números de conjunto).
+        """
+        import numpy as np
+
+        numeros = np.array(cubo, dtype=np.int64)  # en orden de agregado
+        firmas = np.stack([self._firmas[n] for n in cubo])
+        minimo = (self.umbral - MARGEN_ESTIMACION) * self.permutaciones
+        claves = []
+        for desde in range(0, len(cubo) - 1, BLOQUE):
+            bloque = firmas[desde:desde + BLOQUE]
+            iguales = (bloque[:, None, :] == firmas[None, desde + 1:, :]).sum(axis=2)
+            i, j = np.nonzero(iguales >= minimo)
+            i, j = i + desde, j + desde + 1
+            despues = i < j
+            claves.append(numeros[i[despues]] * len(self._conjuntos) + numeros[j[despues]])
+        return np.concatenate(claves)
+
+    def pares(self):
+        """Pares de conjuntos distintos con Jaccard >= umbral: [(número a, número b, jaccard)], a < b."""
+        import numpy as np
+
+        claves = [self._candidatos(cubo) for cubo in self._cubos.values() if len(cubo) > 1]
+        if not claves:
+            return []
+        cantidad = len(self._conjuntos)
+        conjuntos = self._conjuntos
+        umbral = self.umbral
+        congelados = {}
+        salida = []
+        # cada par una sola vez, aunque coincida en varias bandas
+        for clave in np.unique(np.concatenate(claves)).tolist():
+            a, b = divmod(clave, cantidad)
+            la, lb = len(conjuntos[a]), len(conjuntos[b])
+            if min(la, lb) < umbral * max(la, lb):
+                continue  # Jaccard <= menor / mayor: no llega al umbral
+            for n in (a, b):
+                if n not in congelados:
+                    congelados[n] = frozenset(conjuntos[n])
+            j_ab = jaccard(congelados[a], congelados[b])
+            if j_ab >= umbral:
+                salida.append((a, b, j_ab))
+        return salida
+
+    def grupos(self):
+        """
+        Grupos de 2 o más claves unidas por pares con Jaccard >= umbral
+        (o con el mismo conjunto). Cada grupo es una lista ordenada de
+        (clave, jaccard_max, mas_parecido): el Jaccard más alto con otra
+        clave del grupo y esa clave. Los grupos van de mayor a menor.
+        """
+        padre = list(range(len(self._conjuntos)))
+
+        def raiz(n):
+            while padre[n] != n:
+                padre[n] = padre[padre[n]]
+                n = padre[n]
+            return n
+
+        mejor = {}  # número de conjunto -> (jaccard, clave más parecida)
+        for a, b, j_ab in self.pares():
+            ra, rb = raiz(a), raiz(b)
+            if ra != rb:
+                padre[max(ra, rb)] = min(ra, rb)
+            for x, y in ((a, b), (b, a)):
+                otra = min(self._claves[y])
+                if x not in mejor or j_ab > mejor[x][0] or (j_ab == mejor[x][0] and otra < mejor[x][1]):
+                    mejor[x] = (j_ab, otra)
+
+        componentes = {}
+        for n in range(len(self._conjuntos)):
+            componentes.setdefault(raiz(n), []).append(n)
+
+        grupos = []
+        for numeros in componentes.values():
+            filas = []
+            for n in numeros:
+                claves = sorted(self._claves[n])
+                for clave in claves:
+                    if len(claves) > 1:
+                        # una copia idéntica siempre es la más parecida
+                        otra = claves[1] if clave == claves[0] else claves[0]
+                        filas.append((clave, 1.0, otra))
+                    elif n in mejor:
+                        filas.append((clave, *mejor[n]))
+            if len(filas) > 1:
+                grupos.append(sorted(filas))
+        grupos.sort(key=lambda g: (-len(g), g[0][0]))
+        return grupos
@@ -0,0 +1,76 @@
+# normalizacion.py
+# --------------------------------
+# Normalización de textos compartida por los scripts de BD, SQL y BPMN.
+# Los mismos nombres ("Clientes", "Id Cliente", "Avisar al chofer", ...)
+# se repiten en miles de entregas: cada forma distinta se normaliza UNA
+# vez (memoización LRU acotada) y el resultado se interna con sys.intern,
+# así todas las entregas comparten la misma cadena en memoria y las
+# comparaciones entre nombres iguales son más baratas.
+#
+# Todas las funciones quitan tildes de la misma manera (descomposición
+# NFD y eliminación de marcas combinantes), así "camión" y "camion" o
+# "Físico" y "fisico" son siempre el mismo texto.
+
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+
+# Formas distintas que se recuerdan por función
+TAM_MEMO = 1 << 16
+
+_re_espacios = re.compile(r"\s+")
+
+
+def _sin_tildes(s):
+    s = unicodedata.normalize("NFD", s)
+    return "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+
+
+@lru_cache(maxsize=TAM_MEMO)
+def _identificador(s):
+    s = _sin_tildes(s).lower().replace(" ", "_").replace("-", "_")
+    while "__" in s:
+        s = s.replace("__", "_")
+    return sys.intern(s.strip("_"))
+
+
+def normalizar_identificador(s):
+    """
+    Nombre de tabla/campo comparable: sin tildes, en minúsculas, con
+    espacios y guiones como "_" (sin repetidos ni en los extremos).
+    "Artículos " -> "articulos", "Id - Cliente" -> "id_cliente".
+    """
+    if s is None:
+        return ""
+    return _identificador(str(s))
+
+
+@lru_cache(maxsize=TAM_MEMO)
+def _plegado(s):
+    return sys.intern(_sin_tildes(s).lower())
+
+
+def plegar(s):
+    """
+    Texto libre para buscar palabras clave: sin tildes y en minúsculas,
+    conservando espacios y puntuación. "Control Físico" -> "control fisico".
+    """
+    if s is None:
+        return ""
+    return _plegado(str(s))
+
+
+@lru_cache(maxsize=TAM_MEMO)
+def _espacios(s):
+    return sys.intern(_re_espacios.sub(" ", s.strip()))
+
+
+def normalizar_espacios(s):
+    """Colapsa espacios, tabs y saltos de línea en un único espacio (sin tocar mayúsculas ni tildes)."""
+    return _espacios(s or "")
+
+
+def internar(s):
+    """Interna una cadena (tipos, subtipos y otros valores muy repetidos)."""
+    return sys.intern(s)
@@ -0,0 +1,249 @@
+# vigilancia.py
+# --------------------------------
+# Modo vigilancia: durante la corrección de un examen las entregas llegan
+# a lo largo de horas. En lugar de volver a correr los scripts completos,
+# una Vigilancia revisa periódicamente su carpeta de entregas (mtime y
+# tamaño de cada archivo), vuelve a evaluar solo lo nuevo o modificado y
+# actualiza las filas correspondientes de sus CSV de salida.
+#
+# Los CSV se mantienen en memoria agrupados por clave (archivo o alumno)
+# y se reescriben de forma atómica (archivo temporal + os.replace), en el
+# mismo orden que los genera la corrida completa: quien los abra nunca ve
+# un archivo a medio escribir.
+
+import os
+import csv
+import time
+import tempfile
+
+from comun.columnar import EscritorColumnar
+
+# Segundos entre revisiones (variable de entorno o --intervalo)
+ENV_INTERVALO = "INTERVALO_VIGILANCIA"
+INTERVALO_POR_DEFECTO = 5.0
+
+
+def instantanea(carpeta, extension, recursiva=False, excluir=()):
+    """
+    Devuelve {ruta: (mtime_ns, tamaño)} de los archivos de la carpeta
+    con la extensión indicada. excluir: rutas absolutas a ignorar.
+    """
+    estado = {}
+    excluir = {os.path.abspath(p) for p in excluir}
+    for raiz, _, archivos in os.walk(carpeta):
+        for fn in archivos:
+            if not fn.lower().endswith(extension):
+                continue
+            path = os.path.join(raiz, fn)
+            if os.path.abspath(path) in excluir:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # se borró mientras se recorría
+            estado[path] = (st.st_mtime_ns, st.st_size)
+        if not recursiva:
+            break
+    return estado
+
+
+def firma_archivo(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def escribir_csv_atomico(ruta, campos, filas, encoding="utf-8"):
+    """Escribe el CSV en un temporal de la misma carpeta y lo reemplaza de una vez."""
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(carpeta, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", suffix=".csv", dir=carpeta)
+    try:
+        with os.fdopen(fd, "w", newline="", encoding=encoding) as f:
+            w = csv.DictWriter(f, fieldnames=campos, extrasaction="ignore")
+            w.writeheader()
+            for fila in filas:
+                w.writerow(fila)
+        os.replace(tmp, ruta)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class TablaCSV:
+    """
+    CSV de salida en memoria, agrupado por el valor de la columna clave
+    (un grupo puede tener varias filas, ej. todas las consultas de un alumno).
+    Se guarda ordenado por clave, como la corrida completa.
+    """
+
+    def __init__(self, ruta, campos=None, clave="archivo", encoding="utf-8"):
+        self.ruta = ruta
+        self.campos = list(campos) if campos else None
+        self.clave = clave
+        self.encoding = encoding
+        self.grupos = {}
+        self.modificada = False
+
+        if os.path.isfile(ruta):
+            with open(ruta, "r", newline="", encoding=encoding) as f:
+                reader = csv.DictReader(f)
+                if self.campos is None:
+                    self.campos = reader.fieldnames
+                for fila in reader:
+                    self.grupos.setdefault(fila.get(self.clave, ""), []).append(fila)
+
+    def claves(self):
+        return set(self.grupos)
+
+    def reemplazar(self, clave, filas):
+        filas = list(filas)
+        if self.campos is None and filas:
+            self.campos = list(filas[0].keys())
+        if self.grupos.get(clave) != filas:
+            self.grupos[clave] = filas
+            self.modificada = True
+
+    def eliminar(self, clave):
+        if self.grupos.pop(clave, None) is not None:
+            self.modificada = True
+
+    def guardar(self):
+        """Reescribe el CSV si cambió. Si el archivo está bloqueado (ej. abierto en Excel), reintenta en el próximo ciclo."""
+        if not self.modificada or self.campos is None:
+            return False
+        filas = (fila for clave in sorted(self.grupos) for fila in self.grupos[clave])
+        try:
+            escribir_csv_atomico(self.ruta, self.campos, filas, self.encoding)
+            columnar = EscritorColumnar(self.ruta, self.campos)
+            if columnar.formato:
+                for clave in sorted(self.grupos):
+                    for fila in self.grupos[clave]:
+                        columnar.writerow(fila)
+                columnar.guardar()
+        except PermissionError as e:
+            print(f"[AVISO] No se pudo actualizar {self.ruta} ({e}); se reintenta en el próximo ciclo.")
+            return False
+        self.modificada = False
+        return True
+
+
+class Vigilancia:
+    """
+    Base de cada vigilancia. Las subclases definen:
+
+    - nombre, carpeta:     etiqueta y carpeta de entregas.
+    - ruta_canonico():     archivo canónico (si cambia, se revisa todo otra vez).
+    - rutas_canonicas():   opcional, si hay varios canónicos (por defecto [ruta_canonico()]).
+    - instantanea():       estado actual de las entregas ({ruta: firma}).
+    - clave(ruta):         grupo de salida al que pertenece una entrega.
+    - preparar():          (re)carga el canónico.
+    - evaluar(grupos):     evalúa {clave: [rutas]} y actualiza self.tablas.
+    """
+
+    nombre = ""
+    carpeta = ""
+
+    def __init__(self, tablas):
+        self.tablas = tablas
+        self.estado = None
+        self.firma_canonico = None
+        self._aviso = None
+
+    def _avisar(self, mensaje):
+        if mensaje != self._aviso:
+            print(f"[{self.nombre}] {mensaje}")
+            self._aviso = mensaje
+
+    def ciclo(self):
+        """Una revisión. Devuelve la cantidad de grupos actualizados o eliminados."""
+        if not os.path.isdir(self.carpeta):
+            self._avisar(f"Esperando la carpeta de entregas: {self.carpeta}")
+            return 0
+        firmas = []
+        for ruta in self.rutas_canonicas():
+            firmas.append(firma_archivo(ruta))
+            if firmas[-1] is None:
+                self._avisar(f"No se encontró el canónico: {ruta}")
+                return 0
+        firma = tuple(firmas)
+        self._aviso = None
+
+        actual = self.instantanea()
+        completa = self.estado is None or firma != self.firma_canonico
+        if firma != self.firma_canonico:
+            self.preparar()
+            self.firma_canonico = firma
+
+        vigentes = {}
+        for path in sorted(actual):
+            vigentes.setdefault(self.clave(path), []).append(path)
+
+        if completa:
+            # primera revisión o canónico nuevo: se revisa todo (la caché
+            # evita recalcular lo que no cambió) y se quitan filas huérfanas
+            cambiadas = set(vigentes)
+            for tabla in self.tablas:
+                cambiadas |= tabla.claves()
+        else:
+            cambiadas = set()
+            for path, f in actual.items():
+                if self.estado.get(path) != f:
+                    cambiadas.add(self.clave(path))
+            for path in self.estado:
+                if path not in actual:
+                    cambiadas.add(self.clave(path))
+
+        if not cambiadas:
+            self.estado = actual
+            return 0
+
+        for clave in cambiadas - set(vigentes):
+            for tabla in self.tablas:
+                tabla.eliminar(clave)
+            self.eliminar(clave)
+
+        grupos = {c: vigentes[c] for c in sorted(cambiadas) if c in vigentes}
+        if grupos:
+            self.evaluar(grupos)
+
+        for tabla in self.tablas:
+            tabla.guardar()
+        self.estado = actual
+        return len(cambiadas)
+
+    def rutas_canonicas(self):
+        return [self.ruta_canonico()]
+
+    def eliminar(self, clave):
+        """Limpieza extra cuando desaparece un grupo (por defecto, nada)."""
+
+
+def intervalo_por_defecto():
+    try:
+        return float(os.getenv(ENV_INTERVALO, "") or INTERVALO_POR_DEFECTO)
+    except ValueError:
+        return INTERVALO_POR_DEFECTO
+
+
+def vigilar(vigilancias, intervalo=None, una_vez=False):
+    """Revisa cada vigilancia cada `intervalo` segundos hasta Ctrl+C (o una sola vez)."""
+    intervalo = intervalo_por_defecto() if intervalo is None else intervalo
+    try:
+        while True:
+            for v in vigilancias:
+                try:
+                    n = v.ciclo()
+                except Exception as e:
+                    print(f"[{v.nombre}] [ERROR] {e}")
+                    continue
+                if n:
+                    print(f"[{v.nombre}] {time.strftime('%H:%M:%S')} {n} entrega(s) actualizada(s)")
+            if una_vez:
+                return
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        print("\nVigilancia detenida.")
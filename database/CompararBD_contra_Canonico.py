@@ -5,9 +5,19 @@
 # Graba resumen_similitud.csv en la carpeta de salida indicada.
 
 import os
+import sys
 import json
 import csv
-import unicodedata
+import codecs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from comun.ejecutor import ejecutar_en_lote, precargar
+from comun.cache import abrir_cache, leer_bytes, version_rubrica, hash_contenido
+from comun.columnar import EscritorColumnar
+from comun import normalizacion, aproximado
+from comun.normalizacion import normalizar_identificador
+from comun.aproximado import IndiceAproximado
+from comun.minhash import IndiceLSH
 
 # ==== RUTAS FIJAS (según lo que indicaste) ====
 # ==== RUTAS (ANONIMIZADAS) ====
@@ -18,22 +28,75 @@ NOMBRE_CANONICO     = "Canónico_2c2025_TemaB_schema.json"
 CARPETA_SALIDA      = os.getenv("CARPETA_SALIDA", "./Grado_Similitud")
 NOMBRE_SALIDA_CSV   = "resumen_similitud.csv"
 
+# ==== Variantes del canónico ====
+# Si el tema admite varios esquemas correctos: CANONICOS_BD con los nombres
+# de archivo (en CARPETA_CANONICO) separados por comas. Cada alumno se
+# compara contra la variante que mejor le corresponde y el CSV agrega la
+# columna "canonico" con su nombre.
+NOMBRES_CANONICOS   = [n.strip() for n in os.getenv("CANONICOS_BD", "").split(",") if n.strip()] \
+    or [NOMBRE_CANONICO]
+CAMPOS_PUNTAJE      = ["%Tablas", "%Campos", "%PKs", "%Relaciones", "%Total"]
+CAMPOS_SALIDA       = ["archivo"] + (["canonico"] if len(NOMBRES_CANONICOS) > 1 else []) + CAMPOS_PUNTAJE
+
+# ==== Coincidencia aproximada de nombres (opcional) ====
+# Con APROXIMADO_BD=1, una tabla o campo del alumno que no coincide
+# exactamente con el canónico se empareja con el nombre canónico más
+# cercano ("proveedores" ~ "proveedor", "cleinte" ~ "cliente") si está a
+# distancia de edición <= DISTANCIA_MAX_BD y su similitud
+# (1 - distancia / largo) es >= SIMILITUD_MIN_BD. Cuenta como
+# CREDITO_APROXIMADO_BD × similitud de una coincidencia exacta.
+APROXIMADO          = os.getenv("APROXIMADO_BD", "0").strip().lower() not in ("", "0", "no", "false")
+DISTANCIA_MAX       = int(os.getenv("DISTANCIA_MAX_BD", "2"))
+SIMILITUD_MIN       = float(os.getenv("SIMILITUD_MIN_BD", "0.8"))
+CREDITO_APROXIMADO  = float(os.getenv("CREDITO_APROXIMADO_BD", "0.75"))
+
+# ==== Entregas casi duplicadas entre alumnos (opcional) ====
+# Con SIMILITUD_ALUMNOS_BD=1, en la misma pasada se agrupan los alumnos
+# cuyos esquemas tienen similitud de Jaccard >= UMBRAL_JACCARD_BD (MinHash
+# + LSH, ver comun/minhash.py) y los grupos se graban en
+# grupos_similitud.csv junto a resumen_similitud.csv. Se compara lo que
+# cada alumno tiene DISTINTO del canónico (lo que agrega y lo que le
+# falta): dos esquemas correctos son iguales sin haberse copiado. Los
+# que difieren en menos de MIN_ELEMENTOS_SIMILITUD_BD elementos no se agrupan.
+SIMILITUD_ALUMNOS   = os.getenv("SIMILITUD_ALUMNOS_BD", "0").strip().lower() not in ("", "0", "no", "false")
+UMBRAL_JACCARD      = float(os.getenv("UMBRAL_JACCARD_BD", "0.8"))
+PERMUTACIONES       = int(os.getenv("PERMUTACIONES_MINHASH", "128"))
+MIN_ELEMENTOS       = int(os.getenv("MIN_ELEMENTOS_SIMILITUD_BD", "3"))
+NOMBRE_GRUPOS_CSV   = "grupos_similitud.csv"
+CAMPOS_GRUPOS       = ["grupo", "archivo", "integrantes", "%Jaccard_max", "mas_parecido"]
+
 # ==== Normalización de nombres (ignora mayúsculas/tildes/espacios) ====
-def norm(s: str) -> str:
-    if s is None:
-        return ""
-    s = unicodedata.normalize("NFD", str(s))
-    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")  # quita tildes
-    s = s.lower().replace(" ", "_").replace("-", "_")
-    while "__" in s:
-        s = s.replace("__", "_")
-    return s.strip("_")
+# Memoizada e internada en comun/normalizacion.py: cada nombre distinto
+# se normaliza una sola vez para toda la cohorte.
+norm = normalizar_identificador
+
+# ==== JSON rápido: orjson si está instalado, si no json ====
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def json_desde_bytes(datos):
+    """
+    Decodifica un JSON UTF-8 ya leído. Lo que orjson rechaza (BOM, NaN,
+    enteros enormes, errores de sintaxis) lo resuelve json, así los
+    resultados y los mensajes de error son los mismos con o sin orjson.
+    """
+    if orjson is not None and not datos.startswith(codecs.BOM_UTF8):
+        try:
+            return orjson.loads(datos)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(datos.decode("utf-8"))
 
 # ==== Cargar esquema desde JSON ====
 def load_schema(path):
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
+    return schema_from_dict(data)
 
+# ==== Esquema desde el JSON ya parseado (también lo usa el servicio de corrección) ====
+def schema_from_dict(data):
     # Tablas
     tabs = {norm(t["table"]) for t in data.get("tables", [])}
 
@@ -63,94 +126,487 @@ def load_schema(path):
 
     return {"tabs": tabs, "fields": fields, "pks": pks, "rels": rels}
 
+# ==== Canónico compilado (una vez por corrida) ====
+# Todo lo que depende solo del canónico se arma una vez: por tabla
+# requerida, sus campos y PKs congelados (frozenset) y los totales de
+# cada criterio; los pares de cada relación también quedan congelados.
+def compile_canon(canon, aproximar=None):
+    required = canon["tabs"]
+    tables = []
+    for t in sorted(required):
+        c_fields = frozenset(canon["fields"].get(t, ()))
+        c_pks = frozenset(canon["pks"].get(t, ()))
+        tables.append((t, c_fields, c_pks))
+
+    rels = []
+    for key_c, rel_list_c in canon["rels"].items():
+        for rel_c in rel_list_c:
+            rels.append((key_c, frozenset(rel_c["pairs"]), rel_c["enforced"], rel_c["uc"], rel_c["dc"]))
+
+    compilado = {
+        "tabs": frozenset(required),
+        "tables": tables,
+        "den_fields": sum(len(c_fields) for _, c_fields, _ in tables),
+        "den_pks": sum(len(c_pks) for _, _, c_pks in tables),
+        "rels": rels,
+        "elementos": elementos_esquema(canon),
+        "compilado": True,
+    }
+    if aproximar is None:
+        aproximar = APROXIMADO
+    if aproximar:
+        compilado["aproximado"] = compile_aproximado(canon)
+    return compilado
+
+# ==== Índices de nombres canónicos para la coincidencia aproximada ====
+# Uno para las tablas y uno por tabla para sus campos (los de la lista de
+# campos y los que aparecen en relaciones), en orden alfabético: ante dos
+# canónicos a la misma distancia gana el primero.
+def compile_aproximado(canon):
+    campos = {}
+    for t, fields in canon["fields"].items():
+        campos.setdefault(t, set()).update(fields)
+    for (child, parent), rel_list in canon["rels"].items():
+        for r in rel_list:
+            for child_field, parent_field in r["pairs"]:
+                campos.setdefault(child, set()).add(child_field)
+                campos.setdefault(parent, set()).add(parent_field)
+    tablas = set(canon["tabs"]) | set(campos) | {t for key in canon["rels"] for t in key}
+    indice = lambda nombres: IndiceAproximado(sorted(nombres), DISTANCIA_MAX, SIMILITUD_MIN)
+    return {"tablas": indice(tablas), "campos": {t: indice(fs) for t, fs in campos.items()}}
+
+# ==== Elementos de un esquema (para comparar alumnos entre sí) ====
+# Tablas, tabla.campo y pares de cada relación, con los nombres ya normalizados.
+def elementos_esquema(schema):
+    elementos = {"t:" + t for t in schema["tabs"]}
+    for t, fields in schema["fields"].items():
+        elementos.update(f"f:{t}.{f}" for f in fields)
+    for (child, parent), rel_list in schema["rels"].items():
+        for r in rel_list:
+            elementos.update(f"r:{child}.{cf}>{parent}.{pf}" for cf, pf in r["pairs"])
+    return frozenset(elementos)
+
+def elementos_distintos(canon, stud):
+    """Lo que el alumno agrega al canónico compilado y lo que le falta ("-" adelante), ordenado."""
+    propios = elementos_esquema(stud)
+    canonicos = canon["elementos"]
+    return sorted(propios - canonicos) + sorted("-" + e for e in canonicos - propios)
+
 # ==== Cálculo de similitud ====
 def score_student(canon, stud):
+    # acepta el canónico de load_schema (se compila acá) o ya compilado
+    if not canon.get("compilado"):
+        canon = compile_canon(canon)
+    return _redondear(_componentes(canon, stud))
+
+def _total(comps):
+    s_tabs, s_fields, s_pks, s_rels = comps
+    return (0.30 * s_tabs + 0.30 * s_fields + 0.20 * s_pks + 0.20 * s_rels) * 100
+
+def _redondear(comps):
+    s_tabs, s_fields, s_pks, s_rels = comps
+    total = _total(comps)
+    return round(100 * s_tabs, 1), round(100 * s_fields, 1), round(100 * s_pks, 1), round(100 * s_rels, 1), round(total, 1)
+
+def _componentes(canon, stud):
+    """Las cuatro proporciones (0..1) del alumno contra un canónico compilado."""
+    if "aproximado" in canon:
+        aprox = aproximar_nombres(canon, stud)
+        if aprox is not None:
+            return _componentes_aproximados(canon, aprox)
+
     # 1) Tablas (30 %)
     required = canon["tabs"]
     present  = stud["tabs"]
     s_tabs = len(required & present) / len(required) if required else 1.0
 
-    # 2) Campos (30 %)
-    num = den = 0
-    for t in required:
-        c_fields = canon["fields"].get(t, set())
-        s_fields = stud["fields"].get(t, set())
-        den += len(c_fields)
-        num += len(c_fields & s_fields)
-    s_fields = (num / den) if den else 1.0
-
-    # 3) PKs (20 %)
-    num = den = 0
-    for t in required:
-        c_pks = canon["pks"].get(t, set())
-        s_pks = stud["pks"].get(t, set())
-        den += len(c_pks)
-        num += len(c_pks & s_pks)
-    s_pks = (num / den) if den else 1.0
+    # 2) Campos (30 %) y 3) PKs (20 %)
+    num_fields = num_pks = 0
+    stud_fields = stud["fields"]
+    stud_pks = stud["pks"]
+    for t, c_fields, c_pks in canon["tables"]:
+        s_fields = stud_fields.get(t)
+        if s_fields:
+            num_fields += len(c_fields & s_fields)
+        s_pks = stud_pks.get(t)
+        if s_pks:
+            num_pks += len(c_pks & s_pks)
+    den = canon["den_fields"]
+    s_fields = (num_fields / den) if den else 1.0
+    den = canon["den_pks"]
+    s_pks = (num_pks / den) if den else 1.0
 
     # 4) Relaciones (20 %)
+    # los pares de cada relación del alumno se congelan una vez (no por candidato)
+    cands = {}
+    stud_rels = stud["rels"]
     acc = 0.0
     den = 0
-    for key_c, rel_list_c in canon["rels"].items():
-        for rel_c in rel_list_c:
-            den += 1
-            best = 0.0
-            cand_list = stud["rels"].get(key_c, [])
-            for rel_s in cand_list:
-                set_c = set(rel_c["pairs"])
-                set_s = set(rel_s["pairs"])
-                if set_c:
-                    pair_score = len(set_c & set_s) / len(set_c)
-                else:
-                    pair_score = 1.0
-                # pequeñas penalizaciones si no coinciden atributos de relación
-                if rel_c["enforced"] != rel_s["enforced"]:
-                    pair_score *= 0.90
-                if rel_c["uc"] != rel_s["uc"]:
-                    pair_score *= 0.95
-                if rel_c["dc"] != rel_s["dc"]:
-                    pair_score *= 0.95
-                if pair_score > best:
-                    best = pair_score
-            acc += best
+    for key_c, set_c, enforced_c, uc_c, dc_c in canon["rels"]:
+        den += 1
+        best = 0.0
+        cand_list = cands.get(key_c)
+        if cand_list is None:
+            cand_list = cands[key_c] = [
+                (frozenset(r["pairs"]), r["enforced"], r["uc"], r["dc"]) for r in stud_rels.get(key_c, ())
+            ]
+        for set_s, enforced_s, uc_s, dc_s in cand_list:
+            if set_c:
+                pair_score = len(set_c & set_s) / len(set_c)
+            else:
+                pair_score = 1.0
+            # pequeñas penalizaciones si no coinciden atributos de relación
+            if enforced_c != enforced_s:
+                pair_score *= 0.90
+            if uc_c != uc_s:
+                pair_score *= 0.95
+            if dc_c != dc_s:
+                pair_score *= 0.95
+            if pair_score > best:
+                best = pair_score
+        acc += best
     s_rels = acc / den if den else 1.0
 
-    total = (0.30 * s_tabs + 0.30 * s_fields + 0.20 * s_pks + 0.20 * s_rels) * 100
-    return round(100 * s_tabs, 1), round(100 * s_fields, 1), round(100 * s_pks, 1), round(100 * s_rels, 1), round(total, 1)
+    return s_tabs, s_fields, s_pks, s_rels
+
+# ==== Coincidencia aproximada: nombres del alumno llevados a los del canónico ====
+def _emparejar(nombres, canonicos, indice):
+    """
+    {nombre del alumno: (nombre canónico, crédito)}, uno a uno: los exactos
+    valen 1.0; el resto busca su canónico más cercano en el índice y, si
+    dos nombres reclaman el mismo, se lo queda el más parecido (ante
+    empate, el primero alfabéticamente). Los que no encuentran quedan afuera.
+    """
+    pares = {n: (n, 1.0) for n in nombres if n in canonicos}
+    if indice is None:
+        return pares
+    tomados = set(pares)
+    reclamos = []
+    for n in nombres:
+        if n in pares:
+            continue
+        encontrado = indice.buscar(n)
+        if encontrado is not None and encontrado[0] not in tomados:
+            reclamos.append((-encontrado[1], n, encontrado[0]))
+    for menos_sim, n, c in sorted(reclamos):
+        if c not in tomados:
+            tomados.add(c)
+            pares[n] = (c, CREDITO_APROXIMADO * -menos_sim)
+    return pares
+
+def aproximar_nombres(canon, stud):
+    """
+    El alumno con tablas y campos renombrados a los del canónico y el
+    crédito de cada nombre: tabs {t: crédito}, fields/pks {t: {campo: crédito}},
+    rels {(hija, padre): [{"pairs": {(campo hija, campo padre): crédito}, ...}]}.
+    None si ningún nombre se emparejó de forma aproximada (el puntaje es el exacto).
+    """
+    aprox = canon["aproximado"]
+    canon_tabs = aprox["tablas"].nombres
+    nombres = set(stud["tabs"]) | set(stud["fields"]) | {t for key in stud["rels"] for t in key}
+    tablas = _emparejar(sorted(nombres), set(canon_tabs), aprox["tablas"])
+
+    # campos de cada tabla del alumno: los declarados y los usados en relaciones
+    campos_de = {}
+    for t, fields in stud["fields"].items():
+        campos_de.setdefault(t, set()).update(fields)
+    for (child, parent), rel_list in stud["rels"].items():
+        for r in rel_list:
+            for child_field, parent_field in r["pairs"]:
+                campos_de.setdefault(child, set()).add(child_field)
+                campos_de.setdefault(parent, set()).add(parent_field)
+    campos = {}
+    for t, fields in campos_de.items():
+        if t in tablas:
+            indice = aprox["campos"].get(tablas[t][0])
+            campos[t] = _emparejar(sorted(fields), set(indice.nombres) if indice else set(), indice)
+    if all(n == c for pares in (tablas, *campos.values()) for n, (c, _) in pares.items()):
+        return None
+
+    tabs = {tablas[t][0]: tablas[t][1] for t in stud["tabs"] if t in tablas}
+    fields = {}
+    pks = {}
+    for origen, destino in ((stud["fields"], fields), (stud["pks"], pks)):
+        for t, fs in origen.items():
+            if t not in tablas:
+                continue
+            pares = campos[t]
+            destino[tablas[t][0]] = {pares[f][0]: pares[f][1] for f in fs if f in pares}
+
+    rels = {}
+    for (child, parent), rel_list in stud["rels"].items():
+        if child not in tablas or parent not in tablas:
+            continue
+        pares_c, pares_p = campos.get(child, {}), campos.get(parent, {})
+        key = (tablas[child][0], tablas[parent][0])
+        for r in rel_list:
+            pairs = {}
+            for child_field, parent_field in r["pairs"]:
+                if child_field in pares_c and parent_field in pares_p:
+                    (cf, credito_c), (pf, credito_p) = pares_c[child_field], pares_p[parent_field]
+                    pairs[(cf, pf)] = max(pairs.get((cf, pf), 0.0), min(credito_c, credito_p))
+            rels.setdefault(key, []).append({**r, "pairs": pairs})
+
+    return {"tabs": tabs, "fields": fields, "pks": pks, "rels": rels}
+
+def _componentes_aproximados(canon, aprox):
+    """Como _componentes, pero cada nombre suma su crédito (1.0 si es exacto) en lugar de 1."""
+    required = canon["tabs"]
+    s_tabs = sum(aprox["tabs"].get(t, 0.0) for t in required) / len(required) if required else 1.0
+
+    num_fields = num_pks = 0.0
+    for t, c_fields, c_pks in canon["tables"]:
+        s_fields = aprox["fields"].get(t)
+        if s_fields:
+            num_fields += sum(s_fields.get(f, 0.0) for f in c_fields)
+        s_pks = aprox["pks"].get(t)
+        if s_pks:
+            num_pks += sum(s_pks.get(f, 0.0) for f in c_pks)
+    den = canon["den_fields"]
+    s_fields = (num_fields / den) if den else 1.0
+    den = canon["den_pks"]
+    s_pks = (num_pks / den) if den else 1.0
+
+    acc = 0.0
+    den = 0
+    for key_c, set_c, enforced_c, uc_c, dc_c in canon["rels"]:
+        den += 1
+        best = 0.0
+        for r in aprox["rels"].get(key_c, ()):
+            if set_c:
+                pair_score = sum(r["pairs"].get(p, 0.0) for p in set_c) / len(set_c)
+            else:
+                pair_score = 1.0
+            if enforced_c != r["enforced"]:
+                pair_score *= 0.90
+            if uc_c != r["uc"]:
+                pair_score *= 0.95
+            if dc_c != r["dc"]:
+                pair_score *= 0.95
+            if pair_score > best:
+                best = pair_score
+        acc += best
+    s_rels = acc / den if den else 1.0
+
+    return s_tabs, s_fields, s_pks, s_rels
+
+# ==== Varias variantes del canónico ====
+# Índice compartido: tabla -> [(variante, #campos, #PKs)] y
+# (hija, padre) -> [(variante, #relaciones)]. Con él se acota, sin comparar,
+# el mejor total que un alumno puede sacar contra cada variante (las tablas
+# son exactas; campos, PKs y relaciones, a lo sumo los de las tablas y
+# relaciones que el alumno tiene). Las variantes se comparan de mayor a
+# menor cota y se corta cuando ninguna restante puede superar a la mejor.
+# Con la coincidencia aproximada las cotas exactas no valen (un nombre
+# parecido también suma): se comparan todas las variantes.
+def compile_variantes(canons):
+    """canons: [(nombre, canónico de load_schema)] en orden de preferencia (ante empate gana la primera)."""
+    variantes = []
+    tablas = {}
+    relaciones = {}
+    for i, (nombre, canon) in enumerate(canons):
+        c = compile_canon(canon)
+        variantes.append((nombre, c))
+        for t, c_fields, c_pks in c["tables"]:
+            tablas.setdefault(t, []).append((i, len(c_fields), len(c_pks)))
+        por_clave = {}
+        for key_c, *_ in c["rels"]:
+            por_clave[key_c] = por_clave.get(key_c, 0) + 1
+        for key_c, n in por_clave.items():
+            relaciones.setdefault(key_c, []).append((i, n))
+    return {"variantes": variantes, "tablas": tablas, "relaciones": relaciones, "compilado": True,
+            "aproximado": APROXIMADO}
+
+def _cotas(indice, stud):
+    """Cota superior del total (sin redondear) del alumno contra cada variante."""
+    n = len(indice["variantes"])
+    tabs = [0] * n
+    fields = [0] * n
+    pks = [0] * n
+    rels = [0] * n
+    tablas = indice["tablas"]
+    for t in stud["tabs"]:
+        for i, _, _ in tablas.get(t, ()):
+            tabs[i] += 1
+    for t, s_fields in stud["fields"].items():
+        for i, n_fields, _ in tablas.get(t, ()):
+            fields[i] += min(n_fields, len(s_fields))
+    for t, s_pks in stud["pks"].items():
+        for i, _, n_pks in tablas.get(t, ()):
+            pks[i] += min(n_pks, len(s_pks))
+    for key, _ in stud["rels"].items():
+        for i, n_rels in indice["relaciones"].get(key, ()):
+            rels[i] += n_rels
+
+    cotas = []
+    for i, (_, c) in enumerate(indice["variantes"]):
+        n_tabs, den_f, den_p, den_r = len(c["tabs"]), c["den_fields"], c["den_pks"], len(c["rels"])
+        cotas.append(_total((
+            tabs[i] / n_tabs if n_tabs else 1.0,
+            fields[i] / den_f if den_f else 1.0,
+            pks[i] / den_p if den_p else 1.0,
+            rels[i] / den_r if den_r else 1.0,
+        )))
+    return cotas
+
+def score_variantes(indice, stud):
+    """Devuelve (nombre de la mejor variante, *puntajes) como score_student."""
+    if indice["aproximado"]:
+        # los nombres aproximados no están en el índice: sin cota, se evalúan todas, en orden
+        cotas = [float("inf")] * len(indice["variantes"])
+    else:
+        cotas = _cotas(indice, stud)
+    mejor = mejor_total = mejor_comps = None
+    for i in sorted(range(len(cotas)), key=lambda i: -cotas[i]):
+        if mejor is not None and cotas[i] + 1e-9 < mejor_total:
+            break  # ninguna variante restante puede superar a la mejor
+        comps = _componentes(indice["variantes"][i][1], stud)
+        total = _total(comps)
+        if mejor is None or total > mejor_total or (total == mejor_total and i < mejor):
+            mejor, mejor_total, mejor_comps = i, total, comps
+    return (indice["variantes"][mejor][0], *_redondear(mejor_comps))
+
+# ==== Canónico(s) configurado(s) ====
+def rutas_canonicos():
+    return [os.path.join(CARPETA_CANONICO, n) for n in NOMBRES_CANONICOS]
+
+def cargar_canonicos(rutas):
+    """Un canónico compilado, o el índice de variantes si hay más de uno."""
+    if len(rutas) == 1:
+        return compile_canon(load_schema(rutas[0]))
+    return compile_variantes([(os.path.basename(r), load_schema(r)) for r in rutas])
+
+def bytes_canonicos(rutas):
+    """Contenido de los canónicos para el contexto de la caché (nombres incluidos)."""
+    partes = []
+    for r in rutas:
+        partes += [os.path.basename(r).encode("utf-8"), leer_bytes(r)]
+    return b"\0".join(partes) if len(rutas) > 1 else partes[1]
+
+def evaluar(canon, stud):
+    """score_student contra el canónico, o score_variantes si hay varias variantes."""
+    if "variantes" in canon:
+        return score_variantes(canon, stud)
+    return score_student(canon, stud)
+
+# ==== Versión de la rúbrica para la caché (este script + la normalización + la configuración aproximada) ====
+def version_rubrica_bd():
+    extra = f"aproximado:{DISTANCIA_MAX}:{SIMILITUD_MIN}:{CREDITO_APROXIMADO}" if APROXIMADO else ""
+    return version_rubrica(__file__, normalizacion.__file__, aproximado.__file__, extra=extra)
+
+# ==== Tarea por alumno (se ejecuta en el pool de procesos) ====
+def evaluar_archivo(stud_path, canon):
+    stud = load_schema(stud_path)
+    return evaluar(canon, stud)
+
+# ==== Tarea para un .json ya leído por precargar (item = (ruta, datos, error)) ====
+def evaluar_datos(item, canon):
+    _, datos, error = item
+    if error is not None:
+        raise error
+    return evaluar(canon, schema_from_dict(json_desde_bytes(datos)))
+
+# ==== Ídem, con los elementos distintos del canónico (SIMILITUD_ALUMNOS_BD=1) ====
+def evaluar_datos_con_elementos(item, canon):
+    _, datos, error = item
+    if error is not None:
+        raise error
+    stud = schema_from_dict(json_desde_bytes(datos))
+    scores = evaluar(canon, stud)
+    if "variantes" in canon:
+        # contra la variante que le tocó (el nombre es el primer valor)
+        canon = dict(canon["variantes"])[scores[0]]
+    return [scores, elementos_distintos(canon, stud)]
+
+def clave_datos(item):
+    _, datos, _ = item
+    return hash_contenido(datos) if datos is not None else None
+
+# ==== Grupos de alumnos casi duplicados ====
+def escribir_grupos(ruta, grupos):
+    with open(ruta, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f)
+        w.writerow(CAMPOS_GRUPOS)
+        for numero, grupo in enumerate(grupos, 1):
+            for fn, jaccard_max, mas_parecido in grupo:
+                w.writerow([numero, fn, len(grupo), round(100 * jaccard_max, 1), mas_parecido])
+
+# ==== Fila de un .json que no se pudo evaluar ====
+def fila_de_error(fn, e):
+    return [fn] + ["ERROR"] * (len(CAMPOS_SALIDA) - 2) + [str(e)]
 
 # ==== Main ====
 def main():
     # asegurar carpeta de salida
     os.makedirs(CARPETA_SALIDA, exist_ok=True)
 
-    # cargar canónico
-    canon_path = os.path.join(CARPETA_CANONICO, NOMBRE_CANONICO)
-    if not os.path.isfile(canon_path):
-        raise FileNotFoundError(f"No se encontró el canónico: {canon_path}")
-    canon = load_schema(canon_path)
+    # cargar canónico (o sus variantes)
+    canon_paths = rutas_canonicos()
+    for canon_path in canon_paths:
+        if not os.path.isfile(canon_path):
+            raise FileNotFoundError(f"No se encontró el canónico: {canon_path}")
+    canon = cargar_canonicos(canon_paths)
+    if len(canon_paths) > 1:
+        print(f"Comparando contra {len(canon_paths)} variantes del canónico: {', '.join(NOMBRES_CANONICOS)}")
+    excluidos = {os.path.abspath(p) for p in canon_paths}
 
     csv_out = os.path.join(CARPETA_SALIDA, NOMBRE_SALIDA_CSV)
 
-    with open(csv_out, "w", newline="", encoding="utf-8-sig") as f:
+    stud_paths = []
+    for fn in sorted(os.listdir(CARPETA_ORIGEN_JSON)):
+        if not fn.lower().endswith(".json"):
+            continue
+        stud_path = os.path.join(CARPETA_ORIGEN_JSON, fn)
+        # por las dudas, saltar el canónico si alguien lo copia ahí
+        if os.path.abspath(stud_path) in excluidos:
+            continue
+        stud_paths.append(stud_path)
+
+    # solo se recalculan los .json nuevos o modificados
+    if SIMILITUD_ALUMNOS:
+        tarea, espacio = evaluar_datos_con_elementos, "bd_similitud_elementos"
+        lsh = IndiceLSH(UMBRAL_JACCARD, PERMUTACIONES)
+    else:
+        tarea, espacio = evaluar_datos, "bd_similitud"
+        lsh = None
+    cache = abrir_cache(CARPETA_SALIDA, espacio, bytes_canonicos(canon_paths), version_rubrica_bd())
+
+    with cache, open(csv_out, "w", newline="", encoding="utf-8-sig") as f:
         w = csv.writer(f)
-        w.writerow(["archivo", "%Tablas", "%Campos", "%PKs", "%Relaciones", "%Total"])
+        w.writerow(CAMPOS_SALIDA)
+        w = EscritorColumnar(csv_out, CAMPOS_SALIDA, w)
 
-        for fn in sorted(os.listdir(CARPETA_ORIGEN_JSON)):
-            if not fn.lower().endswith(".json"):
+        # los .json se leen en hilos por adelantado (carpetas en red): la
+        # lectura del siguiente se superpone con la evaluación del actual
+        items = precargar(stud_paths)
+        for (stud_path, _, _), scores, e in ejecutar_en_lote(items, tarea, canon,
+                                                             cache=cache, clave=clave_datos):
+            fn = os.path.basename(stud_path)
+            if e is not None:
+                w.writerow(fila_de_error(fn, e))
                 continue
-            stud_path = os.path.join(CARPETA_ORIGEN_JSON, fn)
-            # por las dudas, saltar el canónico si alguien lo copia ahí
-            if os.path.abspath(stud_path) == os.path.abspath(canon_path):
-                continue
-            try:
-                stud = load_schema(stud_path)
-                s_tabs, s_fields, s_pks, s_rels, total = score_student(canon, stud)
-                w.writerow([fn, s_tabs, s_fields, s_pks, s_rels, total])
-            except Exception as e:
-                w.writerow([fn, "ERROR", "ERROR", "ERROR", "ERROR", str(e)])
+            if lsh is not None:
+                scores, elementos = scores
+                if len(elementos) >= MIN_ELEMENTOS:
+                    lsh.agregar(fn, elementos)
+            # (canonico,) %Tablas, %Campos, %PKs, %Relaciones, %Total
+            w.writerow([fn, *scores])
+
+        columnar = w.guardar()
+
+    if lsh is not None:
+        grupos_out = os.path.join(CARPETA_SALIDA, NOMBRE_GRUPOS_CSV)
+        grupos = lsh.grupos()
+        escribir_grupos(grupos_out, grupos)
+        print(f"Entregas casi duplicadas (Jaccard >= {UMBRAL_JACCARD}): {len(grupos)} grupo(s), "
+              f"{sum(len(g) for g in grupos)} alumno(s)")
 
     print("✅ Listo. Archivo generado en:")
     print(csv_out)
+    if columnar:
+        print(columnar)
+    if lsh is not None:
+        print(grupos_out)
 
 if __name__ == "__main__":
     main()
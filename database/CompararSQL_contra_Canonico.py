@@ -1,44 +1,37 @@
 # -*- coding: utf-8 -*-
-import os, re, json, csv, argparse
+import os, re, sys, json, csv, argparse
 from pathlib import Path
 from typing import Dict, Any, List, Tuple, Iterable, Optional
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from comun.ejecutor import ejecutar_en_lote
+from comun.cache import abrir_cache, leer_bytes, version_rubrica, hash_archivo
+from comun.columnar import EscritorColumnar
+from comun.minhash import IndiceLSH
+from comun import normalizacion
+from comun.normalizacion import normalizar_espacios, plegar
+from lexico_sql import huella_sql, tokens_sql
+import lexico_sql
+import ejecucion_sql
+
 # RUTAS POR DEFECTO
 # RUTAS (ANONIMIZADAS)
 DEFAULT_INPUT     = os.getenv("DEFAULT_INPUT", "./Para_corregir_SQL")
 DEFAULT_CANON_DIR = os.getenv("DEFAULT_CANON_DIR", "./Consignas_SQL")
 DEFAULT_OUTPUT    = os.getenv("DEFAULT_OUTPUT", "./Depuracion_SQL")
+# base SQLite de prueba para corregir también por resultado (vacío = solo huella)
+DEFAULT_FIXTURE   = os.getenv("FIXTURE_SQL", "")
 
-_re_ws = re.compile(r"\s+")
-
-def norm_space(s: str) -> str:
-    return _re_ws.sub(" ", (s or "").strip())
+# colapsa espacios (memoizada en comun/normalizacion.py)
+norm_space = normalizar_espacios
 
+# Huella de cada consulta: una sola pasada por el texto (ver lexico_sql.py)
 def is_crosstab(sql: str) -> bool:
-    s = (sql or "").upper()
-    return "TRANSFORM" in s and "PIVOT" in s
-
-def _agg_func(sql: str) -> str:
-    m = re.search(r"\bTRANSFORM\s+(\w+)\s*\(", sql, re.I)
-    return (m.group(1).upper() if m else "")
-
-def _pivot_expr(sql: str) -> str:
-    m = re.search(r"\bPIVOT\s+(.+?)(?:;|$)", sql, re.I | re.S)
-    return norm_space(m.group(1)) if m else ""
-
-def _tables_in_from(sql: str) -> List[str]:
-    tables = set()
-    for m in re.finditer(r"\bFROM\b\s+(.+?)(?:\bWHERE\b|\bGROUP\b|\bPIVOT\b|;|$)", sql, re.I | re.S):
-        from_part = m.group(1)
-        parts = re.split(r"\bJOIN\b|,", from_part, flags=re.I)
-        for p in parts:
-            t = re.split(r"\bon\b|\bas\b|\s", p.strip(), flags=re.I)[0]
-            if t and not t.startswith("("):
-                tables.add(t.strip("[]"))
-    return sorted(tables)
+    return huella_sql(sql or "")["crosstab"]
 
 def parse_crosstab_fingerprint(sql: str) -> Dict[str, Any]:
-    return {"agg": _agg_func(sql), "pivot": _pivot_expr(sql), "tables": _tables_in_from(sql)}
+    huella = huella_sql(sql or "")
+    return {"agg": huella["agg"], "pivot": huella["pivot"], "tables": huella["tables"], "joins": huella["joins"]}
 
 def _collect_items(obj) -> Iterable[Dict[str, Any]]:
     if obj is None:
@@ -61,12 +54,16 @@ def _collect_items(obj) -> Iterable[Dict[str, Any]]:
             elif isinstance(v, dict) and "sql" in v:
                 yield {"name": str(k), "sql": str(v.get("sql",""))}
 
+def load_items(obj) -> List[Dict[str, Any]]:
+    """Consultas ({"name", "sql"}) de un JSON ya leído, en cualquiera de los formatos de consultas.json."""
+    return list(_collect_items(obj))
+
 def load_items_from_json(path: Path) -> List[Dict[str, Any]]:
     try:
         data = json.loads(path.read_text(encoding="utf-8"))
     except Exception:
         return []
-    return list(_collect_items(data))
+    return load_items(data)
 
 def consigna_from_query_name(qname: str) -> str:
     m = re.match(r"^\s*Consulta\s*(\d+)", str(qname), re.I)
@@ -74,7 +71,8 @@ def consigna_from_query_name(qname: str) -> str:
         return ""
     return f"Consigna_{int(m.group(1))}"
 
-def load_canonic_fp(canonic_json: Path) -> Dict[str, Dict[str, Any]]:
+def load_canonic_sql(canonic_json: Path) -> Dict[str, str]:
+    """SQL del crosstab canónico de cada consigna."""
     mapping = {}
     items = load_items_from_json(canonic_json)
     for it in items:
@@ -84,16 +82,19 @@ def load_canonic_fp(canonic_json: Path) -> Dict[str, Dict[str, Any]]:
         if re.search(r"Consulta\s*[2-5]\s*b", name or "", re.I):
             cons = consigna_from_query_name(name)
             if cons:
-                mapping[cons] = parse_crosstab_fingerprint(sql)
+                mapping[cons] = sql
     if not mapping:
         for it in items:
             name = it.get("name",""); sql  = it.get("sql","")
             if is_crosstab(sql):
                 cons = consigna_from_query_name(name)
                 if cons and cons not in mapping:
-                    mapping[cons] = parse_crosstab_fingerprint(sql)
+                    mapping[cons] = sql
     return mapping
 
+def load_canonic_fp(canonic_json: Path) -> Dict[str, Dict[str, Any]]:
+    return {cons: parse_crosstab_fingerprint(sql) for cons, sql in load_canonic_sql(canonic_json).items()}
+
 def jaccard(a, b) -> float:
     A, B = set(a), set(b)
     if not A and not B:
@@ -101,12 +102,16 @@ def jaccard(a, b) -> float:
     inter = len(A & B); uni = len(A | B)
     return inter / uni if uni else 0.0
 
+W_TABLES, W_AGG, W_PIVOT = 0.45, 0.25, 0.30
+
+def _puntaje(s_tables: float, s_agg: float, s_pivot: float) -> float:
+    return round(100*(W_TABLES*s_tables + W_AGG*s_agg + W_PIVOT*s_pivot), 1)
+
 def score_similarity(stu_fp, can_fp):
-    w_tables, w_agg, w_pivot = 0.45, 0.25, 0.30
     s_tables = jaccard(stu_fp.get("tables", []), can_fp.get("tables", []))
     s_agg    = 1.0 if (stu_fp.get("agg","").upper() == can_fp.get("agg","").upper() and stu_fp.get("agg","")!="") else 0.0
     s_pivot  = 1.0 if (norm_space(stu_fp.get("pivot","")) == norm_space(can_fp.get("pivot","")) and stu_fp.get("pivot","")!="") else 0.0
-    total = round(100*(w_tables*s_tables + w_agg*s_agg + w_pivot*s_pivot), 1)
+    total = _puntaje(s_tables, s_agg, s_pivot)
     dbg = {"tables_student": stu_fp.get("tables", []),
            "tables_canonic": can_fp.get("tables", []),
            "agg_student": stu_fp.get("agg",""),
@@ -115,6 +120,85 @@ def score_similarity(stu_fp, can_fp):
            "pivot_canonic": can_fp.get("pivot","")}
     return total, dbg
 
+# ==== Banco de huellas canónicas indexado ====
+# Para asignar la consigna no se compara la huella del alumno contra todas
+# las canónicas: el banco se compila una vez con índices invertidos por
+# función de agregado, expresión de PIVOT y tabla. Una huella idéntica a una
+# canónica da 100 sin mirar el resto; si no, se recorren solo las canónicas
+# que comparten pivot, agregado o alguna tabla (las demás puntúan 0), por
+# tramos de mayor a menor puntaje posible, y se saltea toda canónica (o todo
+# el tramo) cuya cota no alcanza a la mejor encontrada. La cota de las tablas
+# es menor/mayor cantidad (el Jaccard no puede superarla). El resultado es el
+# mismo que comparar contra todas (ante empate, la primera canónica del banco).
+def compile_banco(canonic_fp, ejecucion: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    canonic_fp: {consigna: huella} o [(consigna, huella)] en orden de preferencia.
+    ejecucion: fixture, límites y resultados canónicos para corregir también por resultado (ver más abajo).
+    """
+    entradas = list(canonic_fp.items()) if isinstance(canonic_fp, dict) else list(canonic_fp)
+    aggs, pivots, tablas = [], [], []
+    exactas, por_agg, por_pivot, por_tabla, sin_tablas = {}, {}, {}, {}, []
+    for i, (_, fp) in enumerate(entradas):
+        agg, pivot, tabs = fp.get("agg","").upper(), norm_space(fp.get("pivot","")), frozenset(fp.get("tables", []))
+        aggs.append(agg); pivots.append(pivot); tablas.append(tabs)
+        exactas.setdefault((agg, pivot, tabs), i)
+        por_agg.setdefault(agg, []).append(i)
+        por_pivot.setdefault(pivot, []).append(i)
+        for t in tabs:
+            por_tabla.setdefault(t, []).append(i)
+        if not tabs:
+            sin_tablas.append(i)
+    return {"entradas": entradas, "aggs": aggs, "pivots": pivots, "tablas": tablas, "exactas": exactas,
+            "por_agg": por_agg, "por_pivot": por_pivot, "por_tabla": por_tabla, "sin_tablas": sin_tablas,
+            "ejecucion": ejecucion, "compilado": True}
+
+def mejor_canonica(banco, stu_fp) -> Optional[int]:
+    """Índice en el banco de la canónica de mayor puntaje (la primera ante empate), o None si todas dan 0."""
+    agg = stu_fp.get("agg","").upper() if stu_fp.get("agg","") != "" else None
+    pivot = norm_space(stu_fp.get("pivot","")) if stu_fp.get("pivot","") != "" else None
+    tabs = frozenset(stu_fp.get("tables", []))
+    if agg is not None and pivot is not None:
+        i = banco["exactas"].get((agg, pivot, tabs))
+        if i is not None:
+            return i  # 100: ninguna otra la supera y entre las idénticas gana la primera
+
+    aggs, pivots, tablas = banco["aggs"], banco["pivots"], banco["tablas"]
+    n = len(tabs)
+    mejor, mejor_total = None, 0.0
+
+    def probar(i):
+        nonlocal mejor, mejor_total
+        s_agg = 1.0 if aggs[i] == agg else 0.0
+        s_pivot = 1.0 if pivots[i] == pivot else 0.0
+        m = len(tablas[i])
+        cota = _puntaje(min(n, m) / max(n, m) if n or m else 1.0, s_agg, s_pivot)
+        if cota < mejor_total or (cota == mejor_total and mejor is not None and i > mejor):
+            return
+        total = _puntaje(jaccard(tabs, tablas[i]), s_agg, s_pivot)
+        if total > mejor_total or (total == mejor_total and mejor is not None and i < mejor):
+            mejor, mejor_total = i, total
+
+    # tramos: mismo pivot (<= 100), mismo agregado sin el pivot (<= 70), solo tablas (<= 45)
+    if pivot is not None:
+        for i in banco["por_pivot"].get(pivot, ()):
+            probar(i)
+    if agg is not None and _puntaje(1.0, 1.0, 0.0) >= mejor_total:
+        for i in banco["por_agg"].get(agg, ()):
+            if pivots[i] != pivot:
+                probar(i)
+    if _puntaje(1.0, 0.0, 0.0) >= mejor_total:
+        vistos = set()
+        for t in tabs:
+            for i in banco["por_tabla"].get(t, ()):
+                if i not in vistos and aggs[i] != agg and pivots[i] != pivot:
+                    vistos.add(i)
+                    probar(i)
+        if not tabs:
+            for i in banco["sin_tablas"]:
+                if aggs[i] != agg and pivots[i] != pivot:
+                    probar(i)
+    return mejor
+
 def auto_find_canonico(canon_dir: Path) -> Optional[Path]:
     if not canon_dir.is_dir():
         return None
@@ -134,9 +218,123 @@ def auto_find_canonico(canon_dir: Path) -> Optional[Path]:
     candidates.sort(key=lambda t: (t[0], t[1]), reverse=True)
     return candidates[0][2]
 
-def compare_folder(input_folder: Path, canonic_fp, out_folder: Path):
-    out_folder.mkdir(parents=True, exist_ok=True)
-    rows = []
+def compare_json(json_path: Path, canonic_fp) -> List[Dict[str, Any]]:
+    """Compara cada crosstab de un consultas.json contra el canónico (tarea del pool)."""
+    return compare_items(load_items_from_json(json_path), canonic_fp)
+
+def compare_items(items: Iterable[Dict[str, Any]], canonic_fp) -> List[Dict[str, Any]]:
+    """Igual que compare_json, sobre los items {name, sql} ya leídos."""
+    banco = canonic_fp if isinstance(canonic_fp, dict) and canonic_fp.get("compilado") else compile_banco(canonic_fp)
+    return _comparar(items, banco)[1]
+
+def _comparar(items: Iterable[Dict[str, Any]], banco) -> Tuple[List[Tuple[str, str, Dict[str, Any]]], List[Dict[str, Any]]]:
+    """(crosstabs, filas) de los items; si el banco tiene ejecucion, cada fila lleva además su resultado."""
+    crosstabs = list(_crosstabs(items))
+    filas = [compare_fp(name, stu_fp, banco) for name, _, stu_fp in crosstabs]
+    if banco.get("ejecucion"):
+        for (_, sql, _), fila in zip(crosstabs, filas):
+            fila.update(comparar_resultado(sql, fila["consigna_asignada"], banco["ejecucion"]))
+    return crosstabs, filas
+
+def _crosstabs(items: Iterable[Dict[str, Any]]) -> Iterable[Tuple[str, str, Dict[str, Any]]]:
+    """(name, sql, huella) de cada crosstab; cada consulta se recorre una sola vez."""
+    for it in items:
+        name = str(it.get("name","")); sql  = str(it.get("sql",""))
+        huella = huella_sql(sql)
+        if huella["crosstab"]:
+            yield name, sql, huella
+
+def compare_fp(name: str, stu_fp: Dict[str, Any], banco) -> Dict[str, Any]:
+    """Fila del crosstab de huella stu_fp contra la consigna canónica más parecida del banco (compile_banco)."""
+    best = {"consigna":"-", "score":0.0, "dbg":{}}
+    i = mejor_canonica(banco, stu_fp)
+    if i is not None:
+        cons, fp = banco["entradas"][i]
+        score, dbg = score_similarity(stu_fp, fp)
+        best = {"consigna": cons, "score": score, "dbg": dbg}
+    return {"query_name": name,
+            "consigna_asignada": best["consigna"],
+            "similitud_%": best["score"],
+            "detalle_tablas": f"{best['dbg'].get('tables_student', [])} vs {best['dbg'].get('tables_canonic', [])}",
+            "detalle_agg": f"{best['dbg'].get('agg_student','')}/{best['dbg'].get('agg_canonic','')}",
+            "detalle_pivot": f"{best['dbg'].get('pivot_student','')}/{best['dbg'].get('pivot_canonic','')}",}
+
+# ==== Corrección por resultado sobre una base de prueba (--fixture) ====
+# La huella no reconoce consultas escritas distinto pero equivalentes. Con un
+# fixture SQLite (mismas tablas y campos que la base Access), cada crosstab
+# se traduce y se ejecuta (ver ejecucion_sql.py) y su resultado se compara,
+# por hash, con el del canónico de la consigna asignada. Los canónicos se
+# ejecutan una sola vez por corrida y su resultado queda en la caché.
+def resultados_canonicos(canonic_sql: Dict[str, str], fixture: str, segundos: float, max_filas: int) -> Dict[str, Dict[str, Any]]:
+    return {cons: ejecucion_sql.resultado_crosstab(sql, fixture, segundos, max_filas) for cons, sql in canonic_sql.items()}
+
+def comparar_resultado(sql: str, consigna: str, ejecucion: Dict[str, Any]) -> Dict[str, Any]:
+    """Columnas resultado_% (100 si el resultado es igual al del canónico de la consigna) y detalle_resultado."""
+    r = ejecucion_sql.resultado_crosstab(sql, ejecucion["fixture"], ejecucion["segundos"], ejecucion["filas"])
+    if "error" in r:
+        return {"resultado_%": "ERROR", "detalle_resultado": r["error"]}
+    canonicos = ejecucion["canonicos"]
+    canon = canonicos.get(consigna)
+    if canon is not None and "error" in canon:
+        return {"resultado_%": "ERROR", "detalle_resultado": f"canónico: {canon['error']}"}
+    # con el mismo resultado que otra consigna, se informa (la huella pudo asignar mal)
+    iguales = [c for c, rc in canonicos.items() if rc.get("hash") == r["hash"] and rc.get("filas") == r["filas"]]
+    if consigna in iguales:
+        return {"resultado_%": 100.0, "detalle_resultado": "igual"}
+    detalle = f"distinto: {r['filas']} filas vs {canon['filas']}" if canon is not None else f"{r['filas']} filas"
+    if iguales:
+        detalle += f"; igual a {iguales[0]}"
+    return {"resultado_%": 0.0, "detalle_resultado": detalle}
+
+# ==== Similitud entre alumnos: shingles de tokens + MinHash/LSH (--similitud) ====
+# Cada crosstab se parte en tokens (sin tildes, en minúsculas, [Pedidos] = Pedidos)
+# y se resume en sus secuencias de SHINGLE_TOKENS tokens seguidos. Se quitan
+# las del canónico de su consigna (lo que todos escriben igual si lo
+# resuelven bien) y, por consigna, se agrupan las consultas de distintos
+# alumnos con Jaccard >= umbral (ver comun/minhash.py).
+SHINGLE_TOKENS = 4
+MIN_SHINGLES   = 3
+def sql_tokens(sql: str) -> List[str]:
+    return [plegar(t).strip("[]") for _, t in tokens_sql(sql)]
+
+def sql_shingles(sql: str, k: int = SHINGLE_TOKENS) -> set:
+    tokens = sql_tokens(sql)
+    if len(tokens) <= k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+def load_canonic_shingles(canonic_json: Path) -> Dict[str, frozenset]:
+    return {cons: frozenset(sql_shingles(sql)) for cons, sql in load_canonic_sql(canonic_json).items()}
+
+def compare_json_con_shingles(json_path: Path, contexto) -> List[Any]:
+    """compare_json y, por cada fila, los shingles de su crosstab que no están en el canónico de su consigna."""
+    banco, canonic_shingles = contexto
+    crosstabs, filas = _comparar(load_items_from_json(json_path), banco)
+    shingles = [sorted(sql_shingles(sql) - canonic_shingles.get(fila["consigna_asignada"], frozenset()))
+                for (_, sql, _), fila in zip(crosstabs, filas)]
+    return [filas, shingles]
+
+def _write_grupos(path: Path, indices: Dict[str, IndiceLSH]) -> int:
+    """Graba los grupos de cada consigna con consultas de al menos dos alumnos; devuelve cuántos hay."""
+    campos = ["consigna", "grupo", "alumno", "file", "query_name", "integrantes", "%Jaccard_max", "mas_parecido"]
+    cantidad = 0
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(campos)
+        for cons in sorted(indices):
+            numero = 0
+            for grupo in indices[cons].grupos():
+                if len({alumno for (alumno, _, _), _, _ in grupo}) < 2:
+                    continue  # consultas parecidas de un mismo alumno
+                numero += 1
+                for (alumno, file, query), jaccard_max, (otro, otro_file, otra_query) in grupo:
+                    w.writerow([cons, numero, alumno, file, query, len(grupo), round(100 * jaccard_max, 1),
+                                f"{otro}/{otro_file}:{otra_query}"])
+            cantidad += numero
+    return cantidad
+
+def _json_por_alumno(input_folder: Path) -> List[Tuple[str, Path]]:
+    tareas = []
     for root, _, files in os.walk(input_folder):
         root_path = Path(root)
         try:
@@ -144,48 +342,120 @@ def compare_folder(input_folder: Path, canonic_fp, out_folder: Path):
             alumno = rel.parts[0] if rel.parts else root_path.name
         except Exception:
             alumno = root_path.name
-        alumno_rows = []
         for fn in files:
-            if not fn.lower().endswith(".json"):
+            if fn.lower().endswith(".json"):
+                tareas.append((alumno, root_path / fn))
+    tareas.sort()
+    return tareas
+
+def _write_rows(path: Path, rows: List[Dict[str, Any]]):
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        w.writeheader()
+        for r in rows:
+            w.writerow(r)
+
+def version_rubrica_sql(extra: str = "") -> str:
+    """Versión de la rúbrica para la caché (este script + el léxico + la ejecución + la normalización)."""
+    return version_rubrica(__file__, lexico_sql.__file__, ejecucion_sql.__file__, normalizacion.__file__, extra=extra)
+
+def clave_cache_sql(canon_bytes: bytes, fixture: Optional[Path], segundos: float, max_filas: int) -> Tuple[bytes, str]:
+    """Contexto y versión de la caché. Con fixture, la base y los límites de ejecución también invalidan la caché."""
+    if fixture is None:
+        return canon_bytes, version_rubrica_sql()
+    return (canon_bytes + b"\0" + hash_archivo(fixture).encode("utf-8"),
+            version_rubrica_sql(f"ejecucion:{segundos}:{max_filas}"))
+
+def cargar_ejecucion(cache, canonic_path: Path, fixture: Path, segundos: float, max_filas: int) -> Dict[str, Any]:
+    """Contexto de ejecución para compile_banco; los resultados canónicos se guardan en la caché abierta."""
+    canonicos = cache.obtener("canonicos")
+    if canonicos is None:
+        canonicos = resultados_canonicos(load_canonic_sql(canonic_path), str(fixture), segundos, max_filas)
+        cache.guardar("canonicos", canonicos)
+    for cons, r in sorted(canonicos.items()):
+        if "error" in r:
+            print(f"[AVISO] El canónico de {cons} no se pudo ejecutar: {r['error']}")
+    return {"fixture": str(fixture), "segundos": segundos, "filas": max_filas, "canonicos": canonicos}
+
+def compare_folder(input_folder: Path, canonic_fp, out_folder: Path, workers: Optional[int] = None,
+                   canonic_path: Optional[Path] = None, umbral_similitud: Optional[float] = None,
+                   fixture: Optional[Path] = None, segundos: float = ejecucion_sql.SEGUNDOS_MAX,
+                   max_filas: int = ejecucion_sql.FILAS_MAX):
+    out_folder.mkdir(parents=True, exist_ok=True)
+    tareas = _json_por_alumno(input_folder)
+    json_paths = [p for _, p in tareas]
+    alumno_de = {p: a for a, p in tareas}
+
+    total = 0
+    alumno_actual, alumno_rows = None, []
+    cons_csv = out_folder / "_consolidado_matching_crosstab.csv"
+    # solo se recalculan los .json nuevos o modificados (si se conoce el canónico)
+    canon_bytes = leer_bytes(canonic_path) if canonic_path else json.dumps(canonic_fp, sort_keys=True).encode("utf-8")
+    # con fixture, además se compara el resultado de ejecutar cada crosstab
+    if fixture is not None and canonic_path is None:
+        raise ValueError("La corrección por resultado necesita el JSON canónico (canonic_path)")
+    canon_bytes, version = clave_cache_sql(canon_bytes, fixture, segundos, max_filas)
+    # con umbral_similitud, además se agrupan las consultas casi iguales entre alumnos
+    indices = None
+    if umbral_similitud is not None:
+        tarea, espacio = compare_json_con_shingles, "sql_crosstab_shingles"
+        indices = {}
+    else:
+        tarea, espacio = compare_json, "sql_crosstab"
+    if fixture is not None:
+        espacio += "_ejecucion"
+    cache = abrir_cache(str(out_folder), espacio, canon_bytes, version)
+    with cache, cons_csv.open("w", newline="", encoding="utf-8") as f:
+        ejecucion = None
+        if fixture is not None:
+            ejecucion = cargar_ejecucion(cache, canonic_path, fixture, segundos, max_filas)
+        # el banco se indexa una vez y viaja a cada proceso con el contexto
+        banco = compile_banco(canonic_fp, ejecucion)
+        if indices is not None:
+            contexto = (banco, load_canonic_shingles(canonic_path) if canonic_path else {})
+        else:
+            contexto = banco
+        w = None
+        # los resultados llegan ordenados por alumno: cada CSV parcial se graba al cambiar de alumno
+        for json_path, filas, e in ejecutar_en_lote(json_paths, tarea, contexto, workers, cache=cache):
+            alumno = alumno_de[json_path]
+            if alumno != alumno_actual:
+                if alumno_rows:
+                    _write_rows(out_folder / f"{alumno_actual}_matching_crosstab.csv", alumno_rows)
+                alumno_actual, alumno_rows = alumno, []
+            if e is not None:
+                print(f"[ERROR] {json_path}: {e}")
                 continue
-            json_path = root_path / fn
-            items = load_items_from_json(json_path)
-            for it in items:
-                name = str(it.get("name","")); sql  = str(it.get("sql",""))
-                if not is_crosstab(sql):
-                    continue
-                stu_fp = parse_crosstab_fingerprint(sql)
-                best = {"consigna":"-", "score":0.0, "dbg":{}}
-                for cons, fp in canonic_fp.items():
-                    score, dbg = score_similarity(stu_fp, fp)
-                    if score > best["score"]:
-                        best = {"consigna": cons, "score": score, "dbg": dbg}
-                row = {"alumno": alumno,
-                       "file": json_path.name,
-                       "query_name": name,
-                       "consigna_asignada": best["consigna"],
-                       "similitud_%": best["score"],
-                       "detalle_tablas": f"{best['dbg'].get('tables_student', [])} vs {best['dbg'].get('tables_canonic', [])}",
-                       "detalle_agg": f"{best['dbg'].get('agg_student','')}/{best['dbg'].get('agg_canonic','')}",
-                       "detalle_pivot": f"{best['dbg'].get('pivot_student','')}/{best['dbg'].get('pivot_canonic','')}",}
-                alumno_rows.append(row); rows.append(row)
+            if indices is not None:
+                filas, shingles = filas
+                for fila, elementos in zip(filas, shingles):
+                    cons = fila["consigna_asignada"]
+                    if cons != "-" and len(elementos) >= MIN_SHINGLES:
+                        if cons not in indices:
+                            indices[cons] = IndiceLSH(umbral_similitud)
+                        indices[cons].agregar((alumno, json_path.name, fila["query_name"]), elementos)
+            for fila in filas:
+                row = {"alumno": alumno, "file": json_path.name, **fila}
+                if w is None:
+                    w = EscritorColumnar(str(cons_csv), list(row.keys()),
+                                         csv.DictWriter(f, fieldnames=list(row.keys())))
+                    w.writeheader()
+                w.writerow(row)
+                alumno_rows.append(row)
+                total += 1
         if alumno_rows:
-            part_csv = out_folder / f"{alumno}_matching_crosstab.csv"
-            with part_csv.open("w", newline="", encoding="utf-8") as f:
-                w = csv.DictWriter(f, fieldnames=list(alumno_rows[0].keys()))
-                w.writeheader()
-                for r in alumno_rows:
-                    w.writerow(r)
-    cons_csv = out_folder / "_consolidado_matching_crosstab.csv"
-    with cons_csv.open("w", newline="", encoding="utf-8") as f:
-        if rows:
-            w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-            w.writeheader()
-            for r in rows:
-                w.writerow(r)
-    print(f"✅ Matching finalizado. Total de filas comparadas: {len(rows)}")
+            _write_rows(out_folder / f"{alumno_actual}_matching_crosstab.csv", alumno_rows)
+        columnar = w.guardar() if w is not None else None
+    if indices is not None:
+        grupos_csv = out_folder / "_grupos_similitud_sql.csv"
+        grupos = _write_grupos(grupos_csv, indices)
+    print(f"✅ Matching finalizado. Total de filas comparadas: {total}")
     print(f"➡️  Consolidado: {cons_csv}")
+    if indices is not None:
+        print(f"➡️  Consultas casi iguales entre alumnos (Jaccard >= {umbral_similitud}): {grupos} grupo(s) en {grupos_csv}")
     print(f"➡️  Carpeta destino: {out_folder}")
+    if columnar:
+        print(f"➡️  Columnar: {columnar}")
 
 def main():
     ap = argparse.ArgumentParser(description="Comparación de CROSSTAB de alumnos vs canónico (similitud estructural).")
@@ -193,6 +463,12 @@ def main():
     ap.add_argument("--canonico", help="Ruta al JSON canónico (si se omite, se busca automáticamente en --canon_dir).")
     ap.add_argument("--canon_dir", default=DEFAULT_CANON_DIR, help="Carpeta donde buscar el canónico automáticamente.")
     ap.add_argument("--out", default=DEFAULT_OUTPUT, help="Carpeta de salida para CSVs.")
+    ap.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (por defecto NUM_WORKERS o cantidad de núcleos).")
+    ap.add_argument("--similitud", action="store_true", help="Agrupar además los crosstabs casi iguales entre alumnos, por consigna.")
+    ap.add_argument("--umbral_jaccard", type=float, default=0.8, help="Similitud de Jaccard mínima para --similitud (por defecto 0.8).")
+    ap.add_argument("--fixture", default=DEFAULT_FIXTURE, help="Base SQLite de prueba: corrige además ejecutando cada crosstab (por defecto FIXTURE_SQL).")
+    ap.add_argument("--limite_segundos", type=float, default=ejecucion_sql.SEGUNDOS_MAX, help="Tiempo máximo por consulta con --fixture.")
+    ap.add_argument("--limite_filas", type=int, default=ejecucion_sql.FILAS_MAX, help="Filas máximas por consulta con --fixture.")
     args = ap.parse_args()
 
     input_folder = Path(args.input)
@@ -219,7 +495,15 @@ def main():
     if not can_fp:
         raise SystemExit("[Error] No se pudieron obtener fingerprints canónicos (revisá el JSON canónico).")
 
-    compare_folder(input_folder, can_fp, out_folder)
+    fixture = Path(args.fixture) if args.fixture else None
+    if fixture is not None:
+        if not fixture.is_file():
+            raise SystemExit(f"[Error] No se encontró la base de prueba: {fixture}")
+        print(f"[INFO] Corrigiendo también por resultado sobre: {fixture}")
+
+    compare_folder(input_folder, can_fp, out_folder, args.workers, canonic_path,
+                   args.umbral_jaccard if args.similitud else None,
+                   fixture, args.limite_segundos, args.limite_filas)
 
 if __name__ == "__main__":
     main()
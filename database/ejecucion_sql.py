@@ -0,0 +1,615 @@
+# ============================================================
+# EJECUCIÓN DE CROSSTABS SOBRE UNA BASE SQLITE DE PRUEBA
+# ============================================================
+# La huella estructural (tablas, agregado, pivot) no reconoce consultas
+# escritas distinto pero equivalentes. Aquí cada crosstab de Access/Jet se
+# traduce a SQLite, se ejecuta sobre una base de prueba (fixture) con las
+# mismas tablas y campos que la base Access de la consigna, y el resultado
+# se resume en un hash: dos consultas con el mismo hash devuelven los mismos
+# datos.
+#
+# Traducción (sobre los tokens de lexico_sql):
+#   TRANSFORM agg SELECT filas FROM ... GROUP BY filas PIVOT expr [IN (...)]
+#     -> SELECT filas, expr, agg FROM ... GROUP BY filas, expr
+#   es decir, el crosstab en formato "largo": una fila por celda con datos
+#   (encabezados de fila, valor del pivot, valor de la celda). Si el pivot
+#   tiene IN (...), solo quedan esos valores, como las columnas de Access.
+#   "cadena" -> 'cadena', #m/d/aaaa# -> 'aaaa-mm-dd', & -> ||, Mod -> %,
+#   comodines * y ? de LIKE -> % y _, DISTINCTROW -> DISTINCT. Las funciones
+#   de Access (Format, IIf, Nz, Year, Left, Mid, ...) y los agregados First,
+#   Last, StDev y Var se implementan en Python y se registran en la conexión.
+#
+# El hash no depende del orden de las filas ni del de los encabezados de
+# fila: cada fila se resume en un hash de 64 bits de sus celdas
+# normalizadas (los encabezados ordenados, el valor del pivot y el de la
+# celda en su lugar, así un crosstab traspuesto no da el mismo hash) y se
+# suman módulo 2^64. Se calcula a medida que llegan las
+# filas, sin guardar el resultado en memoria.
+#
+# Cada consulta corre con un límite de tiempo (el progress handler de
+# sqlite3 la interrumpe) y de filas, así un producto cartesiano no traba el
+# lote. La base se abre de solo lectura.
+
+import os
+import re
+import time
+import math
+import sqlite3
+import hashlib
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+
+from lexico_sql import tokens_sql
+
+# Límites por consulta (los scripts permiten cambiarlos por línea de comandos)
+SEGUNDOS_MAX = float(os.getenv("SEGUNDOS_MAX_CONSULTA", "2"))
+FILAS_MAX = int(os.getenv("FILAS_MAX_CONSULTA", "100000"))
+
+# Filas que se piden a SQLite por vez
+LOTE_FILAS = 500
+# Instrucciones de SQLite entre controles del límite de tiempo
+PASOS_CONTROL = 1000
+
+_MASCARA = (1 << 64) - 1
+
+
+class LimiteExcedido(Exception):
+    """La consulta superó el límite de tiempo o de filas."""
+
+
+# ============================================================
+# FUNCIONES DE ACCESS
+# ============================================================
+
+MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+         "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
+DIAS = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+
+
+def _fecha(v):
+    """Fecha de un valor de la base: texto ISO ('aaaa-mm-dd[ hh:mm:ss]') o número de Access (días desde 1899-12-30)."""
+    if v is None:
+        return None
+    if isinstance(v, str):
+        try:
+            return datetime.fromisoformat(v.strip())
+        except ValueError:
+            return None
+    if isinstance(v, (int, float)):
+        return datetime(1899, 12, 30) + timedelta(days=v)
+    return None
+
+
+_re_formato = re.compile(r'yyyy|yy|q|mmmm|mmm|mm|m|dddd|ddd|dd|d|hh|h|nn|n|ss|s|"[^"]*"|\\.|.', re.I | re.S)
+
+_PARTES_FECHA = {
+    "yyyy": lambda d: f"{d.year:04d}", "yy": lambda d: f"{d.year % 100:02d}",
+    "q": lambda d: str((d.month - 1) // 3 + 1),
+    "mmmm": lambda d: MESES[d.month - 1], "mmm": lambda d: MESES[d.month - 1][:3],
+    "mm": lambda d: f"{d.month:02d}", "m": lambda d: str(d.month),
+    "dddd": lambda d: DIAS[d.weekday()], "ddd": lambda d: DIAS[d.weekday()][:3],
+    "dd": lambda d: f"{d.day:02d}", "d": lambda d: str(d.day),
+    "hh": lambda d: f"{d.hour:02d}", "h": lambda d: str(d.hour),
+    "nn": lambda d: f"{d.minute:02d}", "n": lambda d: str(d.minute),
+    "ss": lambda d: f"{d.second:02d}", "s": lambda d: str(d.second),
+}
+
+_FORMATOS_CON_NOMBRE = {"short date": "dd/mm/yyyy", "medium date": "dd-mmm-yy",
+                        "long date": "dddd d \"de\" mmmm \"de\" yyyy", "general date": "dd/mm/yyyy hh:nn:ss",
+                        "long time": "hh:nn:ss", "short time": "hh:nn"}
+
+_FORMATOS_NUMERICOS = {"general number": "", "fixed": "0.00", "standard": "#,##0.00",
+                       "percent": "0.00%", "currency": "$#,##0.00"}
+
+# Formato numérico: [literales][dígitos 0 # con separador de miles ,][.decimales 0 #][%][literales]
+_LITERALES = r'((?:"[^"]*"|\\.|[^0#.,%"\\])*)'
+_re_formato_numero = re.compile(_LITERALES + r"([0#,]*)(?:\.([0#]*))?(%?)" + _LITERALES, re.S)
+_re_literal = re.compile(r'"([^"]*)"|\\(.)|(.)', re.S)
+
+
+def _sin_comillas(literales):
+    return "".join(a or b or c for a, b, c in _re_literal.findall(literales))
+
+
+def _tipo_formato(formato):
+    """
+    ("fecha", patrón) o ("numero", partes) del segundo argumento de Format;
+    ValueError si no es un formato que se sepa reproducir.
+    """
+    clave = formato.lower()
+    if clave in _FORMATOS_CON_NOMBRE:
+        return "fecha", _FORMATOS_CON_NOMBRE[clave]
+    formato = _FORMATOS_NUMERICOS.get(clave, formato)
+    if formato == "":
+        return "numero", None
+    m = _re_formato_numero.fullmatch(formato)
+    if m and any(c in "0#" for c in m.group(2) + (m.group(3) or "")):
+        return "numero", m
+    # de fecha: con alguna parte de fecha, sin dígitos 0 # ni otras letras sin comillas
+    partes = [p.lower() for p in _re_formato.findall(formato)]
+    if any(p in _PARTES_FECHA for p in partes) and not any(
+            p in ("0", "#") or (p.isalpha() and p not in _PARTES_FECHA) for p in partes):
+        return "fecha", formato
+    raise ValueError(f"formato de Format no soportado: {formato!r}")
+
+
+def _general(v):
+    """Format sin formato: los números como los muestra Access (3.0 -> "3")."""
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return _celda(v)[1:]
+    return str(v)
+
+
+def _numero_de(v):
+    if isinstance(v, (int, float)):
+        return v
+    try:
+        return float(str(v).strip())
+    except ValueError:
+        return None
+
+
+def _format_numero(n, m):
+    previo, entero, decimales, porcentaje, posterior = m.groups()
+    if porcentaje:
+        n *= 100
+    # Access redondea la mitad hacia arriba (lejos de cero)
+    maximo = len(decimales or "")
+    texto = format(Decimal(repr(n)).quantize(Decimal(1).scaleb(-maximo), rounding=ROUND_HALF_UP), "f")
+    negativo = texto.startswith("-")
+    parte_entera, _, parte_decimal = texto.lstrip("-").partition(".")
+
+    # los 0 son dígitos obligatorios, los # opcionales
+    minimo = (decimales or "").rfind("0") + 1
+    parte_decimal = parte_decimal[:minimo] + parte_decimal[minimo:].rstrip("0")
+    if parte_entera == "0" and "0" not in entero:
+        parte_entera = ""
+    parte_entera = parte_entera.rjust(entero.count("0"), "0")
+    if "," in entero and parte_entera:
+        parte_entera = f"{int(parte_entera):,}".rjust(len(parte_entera), "0")
+    if negativo and not any(c not in "0" for c in parte_entera + parte_decimal):
+        negativo = False
+
+    salida = _sin_comillas(previo) + parte_entera
+    if decimales is not None:
+        salida += "." + parte_decimal
+    salida += porcentaje + _sin_comillas(posterior)
+    return ("-" if negativo else "") + salida
+
+
+def _format_fecha(d, formato):
+    salida = []
+    for parte in _re_formato.findall(formato):
+        clave = parte.lower()
+        if clave in _PARTES_FECHA:
+            salida.append(_PARTES_FECHA[clave](d))
+        elif parte.startswith('"'):
+            salida.append(parte[1:-1])
+        elif parte.startswith("\\"):
+            salida.append(parte[1:])
+        else:
+            salida.append(parte)
+    return "".join(salida)
+
+
+def _format(v, formato=None):
+    if v is None:
+        return None
+    if not formato:
+        return _general(v)
+    tipo, patron = _tipo_formato(formato)
+    if tipo == "fecha":
+        # los números se leen como fechas de Access solo con un formato de fecha
+        d = _fecha(v)
+        return _format_fecha(d, patron) if d is not None else str(v)
+    n = _numero_de(v)
+    if n is None:
+        return str(v)
+    return _general(n) if patron is None else _format_numero(n, patron)
+
+
+def _parte(funcion):
+    def parte(v):
+        d = _fecha(v)
+        return funcion(d) if d is not None else None
+    return parte
+
+
+_INTERVALOS = {"yyyy": "yyyy", "q": "q", "m": "m", "y": None, "d": "d", "w": None, "ww": None,
+               "h": "h", "n": "n", "s": "s"}
+
+
+def _datepart(intervalo, v):
+    d = _fecha(v)
+    if d is None or intervalo is None:
+        return None
+    intervalo = str(intervalo).lower()
+    if intervalo == "w":
+        return (d.weekday() + 1) % 7 + 1  # domingo = 1, como en Access
+    if intervalo == "y":
+        return d.timetuple().tm_yday
+    if intervalo == "ww":
+        return int(d.strftime("%U")) + 1
+    if intervalo not in _INTERVALOS:
+        return None
+    return int(_PARTES_FECHA[_INTERVALOS[intervalo]](d))
+
+
+def _verdadero(v):
+    return v is not None and v != 0 and v != ""
+
+
+def _nz(v, defecto=0):
+    return defecto if v is None else v
+
+
+def _val(v):
+    m = re.match(r"\s*[-+]?(\d+\.?\d*|\.\d+)", str(v)) if v is not None else None
+    if not m:
+        return 0
+    numero = float(m.group(0))
+    return int(numero) if numero.is_integer() else numero
+
+
+def _texto(funcion):
+    def con_texto(s, *args):
+        return None if s is None or any(a is None for a in args) else funcion(str(s), *args)
+    return con_texto
+
+
+def _numero(funcion):
+    def con_numero(x):
+        return None if x is None else funcion(x)
+    return con_numero
+
+
+# nombre de Access -> (cantidad de argumentos, -1 = variable; implementación)
+FUNCIONES = {
+    "FORMAT": (-1, _format),
+    "YEAR": (1, _parte(lambda d: d.year)),
+    "MONTH": (1, _parte(lambda d: d.month)),
+    "DAY": (1, _parte(lambda d: d.day)),
+    "HOUR": (1, _parte(lambda d: d.hour)),
+    "MINUTE": (1, _parte(lambda d: d.minute)),
+    "WEEKDAY": (1, _parte(lambda d: (d.weekday() + 1) % 7 + 1)),
+    "MONTHNAME": (1, lambda m: MESES[int(m) - 1] if m else None),
+    "DATEPART": (2, _datepart),
+    "DATEVALUE": (1, _parte(lambda d: d.strftime("%Y-%m-%d"))),
+    "CDATE": (1, _parte(lambda d: d.isoformat(" "))),
+    "IIF": (3, lambda c, a, b: a if _verdadero(c) else b),
+    "NZ": (-1, _nz),
+    "LEFT": (2, _texto(lambda s, n: s[:int(n)])),
+    "RIGHT": (2, _texto(lambda s, n: s[max(0, len(s) - int(n)):] if int(n) else "")),
+    "MID": (-1, _texto(lambda s, i, n=None: s[int(i) - 1:] if n is None else s[int(i) - 1:int(i) - 1 + int(n)])),
+    "LEN": (1, _texto(len)),
+    "UCASE": (1, _texto(str.upper)),
+    "LCASE": (1, _texto(str.lower)),
+    "CSTR": (1, _numero(lambda x: _celda(x)[1:])),
+    "VAL": (1, _val),
+    "INT": (1, _numero(lambda x: math.floor(float(x)))),
+    "FIX": (1, _numero(lambda x: math.trunc(float(x)))),
+    "CINT": (1, _numero(lambda x: round(float(x)))),
+    "CLNG": (1, _numero(lambda x: round(float(x)))),
+    "CDBL": (1, _numero(float)),
+    "CCUR": (1, _numero(lambda x: round(float(x), 4))),
+    "SGN": (1, _numero(lambda x: (x > 0) - (x < 0))),
+}
+
+
+class _Primero:
+    def __init__(self):
+        self.valor, self.hay = None, False
+
+    def step(self, v):
+        if not self.hay:
+            self.valor, self.hay = v, True
+
+    def finalize(self):
+        return self.valor
+
+
+class _Ultimo(_Primero):
+    def step(self, v):
+        self.valor = v
+
+
+class _Varianza:
+    poblacional = False
+    raiz = False
+
+    def __init__(self):
+        self.valores = []
+
+    def step(self, v):
+        if v is not None:
+            self.valores.append(float(v))
+
+    def finalize(self):
+        n = len(self.valores) - (0 if self.poblacional else 1)
+        if n <= 0:
+            return None
+        media = sum(self.valores) / len(self.valores)
+        var = sum((x - media) ** 2 for x in self.valores) / n
+        return math.sqrt(var) if self.raiz else var
+
+
+class _VarianzaP(_Varianza):
+    poblacional = True
+
+
+class _Desvio(_Varianza):
+    raiz = True
+
+
+class _DesvioP(_Varianza):
+    poblacional = True
+    raiz = True
+
+
+AGREGADOS = {"FIRST": _Primero, "LAST": _Ultimo, "VAR": _Varianza, "VARP": _VarianzaP,
+             "STDEV": _Desvio, "STDEVP": _DesvioP}
+
+# En la consulta traducida las funciones de Access llevan este prefijo (LEFT y
+# RIGHT son palabras reservadas de SQLite y FORMAT ya existe con otro sentido)
+PREFIJO = "jet_"
+
+
+# ============================================================
+# TRADUCCIÓN ACCESS -> SQLITE
+# ============================================================
+
+_re_fecha_us = re.compile(r"#\s*(\d{1,2})/(\d{1,2})/(\d{2,4})(?:\s+(\d{1,2}):(\d{2})(?::(\d{2}))?)?\s*#")
+_re_fecha_iso = re.compile(r"#\s*(\d{4})-(\d{1,2})-(\d{1,2})(?:\s+(\d{1,2}):(\d{2})(?::(\d{2}))?)?\s*#")
+
+
+def _literal(texto):
+    return "'" + texto.replace("'", "''") + "'"
+
+
+def _fecha_literal(token):
+    m = _re_fecha_iso.fullmatch(token)
+    if m:
+        a, mes, d = m.group(1), m.group(2), m.group(3)
+    else:
+        m = _re_fecha_us.fullmatch(token)
+        if not m:
+            raise ValueError(f"fecha no reconocida: {token}")
+        mes, d, a = m.group(1), m.group(2), m.group(3)
+        if len(a) == 2:
+            a = ("20" if int(a) < 30 else "19") + a
+    fecha = f"{int(a):04d}-{int(mes):02d}-{int(d):02d}"
+    if m.group(4):
+        fecha += f" {int(m.group(4)):02d}:{m.group(5)}:{m.group(6) or '00'}"
+    return _literal(fecha)
+
+
+def _cadena(token):
+    """Contenido de una cadena de Access ("..." o '...', con la comilla duplicada como escape)."""
+    comilla = token[0]
+    cuerpo = token[1:-1] if len(token) > 1 and token.endswith(comilla) else token[1:]
+    return cuerpo.replace(comilla * 2, comilla)
+
+
+def _validar_format(tokens, i):
+    """Si el formato de Format(...) en tokens[i] es una cadena, ValueError si no se sabe reproducir."""
+    nivel = 0
+    for j in range(i + 1, len(tokens)):
+        token = tokens[j][1]
+        if token == "(":
+            nivel += 1
+        elif token == ")":
+            nivel -= 1
+            if nivel == 0:
+                return
+        elif token == "," and nivel == 1:
+            if j + 2 < len(tokens) and tokens[j + 1][1][0] in "\"'" and tokens[j + 2][1] == ")":
+                _tipo_formato(_cadena(tokens[j + 1][1]))
+            return
+
+
+def _traducir_tokens(tokens):
+    """Tokens de Access -> tokens de SQLite, uno por uno (ver arriba)."""
+    salida = []
+    n = len(tokens)
+    for i, (espacio, token) in enumerate(tokens):
+        c = token[0]
+        palabra = token.upper()
+        siguiente = tokens[i + 1][1] if i + 1 < n else ""
+        if c == '"' or c == "'":
+            texto = _cadena(token)
+            if salida and salida[-1][1].upper() == "LIKE":
+                texto = texto.replace("*", "%").replace("?", "_")
+            token = _literal(texto)
+        elif c == "#":
+            token = _fecha_literal(token)
+        elif token == "&":
+            token = "||"
+        elif palabra == "MOD":
+            token = "%"
+        elif palabra == "DISTINCTROW":
+            token = "DISTINCT"
+        elif siguiente == "(" and (palabra in FUNCIONES or palabra in AGREGADOS):
+            if palabra == "FORMAT":
+                _validar_format(tokens, i)
+            token = PREFIJO + palabra.lower()
+        salida.append((espacio, token))
+    return salida
+
+
+def _texto_de(tokens):
+    partes = []
+    for espacio, token in tokens:
+        if espacio and partes:
+            partes.append(" ")
+        partes.append(token)
+    return "".join(partes)
+
+
+def _es_palabra(token, palabra):
+    return token[0] != "[" and token.upper() == palabra
+
+
+def traducir_crosstab(sql):
+    """SQL de SQLite que devuelve el crosstab de Access en formato largo; ValueError si no se puede."""
+    tokens = _traducir_tokens(tokens_sql(sql))
+
+    # posiciones de las palabras clave fuera de paréntesis (hasta el primer ";")
+    posicion = {}
+    nivel = 0
+    fin = len(tokens)
+    for i, (_, token) in enumerate(tokens):
+        if token == "(":
+            nivel += 1
+        elif token == ")":
+            nivel -= 1
+        elif token == ";" and nivel == 0:
+            fin = i
+            break
+        elif nivel == 0 and token[0] != "[":
+            palabra = token.upper()
+            if palabra == "GROUP" and i + 1 < len(tokens) and _es_palabra(tokens[i + 1][1], "BY"):
+                posicion.setdefault("GROUP", i)
+            elif palabra == "ORDER" and i + 1 < len(tokens) and _es_palabra(tokens[i + 1][1], "BY"):
+                posicion.setdefault("ORDER", i)
+            elif palabra in ("TRANSFORM", "SELECT", "FROM", "HAVING", "PIVOT"):
+                posicion.setdefault(palabra, i)
+    tokens = tokens[:fin]
+
+    faltan = [p for p in ("TRANSFORM", "SELECT", "FROM", "PIVOT") if p not in posicion]
+    if faltan:
+        raise ValueError(f"no es un crosstab (falta {', '.join(faltan)})")
+    t, s, f, p = posicion["TRANSFORM"], posicion["SELECT"], posicion["FROM"], posicion["PIVOT"]
+    if not t < s < f < p:
+        raise ValueError("orden de TRANSFORM/SELECT/FROM/PIVOT no reconocido")
+    g = posicion.get("GROUP")
+    h = posicion.get("HAVING")
+    o = posicion.get("ORDER")
+
+    agg = tokens[t + 1:s]
+    # TRANSFORM Sum(x) AS Total: el alias no hace falta
+    nivel = 0
+    for k, (_, token) in enumerate(agg):
+        nivel += (token == "(") - (token == ")")
+        if nivel == 0 and _es_palabra(token, "AS"):
+            agg = agg[:k]
+            break
+    if not agg:
+        raise ValueError("TRANSFORM sin agregado")
+
+    pivot = tokens[p + 1:]
+    valores = None
+    nivel = 0
+    for k, (_, token) in enumerate(pivot):
+        nivel += (token == "(") - (token == ")")
+        if nivel == 0 and _es_palabra(token, "IN") and k + 1 < len(pivot) and pivot[k + 1][1] == "(":
+            valores = pivot[k + 2:-1] if pivot[-1][1] == ")" else pivot[k + 2:]
+            pivot = pivot[:k]
+            break
+    if not pivot:
+        raise ValueError("PIVOT sin expresión")
+
+    fin_cuerpo = min(x for x in (g, h, o, p) if x is not None)
+    cuerpo = tokens[f:fin_cuerpo]
+    grupo = tokens[g + 2:min(x for x in (h, o, p) if x is not None and x > g)] if g is not None else []
+    having = tokens[h:min(x for x in (o, p) if x is not None and x > h)] if h is not None else []
+
+    expr_pivot = _texto_de(pivot)
+    consulta = (f"SELECT {_texto_de(tokens[s + 1:f])}, ({expr_pivot}) AS pivote__, {_texto_de(agg)} AS valor__ "
+                f"{_texto_de(cuerpo)} GROUP BY "
+                + (f"{_texto_de(grupo)}, " if grupo else "")
+                + f"({expr_pivot}) {_texto_de(having)}").rstrip()
+    if valores is not None:
+        # los valores de IN son encabezados de columna: se comparan como texto
+        lista = ", ".join(tok if tok[0] == "'" else _literal(tok) for _, tok in valores if tok != ",")
+        consulta = f"SELECT * FROM ({consulta}) WHERE CAST(pivote__ AS TEXT) IN ({lista})"
+    return consulta
+
+
+# ============================================================
+# EJECUCIÓN Y HASH DEL RESULTADO
+# ============================================================
+
+# Conexiones abiertas en este proceso: ruta del fixture -> conexión
+_conexiones = {}
+
+
+def conexion(fixture):
+    """Conexión de solo lectura al fixture (una por proceso), con las funciones de Access registradas."""
+    ruta = str(Path(fixture).resolve())
+    con = _conexiones.get(ruta)
+    if con is None:
+        if not os.path.isfile(ruta):
+            raise FileNotFoundError(f"No se encontró la base de prueba: {ruta}")
+        con = sqlite3.connect(Path(ruta).as_uri() + "?mode=ro", uri=True)
+        con.execute("PRAGMA query_only = ON")
+        for nombre, (cantidad, funcion) in FUNCIONES.items():
+            con.create_function(PREFIJO + nombre.lower(), cantidad, funcion, deterministic=True)
+        for nombre, clase in AGREGADOS.items():
+            con.create_aggregate(PREFIJO + nombre.lower(), 1, clase)
+        _conexiones[ruta] = con
+    return con
+
+
+def _celda(v):
+    """Texto normalizado de una celda: 3 = 3.0 = '3' (los valores del pivot son encabezados de texto)."""
+    if v is None:
+        return ""
+    if isinstance(v, float):
+        if v.is_integer() and abs(v) < 1e15:
+            return "v" + str(int(v))
+        return "v" + format(v, ".12g")
+    if isinstance(v, bytes):
+        return "v" + v.hex()
+    return "v" + str(v)
+
+
+def hash_filas(cursor, max_filas):
+    """(cantidad de filas, hash) del resultado, leyéndolo por lotes; LimiteExcedido si hay más de max_filas."""
+    suma = 0
+    filas = 0
+    while True:
+        lote = cursor.fetchmany(LOTE_FILAS)
+        if not lote:
+            break
+        filas += len(lote)
+        if filas > max_filas:
+            raise LimiteExcedido(f"límite de filas ({max_filas})")
+        for fila in lote:
+            # los encabezados de fila, en cualquier orden; pivote__ y valor__ (las
+            # dos últimas columnas) en su lugar, para no confundir filas y columnas
+            celdas = (sorted(map(_celda, fila[:-2])), _celda(fila[-2]), _celda(fila[-1]))
+            h = hashlib.blake2b(repr(celdas).encode("utf-8"), digest_size=8).digest()
+            suma = (suma + int.from_bytes(h, "little")) & _MASCARA
+    return filas, f"{suma:016x}"
+
+
+def ejecutar(sql_sqlite, fixture, segundos=SEGUNDOS_MAX, max_filas=FILAS_MAX):
+    """Ejecuta la consulta ya traducida dentro de los límites: (filas, hash)."""
+    con = conexion(fixture)
+    limite = time.perf_counter() + segundos
+    con.set_progress_handler(lambda: time.perf_counter() > limite, PASOS_CONTROL)
+    cursor = con.cursor()
+    try:
+        cursor.execute(sql_sqlite)
+        return hash_filas(cursor, max_filas)
+    except sqlite3.OperationalError as e:
+        if str(e) == "interrupted":
+            raise LimiteExcedido(f"límite de tiempo ({segundos:g} s)") from None
+        raise
+    finally:
+        cursor.close()
+        con.set_progress_handler(None, 0)
+
+
+def resultado_crosstab(sql, fixture, segundos=SEGUNDOS_MAX, max_filas=FILAS_MAX):
+    """{"filas", "hash"} del crosstab ejecutado sobre el fixture, o {"error"} si no se pudo."""
+    try:
+        filas, huella = ejecutar(traducir_crosstab(sql), fixture, segundos, max_filas)
+    except ValueError as e:
+        return {"error": f"sin traducción: {e}"}
+    except LimiteExcedido as e:
+        return {"error": str(e)}
+    except sqlite3.Error as e:
+        return {"error": f"SQLite: {e}"}
+    return {"filas": filas, "hash": huella}
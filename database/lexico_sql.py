@@ -0,0 +1,199 @@
+# ============================================================
+# LÉXICO Y HUELLA DE CONSULTAS ACCESS/JET SQL
+# ============================================================
+# Una sola pasada por el texto de cada consulta: una expresión regular
+# compilada la parte en tokens ([identificadores], "cadenas", 'cadenas',
+# #fechas#, palabras, signos; los espacios y comentarios -- y /* */ solo
+# marcan separación) y un recorrido de esos tokens, con una pila por
+# paréntesis, arma la huella del crosstab:
+#
+#   crosstab  TRANSFORM y PIVOT como palabras clave (no dentro de nombres o cadenas)
+#   agg       función de agregado de TRANSFORM ("SUM", "AVG", ...)
+#   pivot     expresión de PIVOT hasta el ";" (espacios colapsados)
+#   tables    tablas de todos los FROM/JOIN, también entre paréntesis
+#             ("FROM (A INNER JOIN B ON ...) INNER JOIN C") y en subconsultas
+#   joins     cada JOIN: tipo, tabla y pares "Tabla.campo=Tabla.campo" del ON
+#             (con los alias resueltos)
+#
+# El costo es lineal en el largo de la consulta.
+
+import re
+
+from comun.normalizacion import normalizar_espacios, internar
+
+_re_token = re.compile(r"""
+    (\s*)                                        # espacios antes del token
+    (\[[^\]]*\]?                                  # [identificador]
+    |\w+                                         # palabras y números
+    |"(?:[^"]|"")*"?|'(?:[^']|'')*'?             # cadenas ("" y '' escapan la comilla)
+    |\#[^#\n]*\#                                 # fechas #...#
+    |--[^\n]*|/\*.*?(?:\*/|\Z)                    # comentarios (se descartan)
+    |\S)                                         # signos
+""", re.S | re.X)
+
+# Palabras que cierran la lista de tablas de un FROM
+_FIN_DE_FROM = frozenset(("WHERE", "GROUP", "HAVING", "ORDER", "UNION", "PIVOT", "TRANSFORM", "SELECT"))
+_TIPOS_JOIN = frozenset(("INNER", "LEFT", "RIGHT", "OUTER", "FULL", "CROSS"))
+_CLAVES = _FIN_DE_FROM | _TIPOS_JOIN | frozenset(("FROM", "JOIN", "ON", "AS", "AND", "OR", "NOT", "BY"))
+
+
+def tokens_sql(sql):
+    """[(espacio previo, texto)] de la consulta; los comentarios no son tokens."""
+    tokens = _re_token.findall(sql)
+    if "--" in sql or "/*" in sql:
+        # un comentario separa lo que tiene a los lados
+        limpios = []
+        separado = ""
+        for espacio, token in tokens:
+            if token.startswith(("--", "/*")):
+                separado = " "
+            else:
+                limpios.append((espacio or separado, token))
+                separado = ""
+        tokens = limpios
+    return tokens
+
+
+def _es_identificador(token):
+    return token.isidentifier() or token[0] == "["
+
+
+def _tipo_join(textos, i):
+    """Tipo del JOIN en la posición i según las palabras anteriores (LEFT OUTER JOIN -> LEFT)."""
+    for k in (i - 1, i - 2):
+        if k >= 0:
+            palabra = textos[k].upper()
+            if palabra in _TIPOS_JOIN and palabra != "OUTER":
+                return palabra
+    return "INNER"
+
+
+def huella_sql(sql):
+    """Huella de la consulta: {"crosstab", "agg", "pivot", "tables", "joins"} (ver arriba)."""
+    tokens = tokens_sql(sql)
+    textos = [t for _, t in tokens]
+    n = len(textos)
+
+    transform = False
+    agg = ""
+    pivot_desde = pivot_hasta = None
+    tablas = set()
+    alias = {}
+    joins = []
+
+    # estado del nivel de paréntesis actual; la pila guarda el de los niveles de afuera
+    clausula = None      # "FROM", "ON", u otra palabra clave que abre cláusula
+    espera_tabla = False
+    espera_alias = False
+    pila = []
+    join_pendiente = None
+    ultima_tabla = None
+    ref_previa = None    # último Tabla.campo del ON, para armar "a = b"
+    igual = False
+
+    i = 0
+    while i < n:
+        token = textos[i]
+
+        if token.isidentifier() or token[0] == "[":
+            palabra = token.upper()
+            if palabra in _CLAVES and token[0] != "[" and not (i and textos[i - 1] == "."):
+                if palabra == "TRANSFORM":
+                    transform = True
+                    if not agg and i + 2 < n and textos[i + 2] == "(" and textos[i + 1].isidentifier():
+                        agg = textos[i + 1].upper()
+                elif palabra == "PIVOT" and pivot_desde is None:
+                    pivot_desde = i + 1
+                if palabra == "FROM":
+                    clausula, espera_tabla, espera_alias = "FROM", True, False
+                elif palabra == "JOIN":
+                    clausula, espera_tabla, espera_alias = "FROM", True, False
+                    join_pendiente = _tipo_join(textos, i)
+                elif palabra == "ON" and clausula == "FROM":
+                    clausula, espera_alias = "ON", False
+                    ref_previa, igual = None, False
+                elif palabra in _FIN_DE_FROM:
+                    clausula, espera_tabla, espera_alias = palabra, False, False
+                elif palabra in _TIPOS_JOIN:
+                    espera_alias = False
+                elif palabra in ("AND", "OR", "NOT"):
+                    ref_previa, igual = None, False
+                i += 1
+                continue
+            if clausula != "FROM" and clausula != "ON":
+                i += 1  # fuera de FROM/ON los nombres no cuentan para la huella
+                continue
+
+            # identificador, con sus partes: Tabla.campo, [Tabla].[campo]
+            partes = [token.strip("[]")]
+            j = i
+            while j + 2 < n and textos[j + 1] == "." and _es_identificador(textos[j + 2]):
+                partes.append(textos[j + 2].strip("[]"))
+                j += 2
+            nombre = ".".join(partes)
+
+            if clausula == "FROM":
+                if espera_tabla:
+                    ultima_tabla = internar(nombre)
+                    tablas.add(ultima_tabla)
+                    espera_tabla, espera_alias = False, True
+                    if join_pendiente:
+                        joins.append({"tipo": join_pendiente, "tabla": ultima_tabla, "on": []})
+                        join_pendiente = None
+                elif espera_alias:
+                    alias[nombre] = ultima_tabla
+                    espera_alias = False
+            elif igual and ref_previa is not None and joins:
+                joins[-1]["on"].append((ref_previa, nombre))
+                ref_previa, igual = None, False
+            else:
+                ref_previa, igual = nombre, False
+            i = j + 1
+            continue
+
+        if token == "(":
+            pila.append((clausula, espera_tabla, espera_alias))
+            # "FROM (A INNER JOIN B ...)" o "FROM (SELECT ...)": adentro sigue esperando tabla
+        elif token == ")":
+            if pila:
+                clausula, espera_tabla, espera_alias = pila.pop()
+                if espera_tabla:
+                    # el paréntesis ocupó el lugar de una tabla; puede seguir un alias
+                    espera_tabla, espera_alias = False, True
+        elif token == ",":
+            if clausula == "FROM":
+                espera_tabla, espera_alias = True, False
+        elif token == "=":
+            igual = clausula == "ON" and ref_previa is not None
+        elif token == ";":
+            if pivot_desde is not None and pivot_hasta is None:
+                pivot_hasta = i
+            clausula, espera_tabla, espera_alias = None, False, False
+        elif clausula == "ON":
+            ref_previa, igual = None, False
+        i += 1
+
+    pivot = ""
+    if pivot_desde is not None:
+        partes = []
+        for separado, token in tokens[pivot_desde:pivot_hasta if pivot_hasta is not None else n]:
+            if separado and partes:
+                partes.append(" ")
+            partes.append(token)
+        pivot = normalizar_espacios("".join(partes))
+
+    return {
+        "crosstab": transform and pivot_desde is not None,
+        "agg": agg,
+        "pivot": pivot,
+        "tables": sorted(tablas),
+        "joins": [{"tipo": j["tipo"], "tabla": j["tabla"],
+                   "on": sorted("=".join(sorted(_resolver(r, alias) for r in par)) for par in j["on"])}
+                  for j in joins],
+    }
+
+
+def _resolver(ref, alias):
+    """P.id -> Pedidos.id si P es alias de Pedidos."""
+    tabla, punto, campo = ref.partition(".")
+    return (alias.get(tabla, tabla) + punto + campo) if punto else ref